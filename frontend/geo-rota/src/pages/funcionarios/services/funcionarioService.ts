@@ -20,6 +20,12 @@ export type Funcionario = {
   apto_dirigir: boolean
   ativo: boolean
   grupos_rota?: FuncionarioGrupoRota[]
+  latitude?: number | null
+  longitude?: number | null
+  geocodificacao_status?: 'pendente' | 'concluida' | 'falha' | null
+  geocodificacao_precisao?: 'endereco' | 'cep' | 'cep_setor' | null
+  geocodificacao_erro?: string | null
+  geocodificado_em?: string | null
 }
 
 export type EscalaTrabalho = {
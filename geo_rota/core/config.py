@@ -15,7 +15,46 @@ class Settings(BaseSettings):
     OSRM_BASE_URL: str = "http://router.project-osrm.org"
     OSRM_PROFILE: str = "driving"
     OSRM_TIMEOUT: int = 8
-    ROTEIRIZACAO_CACHE_TTL_MINUTES: int = 60
+    OSRM_TAMANHO_MAXIMO_TABELA: int = 100  # igual ao --max-table-size do osrm-routed
+    OSRM_CONCORRENCIA_POR_HOST: int = 4  # requisições simultâneas (e conexões mantidas) por instância OSRM
+    OSRM_CACHE_TTL_DIAS: int = 30
+    OSRM_CACHE_PRECISAO_DECIMAIS: int = 4  # casas decimais das células do cache (~11 m)
+    ROTEIRIZACAO_CACHE_TTL_MINUTES: int = 60 * 24 * 8  # cobre a repetição do plano no mesmo dia da semana seguinte
+    ROTEIRIZACAO_CACHE_MAXIMO_REGISTROS: int = 5000  # acima disso os planos menos acessados são descartados
+    ROTEIRIZACAO_CACHE_MAXIMO_BYTES: int = 256 * 1024 * 1024
+    ROTEIRIZACAO_CACHE_INTERVALO_MANUTENCAO_MINUTOS: int = 30  # 0 desliga a limpeza periódica
+    ROTEIRIZACAO_MOTORISTA_CANDIDATOS_EXATOS: int = 3  # candidatos sequenciados após a poda por limite inferior
+    ROTEIRIZACAO_MOTORISTA_TEMPO_MAXIMO_S: float = 2.0  # orçamento total da escolha do motorista
+    ROTEIRIZACAO_ORTOOLS_CALLBACKS_PYTHON: bool = False  # True: custos via funções Python em vez de matrizes nativas
+    ROTEIRIZACAO_MEMO_SEQUENCIAMENTO_TAMANHO: int = 4096  # ordens de embarque mantidas em memória (LRU)
+    ROTEIRIZACAO_MEMO_SEQUENCIAMENTO_TTL_DIAS: int = 30
+    ROTEIRIZACAO_MEMO_SEQUENCIAMENTO_PERSISTENTE: bool = False  # True: também grava em cache_sequenciamentos
+    ROTEIRIZACAO_PARTIDA_QUENTE: bool = True  # semeia o VRP com o plano anterior mais parecido do grupo
+    ROTEIRIZACAO_PARTIDA_QUENTE_SIMILARIDADE_MINIMA: float = 0.5  # Jaccard mínimo entre os funcionários
+    ROTEIRIZACAO_DECOMPOSICAO_MINIMO_FUNCIONARIOS: int = 300  # a partir daqui o VRP é resolvido por clusters
+    ROTEIRIZACAO_DECOMPOSICAO_TAMANHO_CLUSTER: int = 120  # funcionários por cluster, em média
+    ROTEIRIZACAO_DECOMPOSICAO_PROCESSOS: int = 0  # processos que resolvem os clusters; 0 usa um por CPU
+    ROTEIRIZACAO_DECOMPOSICAO_MARGEM_FRONTEIRA: float = 0.25  # largura relativa da faixa reotimizada entre clusters
+    GEOCODE_TENTATIVAS_MAXIMAS: int = 3
+    GEOCODE_CEP_BASE: str | None = None  # arquivo gerado por scripts/compilar_base_cep.py
+    # Ordem da cadeia de provedores; "cep" e "nominatim_local" só entram se configurados.
+    GEOCODE_PROVEDORES: List[str] = ["nominatim_local", "nominatim", "cep"]
+    GEOCODE_NOMINATIM_URL: str = "https://nominatim.openstreetmap.org"
+    GEOCODE_NOMINATIM_TIMEOUT: float = 5.0
+    GEOCODE_NOMINATIM_INTERVALO_SEGUNDOS: float = 1.0
+    GEOCODE_NOMINATIM_RAJADA: int = 1  # chamadas liberadas de uma vez antes de aplicar o intervalo
+    # Estado do limitador compartilhado entre workers: "arquivo", "sqlite" ou "memoria" (só o processo).
+    GEOCODE_LIMITE_TAXA_BACKEND: str = "arquivo"
+    GEOCODE_LIMITE_TAXA_CAMINHO: str | None = None  # padrão: diretório temporário do sistema
+    GEOCODE_NOMINATIM_LOCAL_URL: str | None = None  # ex.: http://localhost:8088 (scripts/nominatim_stub.py)
+    GEOCODE_NOMINATIM_LOCAL_TIMEOUT: float = 2.0
+    GEOCODE_DISJUNTOR_FALHAS: int = 3
+    GEOCODE_DISJUNTOR_ABERTURA_SEGUNDOS: float = 60.0
+    GEOCODE_INTERVALO_RETENTATIVA_SEGUNDOS: float = 5.0
+    GEOCODE_CACHE_MEMORIA_TAMANHO: int = 20000
+    GEOCODE_CACHE_MEMORIA_TTL_SEGUNDOS: int = 3600
+    GEOCODE_CACHE_TTL_DIAS: int = 180
+    GEOCODE_CACHE_NEGATIVO_TTL_HORAS: int = 12
 
     class Config:
         env_file = ".env"
@@ -1,4 +1,5 @@
 import logging
+from contextlib import asynccontextmanager
 
 from fastapi import FastAPI, Request, status
 from fastapi.exceptions import RequestValidationError
@@ -7,8 +8,20 @@ from fastapi.responses import JSONResponse
 
 from geo_rota.core.config import settings
 from geo_rota.routers import incluir_rotas
+from geo_rota.services.cache_vrp_service import iniciar_manutencao_periodica
+from geo_rota.utils.osrm import fechar_clientes_osrm
 
-app = FastAPI(title="GeoRota")
+
+@asynccontextmanager
+async def lifespan(_: FastAPI):
+    manutencao_cache = iniciar_manutencao_periodica()
+    yield
+    if manutencao_cache is not None:
+        manutencao_cache.cancel()
+    await fechar_clientes_osrm()
+
+
+app = FastAPI(title="GeoRota", lifespan=lifespan)
 logger = logging.getLogger("geo_rota.api")
 
 app.add_middleware(
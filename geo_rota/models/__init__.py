@@ -3,7 +3,12 @@ from geo_rota.models.employee import Funcionario  # noqa: F401
 from geo_rota.models.employee_route_group import FuncionarioGrupoRota  # noqa: F401
 from geo_rota.models.employee_unavailability import IndisponibilidadeFuncionario  # noqa: F401
 from geo_rota.models.destination import DestinoRota  # noqa: F401
-from geo_rota.models.cache import CacheGeocodificacao, CacheResultadoVRP  # noqa: F401
+from geo_rota.models.cache import (  # noqa: F401
+    CacheGeocodificacao,
+    CacheResultadoVRP,
+    CacheSequenciamento,
+    CacheTrajeto,
+)
 from geo_rota.models.route import (
     AtribuicaoRota,
     FuncionarioPendenteRota,
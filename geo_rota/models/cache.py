@@ -1,7 +1,19 @@
 from datetime import datetime
 
-from sqlalchemy import Column, DateTime, Float, Integer, String, Text, UniqueConstraint
+from sqlalchemy import (
+    Boolean,
+    Column,
+    DateTime,
+    Enum as SAEnum,
+    Float,
+    Integer,
+    LargeBinary,
+    String,
+    Text,
+    UniqueConstraint,
+)
 
+from geo_rota.models.enums import PrecisaoGeocodificacaoEnum
 from geo_rota.models.model_base import Base
 
 
@@ -15,6 +27,15 @@ class CacheGeocodificacao(Base):
     endereco_normalizado = Column(String(255), nullable=False, index=True)
     latitude = Column(Float, nullable=False)
     longitude = Column(Float, nullable=False)
+    precisao = Column(
+        SAEnum(PrecisaoGeocodificacaoEnum, name="precisao_geocodificacao_enum", native_enum=False),
+        nullable=True,  # nulo em registros antigos, equivalente a precisão de endereço
+    )
+    # Cache negativo: o endereço não foi encontrado; latitude/longitude ficam zeradas.
+    negativo = Column(Boolean, default=False, nullable=False)
+    erro = Column(String(255), nullable=True)
+    # Nulo em registros antigos: a validade passa a contar a partir de atualizado_em.
+    expira_em = Column(DateTime, nullable=True, index=True)
     criado_em = Column(DateTime, default=datetime.utcnow, nullable=False)
     atualizado_em = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
 
@@ -27,6 +48,49 @@ class CacheResultadoVRP(Base):
 
     id = Column(Integer, primary_key=True, index=True)
     chave_contexto = Column(String(128), nullable=False, index=True)
+    # Permite achar planos anteriores do grupo para a partida a quente do VRP.
+    grupo_rota_id = Column(Integer, nullable=True, index=True)
+    # JSON puro só em registros antigos; os novos gravam vazio aqui e usam payload_compactado.
     payload = Column(Text, nullable=False)
+    payload_compactado = Column(LargeBinary, nullable=True)  # JSON compactado com zlib
+    tamanho_bytes = Column(Integer, nullable=True)
+    acertos = Column(Integer, default=0, nullable=False)
+    # Último acerto (ou a gravação): ordena o descarte LRU de services.cache_vrp_service.
+    ultimo_acesso_em = Column(DateTime, nullable=True, index=True)
+    # Definido na gravação e não alterado pelos acertos; nulo em registros antigos (vale criado_em + TTL).
+    expira_em = Column(DateTime, nullable=True, index=True)
     criado_em = Column(DateTime, default=datetime.utcnow, nullable=False)
     atualizado_em = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
+
+
+class CacheTrajeto(Base):
+    """Distância e duração OSRM entre duas células (coordenadas arredondadas)."""
+
+    __tablename__ = "cache_trajetos"
+    __table_args__ = (
+        UniqueConstraint("perfil", "origem", "destino", name="uq_cache_trajetos_par"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    perfil = Column(String(32), nullable=False)
+    origem = Column(String(32), nullable=False, index=True)
+    destino = Column(String(32), nullable=False)
+    distancia_m = Column(Integer, nullable=False)
+    duracao_s = Column(Integer, nullable=False)
+    expira_em = Column(DateTime, nullable=False, index=True)
+    atualizado_em = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
+
+
+class CacheSequenciamento(Base):
+    """Ordem de embarque já resolvida para um conjunto de paradas (ver ``utils.memo_sequenciamento``)."""
+
+    __tablename__ = "cache_sequenciamentos"
+    __table_args__ = (
+        UniqueConstraint("chave", name="uq_cache_sequenciamentos_chave"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    chave = Column(String(64), nullable=False, index=True)
+    ordem = Column(Text, nullable=False)  # JSON com as células das paradas, na ordem de visita
+    expira_em = Column(DateTime, nullable=False, index=True)
+    atualizado_em = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
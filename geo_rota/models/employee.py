@@ -2,6 +2,9 @@ from sqlalchemy import (
     Boolean,
     Column,
     Date,
+    DateTime,
+    Enum as SAEnum,
+    Float,
     ForeignKey,
     Integer,
     String,
@@ -9,6 +12,7 @@ from sqlalchemy import (
 )
 from sqlalchemy.orm import relationship
 
+from geo_rota.models.enums import PrecisaoGeocodificacaoEnum, StatusGeocodificacaoEnum
 from geo_rota.models.model_base import Base
 
 
@@ -33,6 +37,23 @@ class Funcionario(Base):
     estado = Column(String(2), nullable=False)
     cep = Column(String(9), nullable=False)
 
+    # Coordenadas persistidas pela geocodificação em segundo plano.
+    latitude = Column(Float, nullable=True)
+    longitude = Column(Float, nullable=True)
+    endereco_hash = Column(String(64), nullable=True)  # impressão digital do endereço geocodificado
+    geocodificacao_status = Column(
+        SAEnum(StatusGeocodificacaoEnum, name="status_geocodificacao_enum", native_enum=False),
+        default=StatusGeocodificacaoEnum.PENDENTE,
+        nullable=False,
+    )
+    geocodificacao_precisao = Column(
+        SAEnum(PrecisaoGeocodificacaoEnum, name="precisao_geocodificacao_funcionario_enum", native_enum=False),
+        nullable=True,
+    )
+    geocodificacao_tentativas = Column(Integer, default=0, nullable=False)
+    geocodificacao_erro = Column(String(255), nullable=True)
+    geocodificado_em = Column(DateTime, nullable=True)
+
     possui_cnh = Column(Boolean, default=False, nullable=False)
     categoria_cnh = Column(String(5), nullable=True)
     cnh_valida_ate = Column(Date, nullable=True)
@@ -50,6 +50,24 @@ class ModoAlgoritmoEnum(str, Enum):
     AUTOMATICO = "automatico"
 
 
+class QualidadeRoteirizacaoEnum(str, Enum):
+    PREVIA = "previa"
+    EQUILIBRADA = "equilibrada"
+    COMPLETA = "completa"
+
+
 class RoleEnum(str, Enum):
     ADMIN = "admin"
     USER = "user"
+
+
+class StatusGeocodificacaoEnum(str, Enum):
+    PENDENTE = "pendente"
+    CONCLUIDA = "concluida"
+    FALHA = "falha"
+
+
+class PrecisaoGeocodificacaoEnum(str, Enum):
+    ENDERECO = "endereco"
+    CEP = "cep"
+    CEP_SETOR = "cep_setor"
@@ -1,6 +1,7 @@
 from fastapi import APIRouter
 
 from geo_rota.routers.auth_router import router as auth_router
+from geo_rota.routers.cache_router import router as cache_router
 from geo_rota.routers.empresa_router import router as empresa_router
 from geo_rota.routers.destino_router import router as destino_router
 from geo_rota.routers.funcionario_router import router as funcionario_router
@@ -19,3 +20,4 @@ def incluir_rotas(app_router: APIRouter) -> None:
     app_router.include_router(veiculo_router)
     app_router.include_router(rota_router)
     app_router.include_router(usuario_router)
+    app_router.include_router(cache_router)
@@ -0,0 +1,19 @@
+from fastapi import APIRouter, Depends
+from sqlalchemy.orm import Session
+
+from geo_rota.core.auth import require_admin
+from geo_rota.core.database import get_db
+from geo_rota.schemas import EstatisticasCacheVRPRead, ResumoManutencaoCacheVRPRead
+from geo_rota.services import estatisticas_cache_vrp, manter_cache_vrp
+
+router = APIRouter(prefix="/cache", tags=["Cache"], dependencies=[Depends(require_admin)])
+
+
+@router.get("/vrp", response_model=EstatisticasCacheVRPRead)
+def obter_estatisticas_cache_vrp(db: Session = Depends(get_db)) -> EstatisticasCacheVRPRead:
+    return estatisticas_cache_vrp(db)
+
+
+@router.post("/vrp/manutencao", response_model=ResumoManutencaoCacheVRPRead)
+def executar_manutencao_cache_vrp(db: Session = Depends(get_db)) -> ResumoManutencaoCacheVRPRead:
+    return manter_cache_vrp(db)
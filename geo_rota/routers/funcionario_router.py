@@ -1,10 +1,12 @@
 from typing import List, Optional
 
-from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi import APIRouter, BackgroundTasks, Depends, File, HTTPException, Query, UploadFile, status
 from sqlalchemy.orm import Session
 
 from geo_rota.core.auth import get_current_active_user, require_admin
 from geo_rota.core.database import get_db
+from geo_rota.models import Funcionario
+from geo_rota.models.enums import StatusGeocodificacaoEnum
 from geo_rota.models.user import Usuario
 from geo_rota.schemas import (
     EscalaTrabalhoCreate,
@@ -17,6 +19,7 @@ from geo_rota.schemas import (
     IndisponibilidadeFuncionarioCreate,
     IndisponibilidadeFuncionarioRead,
     IndisponibilidadeFuncionarioUpdate,
+    ResultadoImportacaoFuncionarios,
 )
 from geo_rota.services import (
     adicionar_escala_trabalho,
@@ -25,7 +28,12 @@ from geo_rota.services import (
     atualizar_funcionario,
     cadastrar_indisponibilidade,
     criar_funcionario,
+    geocodificar_funcionario,
+    geocodificar_funcionarios_em_segundo_plano,
+    geocodificar_pendentes_em_segundo_plano,
+    importar_funcionarios,
     inativar_funcionario,
+    ler_planilha_funcionarios,
     listar_indisponibilidades,
     listar_funcionarios,
     obter_funcionario,
@@ -40,16 +48,57 @@ router = APIRouter(
 )
 
 
+def _agendar_geocodificacao(background_tasks: BackgroundTasks, funcionario: Funcionario) -> None:
+    if funcionario.geocodificacao_status == StatusGeocodificacaoEnum.PENDENTE:
+        background_tasks.add_task(geocodificar_funcionario, funcionario.id)
+
+
 @router.post("/", response_model=FuncionarioComDetalhes, status_code=status.HTTP_201_CREATED)
 def criar(
     dados: FuncionarioCreatePayload,
+    background_tasks: BackgroundTasks,
     _: Usuario = Depends(require_admin),
     db: Session = Depends(get_db),
 ) -> FuncionarioComDetalhes:
     try:
-        return criar_funcionario(db, dados)
+        funcionario = criar_funcionario(db, dados)
     except ValueError as exc:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc)) from exc
+    _agendar_geocodificacao(background_tasks, funcionario)
+    return funcionario
+
+
+@router.post("/importar", response_model=ResultadoImportacaoFuncionarios)
+def importar(
+    background_tasks: BackgroundTasks,
+    empresa_id: int = Query(...),
+    arquivo: UploadFile = File(...),
+    _: Usuario = Depends(require_admin),
+    db: Session = Depends(get_db),
+) -> ResultadoImportacaoFuncionarios:
+    try:
+        linhas = ler_planilha_funcionarios(arquivo.file, arquivo.filename or "")
+        resultado, funcionarios_ids = importar_funcionarios(db, empresa_id, linhas)
+    except UnicodeDecodeError as exc:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Não foi possível ler o arquivo: salve o CSV com codificação UTF-8.",
+        ) from exc
+    except ValueError as exc:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc)) from exc
+    if funcionarios_ids:
+        background_tasks.add_task(geocodificar_funcionarios_em_segundo_plano, funcionarios_ids)
+    return resultado
+
+
+@router.post("/geocodificacao/reprocessar", status_code=status.HTTP_202_ACCEPTED)
+def reprocessar_geocodificacao(
+    background_tasks: BackgroundTasks,
+    empresa_id: Optional[int] = Query(default=None),
+    _: Usuario = Depends(require_admin),
+) -> dict:
+    background_tasks.add_task(geocodificar_pendentes_em_segundo_plano, empresa_id)
+    return {"mensagem": "Reprocessamento da geocodificação agendado."}
 
 
 @router.get("/", response_model=List[FuncionarioRead])
@@ -72,6 +121,7 @@ def obter(funcionario_id: int, db: Session = Depends(get_db)) -> FuncionarioComD
 def atualizar(
     funcionario_id: int,
     dados: FuncionarioUpdatePayload,
+    background_tasks: BackgroundTasks,
     _: Usuario = Depends(require_admin),
     db: Session = Depends(get_db),
 ) -> FuncionarioComDetalhes:
@@ -81,6 +131,25 @@ def atualizar(
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc)) from exc
     if not funcionario:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Funcionário não encontrado")
+    _agendar_geocodificacao(background_tasks, funcionario)
+    return funcionario
+
+
+@router.post(
+    "/{funcionario_id}/geocodificacao",
+    response_model=FuncionarioRead,
+    status_code=status.HTTP_202_ACCEPTED,
+)
+def geocodificar(
+    funcionario_id: int,
+    background_tasks: BackgroundTasks,
+    _: Usuario = Depends(require_admin),
+    db: Session = Depends(get_db),
+) -> FuncionarioRead:
+    funcionario = obter_funcionario(db, funcionario_id)
+    if not funcionario:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Funcionário não encontrado")
+    background_tasks.add_task(geocodificar_funcionario, funcionario.id)
     return funcionario
 
 
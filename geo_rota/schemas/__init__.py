@@ -1,9 +1,11 @@
+from geo_rota.schemas.cache import EstatisticasCacheVRPRead, ResumoManutencaoCacheVRPRead  # noqa: F401
 from geo_rota.schemas.company import EmpresaCreate, EmpresaRead, EmpresaUpdate  # noqa: F401
 from geo_rota.schemas.employee import (  # noqa: F401
     EscalaTrabalhoCreate,
     EscalaTrabalhoInput,
     EscalaTrabalhoRead,
     EscalaTrabalhoUpdate,
+    ErroImportacaoFuncionario,
     FuncionarioComDetalhes,
     FuncionarioCreate,
     FuncionarioCreatePayload,
@@ -13,6 +15,7 @@ from geo_rota.schemas.employee import (  # noqa: F401
     IndisponibilidadeFuncionarioCreate,
     IndisponibilidadeFuncionarioRead,
     IndisponibilidadeFuncionarioUpdate,
+    ResultadoImportacaoFuncionarios,
 )
 from geo_rota.schemas.destination import (  # noqa: F401
     DestinoRotaCreate,
@@ -22,6 +25,7 @@ from geo_rota.schemas.destination import (  # noqa: F401
 from geo_rota.schemas.route import (  # noqa: F401
     AtribuicaoRotaCreate,
     AtribuicaoRotaRead,
+    AvaliacaoMotoristaRead,
     FuncionarioPendenteRotaCreate,
     FuncionarioPendenteRotaRead,
     LogAdministrativoRead,
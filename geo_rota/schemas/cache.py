@@ -0,0 +1,27 @@
+from datetime import datetime
+
+from pydantic import BaseModel
+
+
+class EstatisticasCacheVRPRead(BaseModel):
+    registros: int
+    bytes: int
+    expirados: int  # vencidos ainda não removidos pela manutenção
+    acertos: int  # desde o início deste processo
+    faltas: int
+    taxa_acerto: float | None = None
+    acertos_registrados: int  # soma dos acertos gravados em cada plano
+    maximo_registros: int
+    maximo_bytes: int
+    ultima_manutencao: datetime | None = None
+
+    class Config:
+        from_attributes = True
+
+
+class ResumoManutencaoCacheVRPRead(BaseModel):
+    expirados: int
+    descartados: int
+
+    class Config:
+        from_attributes = True
@@ -1,8 +1,13 @@
-from datetime import date, time
+from datetime import date, datetime, time
 
 from pydantic import BaseModel, EmailStr, Field
 
-from geo_rota.models.enums import TipoIndisponibilidadeEnum, TurnoTrabalhoEnum
+from geo_rota.models.enums import (
+    PrecisaoGeocodificacaoEnum,
+    StatusGeocodificacaoEnum,
+    TipoIndisponibilidadeEnum,
+    TurnoTrabalhoEnum,
+)
 from geo_rota.schemas.route_group import FuncionarioGrupoRotaInput, FuncionarioGrupoRotaRead
 
 
@@ -84,6 +89,12 @@ class FuncionarioRead(FuncionarioBase):
     id: int
     empresa_id: int
     grupos_rota: list[FuncionarioGrupoRotaRead] = Field(default_factory=list)
+    latitude: float | None = None
+    longitude: float | None = None
+    geocodificacao_status: StatusGeocodificacaoEnum | None = None
+    geocodificacao_precisao: PrecisaoGeocodificacaoEnum | None = None
+    geocodificacao_erro: str | None = None
+    geocodificado_em: datetime | None = None
 
     class Config:
         from_attributes = True
@@ -131,3 +142,16 @@ class FuncionarioCreatePayload(FuncionarioCreate):
 class FuncionarioUpdatePayload(FuncionarioUpdate):
     escalas_trabalho: list[EscalaTrabalhoInput] | None = None
     grupos_rota: list[FuncionarioGrupoRotaInput] | None = None
+
+
+class ErroImportacaoFuncionario(BaseModel):
+    linha: int
+    cpf: str | None = None
+    mensagens: list[str]
+
+
+class ResultadoImportacaoFuncionarios(BaseModel):
+    total_linhas: int = 0
+    importados: int = 0
+    com_erro: int = 0
+    erros: list[ErroImportacaoFuncionario] = Field(default_factory=list)
@@ -5,6 +5,7 @@ from pydantic import BaseModel, Field
 from geo_rota.models.enums import (
     ModoAlgoritmoEnum,
     PapelAtribuicaoRota,
+    QualidadeRoteirizacaoEnum,
     StatusRotaEnum,
     TurnoTrabalhoEnum,
 )
@@ -97,6 +98,16 @@ class SugestaoVeiculoExtra(BaseModel):
     passageiros_atendidos: int
 
 
+class AvaliacaoMotoristaRead(BaseModel):
+    funcionario_id: int
+    limite_inferior_m: int | None = None
+    distancia_m: int | None = None
+    situacao: str
+
+    class Config:
+        from_attributes = True
+
+
 class RequisicaoGerarRota(BaseModel):
     empresa_id: int
     grupo_rota_id: int
@@ -114,6 +125,10 @@ class RequisicaoGerarRota(BaseModel):
     destino_cidade: str | None = Field(default=None, max_length=80)
     destino_estado: str | None = Field(default=None, max_length=2, min_length=2)
     destino_cep: str | None = Field(default=None, max_length=9, min_length=8)
+    geocodificacao_parcial: bool = Field(
+        default=True,
+        description="Gera a rota mesmo que alguns endereços falhem; esses funcionários ficam pendentes.",
+    )
 
 
 class RequisicaoGerarRotasVRP(RequisicaoGerarRota):
@@ -121,6 +136,30 @@ class RequisicaoGerarRotasVRP(RequisicaoGerarRota):
     maximo_veiculos: int | None = Field(default=None, ge=1)
     usar_frota_terceirizada: bool = Field(default=True)
     ignorar_cache: bool = Field(default=False)
+    motoristas_no_vrp: bool = Field(
+        default=True,
+        description=(
+            "Cada veículo parte da casa de um motorista apto e o VRP escolhe motoristas e veículos numa só "
+            "resolução; False usa o destino como depósito único e escolhe o motorista depois, por rota."
+        ),
+    )
+    qualidade: QualidadeRoteirizacaoEnum = Field(
+        default=QualidadeRoteirizacaoEnum.EQUILIBRADA,
+        description="previa responde em até ~2 s; completa dá mais tempo de busca a grupos grandes.",
+    )
+    tempo_maximo_s: float | None = Field(
+        default=None,
+        gt=0,
+        le=600,
+        description="Teto do tempo de busca do VRP, em segundos; substitui o teto da qualidade escolhida.",
+    )
+    decomposicao: bool | None = Field(
+        default=None,
+        description=(
+            "Resolve por clusters geográficos em processos paralelos, com reparação das fronteiras; "
+            "None decide pelo tamanho do grupo."
+        ),
+    )
 
 
 class RotaBase(BaseModel):
@@ -169,6 +208,7 @@ class RotaRead(RotaBase):
     logs_administrativos: list[LogAdministrativoRead] = Field(default_factory=list)
     logs_erros: list[LogErroRotaRead] = Field(default_factory=list)
     sugestoes_veiculos: list[SugestaoVeiculoExtra] = Field(default_factory=list)
+    avaliacao_motoristas: list[AvaliacaoMotoristaRead] = Field(default_factory=list)
 
     class Config:
         from_attributes = True
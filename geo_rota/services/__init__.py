@@ -1,3 +1,4 @@
+from geo_rota.services.cache_vrp_service import estatisticas_cache_vrp, manter_cache_vrp  # noqa: F401
 from geo_rota.services.empresa_service import (  # noqa: F401
     atualizar_empresa,
     criar_empresa,
@@ -26,6 +27,15 @@ from geo_rota.services.funcionario_service import (  # noqa: F401
     remover_indisponibilidade,
     remover_escala_trabalho,
 )
+from geo_rota.services.geocodificacao_service import (  # noqa: F401
+    geocodificar_funcionario,
+    geocodificar_funcionarios_em_segundo_plano,
+    geocodificar_pendentes_em_segundo_plano,
+)
+from geo_rota.services.importacao_funcionario_service import (  # noqa: F401
+    importar_funcionarios,
+    ler_planilha_funcionarios,
+)
 from geo_rota.services.grupo_rota_service import (  # noqa: F401
     atualizar_grupo_rota,
     criar_grupo_rota,
@@ -0,0 +1,217 @@
+"""
+Aquecimento e portabilidade do cache de geocodificação.
+
+``aquecer_cache_geocodificacao`` percorre os endereços ativos (funcionários,
+destinos e empresas) e geocodifica apenas os que ainda não estão no cache, em
+lotes pequenos processados por um pool limitado de threads. Cada lote é gravado
+ao terminar, então uma execução interrompida retoma de onde parou na seguinte.
+O intervalo mínimo entre chamadas de cada provedor continua valendo entre as
+threads, pois o limitador de taxa é compartilhado.
+
+``exportar_snapshot_cache`` e ``importar_snapshot_cache`` levam o cache para um
+arquivo compacto (TSV compactado com gzip) e de volta, para que uma instalação
+nova comece com o cache já preenchido.
+"""
+
+from __future__ import annotations
+
+import gzip
+import json
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Iterator, List, Optional
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from geo_rota.models import DestinoRota, Empresa, Funcionario
+from geo_rota.models.cache import CacheGeocodificacao
+from geo_rota.models.enums import PrecisaoGeocodificacaoEnum
+from geo_rota.services.geocodificacao_service import (
+    montar_endereco_destino,
+    montar_endereco_empresa,
+    montar_endereco_funcionario,
+)
+from geo_rota.utils.endereco import canonicalizar_endereco
+from geo_rota.utils.geocode import enderecos_em_cache, geocode_addresses, gravar_registros_cache_geocodificacao
+
+FORMATO_SNAPSHOT = "geo_rota-cache-geocodificacao"
+VERSAO_SNAPSHOT = 1
+_TAMANHO_LOTE_SNAPSHOT = 1000
+
+
+@dataclass
+class ResumoAquecimento:
+    total: int = 0
+    ja_em_cache: int = 0
+    geocodificados: int = 0
+    falhas: int = 0
+
+    @property
+    def processados(self) -> int:
+        return self.ja_em_cache + self.geocodificados + self.falhas
+
+
+@dataclass
+class ResumoSnapshot:
+    lidos: int = 0
+    gravados: int = 0
+    ignorados: int = 0
+
+
+def listar_enderecos_ativos(session: Session, empresa_id: Optional[int] = None) -> List[str]:
+    """Endereços distintos (pela chave canônica) de funcionários, destinos e empresas ativos."""
+    funcionarios = session.query(Funcionario).filter(Funcionario.ativo.is_(True))
+    destinos = session.query(DestinoRota).filter(DestinoRota.ativo.is_(True))
+    empresas = session.query(Empresa)
+    if empresa_id is not None:
+        funcionarios = funcionarios.filter(Funcionario.empresa_id == empresa_id)
+        destinos = destinos.filter(DestinoRota.empresa_id == empresa_id)
+        empresas = empresas.filter(Empresa.id == empresa_id)
+
+    enderecos = [montar_endereco_empresa(empresa) for empresa in empresas]
+    enderecos.extend(montar_endereco_destino(destino) for destino in destinos)
+    enderecos.extend(montar_endereco_funcionario(funcionario) for funcionario in funcionarios.yield_per(500))
+
+    distintos = {}
+    for endereco in enderecos:
+        chave = canonicalizar_endereco(endereco)
+        if chave and chave not in distintos:
+            distintos[chave] = endereco
+    return list(distintos.values())
+
+
+def aquecer_cache_geocodificacao(
+    session: Session,
+    empresa_id: Optional[int] = None,
+    concorrencia: int = 2,
+    tamanho_lote: int = 25,
+    progresso: Optional[Callable[[ResumoAquecimento], None]] = None,
+) -> ResumoAquecimento:
+    """Geocodifica os endereços ativos ausentes do cache e retorna o resumo da execução."""
+    enderecos = listar_enderecos_ativos(session, empresa_id)
+    resumo = ResumoAquecimento(total=len(enderecos))
+
+    faltantes: List[str] = []
+    for inicio in range(0, len(enderecos), 500):
+        lote = enderecos[inicio : inicio + 500]
+        em_cache = enderecos_em_cache(lote)
+        resumo.ja_em_cache += len(em_cache)
+        faltantes.extend(endereco for endereco in lote if endereco not in em_cache)
+    if progresso:
+        progresso(resumo)
+
+    lotes = [faltantes[inicio : inicio + tamanho_lote] for inicio in range(0, len(faltantes), tamanho_lote)]
+    with ThreadPoolExecutor(max_workers=max(concorrencia, 1)) as executor:
+        futuros = [executor.submit(geocode_addresses, lote) for lote in lotes]
+        for futuro in as_completed(futuros):
+            resultados, falhas = futuro.result()
+            resumo.geocodificados += len(resultados)
+            resumo.falhas += len(falhas)
+            if progresso:
+                progresso(resumo)
+    return resumo
+
+
+def _linha_snapshot(registro: CacheGeocodificacao) -> str:
+    erro = " ".join((registro.erro or "").split())
+    return "\t".join(
+        [
+            registro.endereco_normalizado,
+            f"{registro.latitude:.7f}",
+            f"{registro.longitude:.7f}",
+            registro.precisao.value if registro.precisao else "",
+            "1" if registro.negativo else "0",
+            erro,
+            registro.expira_em.isoformat(timespec="seconds") if registro.expira_em else "",
+        ]
+    )
+
+
+def exportar_snapshot_cache(session: Session, destino: str | Path, incluir_negativos: bool = False) -> int:
+    """Grava as entradas vigentes do cache em ``destino`` e retorna quantas foram exportadas."""
+    agora = datetime.utcnow()
+    consulta = select(CacheGeocodificacao).where(
+        (CacheGeocodificacao.expira_em.is_(None)) | (CacheGeocodificacao.expira_em > agora)
+    )
+    if not incluir_negativos:
+        consulta = consulta.where(CacheGeocodificacao.negativo.is_(False))
+
+    total = 0
+    with gzip.open(destino, "wt", encoding="utf-8") as arquivo:
+        cabecalho = {"formato": FORMATO_SNAPSHOT, "versao": VERSAO_SNAPSHOT, "gerado_em": agora.isoformat()}
+        arquivo.write(json.dumps(cabecalho) + "\n")
+        for registro in session.execute(consulta.execution_options(yield_per=_TAMANHO_LOTE_SNAPSHOT)).scalars():
+            arquivo.write(_linha_snapshot(registro) + "\n")
+            total += 1
+    return total
+
+
+def _ler_snapshot(origem: str | Path) -> Iterator[dict]:
+    with gzip.open(origem, "rt", encoding="utf-8") as arquivo:
+        try:
+            cabecalho = json.loads(arquivo.readline())
+        except json.JSONDecodeError as exc:
+            raise ValueError("Arquivo não é um snapshot do cache de geocodificação.") from exc
+        if cabecalho.get("formato") != FORMATO_SNAPSHOT or cabecalho.get("versao") != VERSAO_SNAPSHOT:
+            raise ValueError("Formato ou versão de snapshot não suportado.")
+
+        for linha in arquivo:
+            campos = linha.rstrip("\n").split("\t")
+            if len(campos) != 7:
+                continue
+            chave, latitude, longitude, precisao, negativo, erro, expira_em = campos
+            yield {
+                "endereco_normalizado": canonicalizar_endereco(chave),
+                "latitude": float(latitude),
+                "longitude": float(longitude),
+                "precisao": PrecisaoGeocodificacaoEnum(precisao) if precisao else None,
+                "negativo": negativo == "1",
+                "erro": erro or None,
+                "expira_em": datetime.fromisoformat(expira_em) if expira_em else None,
+            }
+
+
+def importar_snapshot_cache(session: Session, origem: str | Path, sobrescrever: bool = False) -> ResumoSnapshot:
+    """
+    Carrega um snapshot no cache persistente.
+
+    Entradas vencidas são ignoradas; as já existentes no banco só são substituídas
+    com ``sobrescrever``.
+    """
+    resumo = ResumoSnapshot()
+    agora = datetime.utcnow()
+    lote: dict[str, dict] = {}
+
+    def gravar() -> None:
+        valores = lote
+        if not sobrescrever:
+            existentes = set(
+                session.execute(
+                    select(CacheGeocodificacao.endereco_normalizado).where(
+                        CacheGeocodificacao.endereco_normalizado.in_(list(lote))
+                    )
+                ).scalars()
+            )
+            resumo.ignorados += len(existentes)
+            valores = {chave: item for chave, item in lote.items() if chave not in existentes}
+        if valores:
+            gravar_registros_cache_geocodificacao(session, list(valores.values()))
+            session.commit()
+            resumo.gravados += len(valores)
+        lote.clear()
+
+    for item in _ler_snapshot(origem):
+        resumo.lidos += 1
+        if not item["endereco_normalizado"] or (item["expira_em"] is not None and item["expira_em"] <= agora):
+            resumo.ignorados += 1
+            continue
+        item.update(criado_em=agora, atualizado_em=agora)
+        lote[item["endereco_normalizado"]] = item
+        if len(lote) >= _TAMANHO_LOTE_SNAPSHOT:
+            gravar()
+    if lote:
+        gravar()
+    return resumo
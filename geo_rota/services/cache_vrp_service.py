@@ -0,0 +1,257 @@
+"""
+Armazenamento e manutenção do cache de planos VRP (``cache_resultado_vrp``).
+
+Os planos são gravados como JSON compactado com zlib em ``payload_compactado``;
+registros antigos, com o JSON puro em ``payload``, continuam legíveis. Cada
+acerto atualiza ``ultimo_acesso_em`` e o contador do registro.
+
+A manutenção (``manter_cache_vrp``) remove os planos vencidos e, se a tabela
+ainda passar de ``ROTEIRIZACAO_CACHE_MAXIMO_REGISTROS`` ou
+``ROTEIRIZACAO_CACHE_MAXIMO_BYTES``, descarta os menos acessados recentemente.
+``iniciar_manutencao_periodica`` a agenda no laço de eventos da API a cada
+``ROTEIRIZACAO_CACHE_INTERVALO_MANUTENCAO_MINUTOS``.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import threading
+import zlib
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import List, Optional
+
+from sqlalchemy import and_, delete, func, or_, select
+from sqlalchemy.orm import Session
+
+from geo_rota.core.config import settings
+from geo_rota.core.database import SessionLocal
+from geo_rota.models.cache import CacheResultadoVRP
+
+logger = logging.getLogger("geo_rota.roteirizacao")
+
+_NIVEL_COMPRESSAO = 6
+_TAMANHO_LOTE_REMOCAO = 500
+
+_lock = threading.Lock()
+_contadores = {"acertos": 0, "faltas": 0}
+_ultima_manutencao: Optional[datetime] = None
+
+
+@dataclass
+class ResumoManutencaoCache:
+    expirados: int = 0
+    descartados: int = 0
+
+
+@dataclass
+class EstatisticasCacheVRP:
+    registros: int
+    bytes: int
+    expirados: int
+    acertos: int
+    faltas: int
+    acertos_registrados: int
+    maximo_registros: int
+    maximo_bytes: int
+    ultima_manutencao: Optional[datetime]
+
+    @property
+    def taxa_acerto(self) -> Optional[float]:
+        consultas = self.acertos + self.faltas
+        return self.acertos / consultas if consultas else None
+
+
+def _contar(chave: str) -> None:
+    with _lock:
+        _contadores[chave] += 1
+
+
+def _ttl() -> timedelta:
+    return timedelta(minutes=settings.ROTEIRIZACAO_CACHE_TTL_MINUTES)
+
+
+def _expirado():
+    """Condição SQL dos planos vencidos; acertos não alteram nenhuma das colunas usadas."""
+    agora = datetime.utcnow()
+    return or_(
+        CacheResultadoVRP.expira_em <= agora,
+        and_(CacheResultadoVRP.expira_em.is_(None), CacheResultadoVRP.criado_em < agora - _ttl()),
+    )
+
+
+def _vigente(registro: CacheResultadoVRP) -> bool:
+    agora = datetime.utcnow()
+    if registro.expira_em is not None:
+        return registro.expira_em > agora
+    return registro.criado_em is None or registro.criado_em >= agora - _ttl()
+
+
+def _tamanho_registro():
+    return func.coalesce(CacheResultadoVRP.tamanho_bytes, func.length(CacheResultadoVRP.payload))
+
+
+def compactar_payload(payload: dict) -> bytes:
+    raw = json.dumps(payload, sort_keys=True, separators=(",", ":"))
+    return zlib.compress(raw.encode("utf-8"), _NIVEL_COMPRESSAO)
+
+
+def ler_payload(registro: CacheResultadoVRP) -> Optional[dict]:
+    """Plano gravado no registro, compactado ou no formato antigo; None se ilegível."""
+    try:
+        if registro.payload_compactado is not None:
+            return json.loads(zlib.decompress(registro.payload_compactado))
+        return json.loads(registro.payload)
+    except (zlib.error, json.JSONDecodeError, UnicodeDecodeError):
+        return None
+
+
+def obter_plano_cacheado(session: Session, chave: str) -> Optional[dict]:
+    if not chave:
+        return None
+    registro = session.query(CacheResultadoVRP).filter(CacheResultadoVRP.chave_contexto == chave).first()
+    payload = None
+    if registro and _vigente(registro):
+        payload = ler_payload(registro)
+    if payload is None:
+        _contar("faltas")
+        return None
+    _contar("acertos")
+    registro.acertos = (registro.acertos or 0) + 1
+    registro.ultimo_acesso_em = datetime.utcnow()
+    return payload
+
+
+def armazenar_plano_cacheado(
+    session: Session,
+    chave: str,
+    payload: dict,
+    grupo_rota_id: Optional[int] = None,
+) -> None:
+    if not chave:
+        return
+    compactado = compactar_payload(payload)
+    agora = datetime.utcnow()
+    valores = {
+        "grupo_rota_id": grupo_rota_id,
+        "payload": "",
+        "payload_compactado": compactado,
+        "tamanho_bytes": len(compactado),
+        "ultimo_acesso_em": agora,
+        "expira_em": agora + _ttl(),
+    }
+    registro = session.query(CacheResultadoVRP).filter(CacheResultadoVRP.chave_contexto == chave).first()
+    if registro:
+        for campo, valor in valores.items():
+            setattr(registro, campo, valor)
+    else:
+        session.add(CacheResultadoVRP(chave_contexto=chave, acertos=0, **valores))
+
+
+def _remover(session: Session, ids: List[int]) -> None:
+    for inicio in range(0, len(ids), _TAMANHO_LOTE_REMOCAO):
+        lote = ids[inicio : inicio + _TAMANHO_LOTE_REMOCAO]
+        session.execute(delete(CacheResultadoVRP).where(CacheResultadoVRP.id.in_(lote)))
+
+
+def expurgar_expirados(session: Session) -> int:
+    resultado = session.execute(delete(CacheResultadoVRP).where(_expirado()))
+    return resultado.rowcount or 0
+
+
+def aplicar_limites(
+    session: Session,
+    maximo_registros: Optional[int] = None,
+    maximo_bytes: Optional[int] = None,
+) -> int:
+    """Descarta os planos menos acessados recentemente até a tabela caber nos limites."""
+    maximo_registros = settings.ROTEIRIZACAO_CACHE_MAXIMO_REGISTROS if maximo_registros is None else maximo_registros
+    maximo_bytes = settings.ROTEIRIZACAO_CACHE_MAXIMO_BYTES if maximo_bytes is None else maximo_bytes
+    registros, total_bytes = session.execute(
+        select(func.count(CacheResultadoVRP.id), func.coalesce(func.sum(_tamanho_registro()), 0))
+    ).one()
+    if registros <= maximo_registros and total_bytes <= maximo_bytes:
+        return 0
+
+    acesso = func.coalesce(CacheResultadoVRP.ultimo_acesso_em, CacheResultadoVRP.atualizado_em)
+    linhas = session.execute(
+        select(CacheResultadoVRP.id, _tamanho_registro()).order_by(acesso.desc(), CacheResultadoVRP.id.desc())
+    ).all()
+    mantidos = 0
+    acumulado = 0
+    descartar: List[int] = []
+    for registro_id, tamanho in linhas:
+        tamanho = tamanho or 0
+        if not descartar and mantidos < maximo_registros and acumulado + tamanho <= maximo_bytes:
+            mantidos += 1
+            acumulado += tamanho
+        else:
+            descartar.append(registro_id)
+    _remover(session, descartar)
+    return len(descartar)
+
+
+def manter_cache_vrp(session: Session) -> ResumoManutencaoCache:
+    global _ultima_manutencao
+    resumo = ResumoManutencaoCache(expirados=expurgar_expirados(session))
+    resumo.descartados = aplicar_limites(session)
+    session.commit()
+    _ultima_manutencao = datetime.utcnow()
+    return resumo
+
+
+def manter_cache_vrp_em_segundo_plano() -> ResumoManutencaoCache:
+    with SessionLocal() as session:
+        resumo = manter_cache_vrp(session)
+    if resumo.expirados or resumo.descartados:
+        logger.info(
+            "Manutenção do cache VRP: %s plano(s) vencido(s) e %s descartado(s) pelo limite de tamanho.",
+            resumo.expirados,
+            resumo.descartados,
+        )
+    return resumo
+
+
+async def _manter_periodicamente(intervalo_s: float) -> None:
+    while True:
+        try:
+            await asyncio.to_thread(manter_cache_vrp_em_segundo_plano)
+        except Exception:  # noqa: BLE001 - a próxima rodada tenta de novo
+            logger.exception("Falha na manutenção do cache VRP.")
+        await asyncio.sleep(intervalo_s)
+
+
+def iniciar_manutencao_periodica() -> Optional[asyncio.Task]:
+    """Agenda a manutenção no laço de eventos em execução; None se estiver desligada."""
+    intervalo = settings.ROTEIRIZACAO_CACHE_INTERVALO_MANUTENCAO_MINUTOS
+    if intervalo <= 0:
+        return None
+    return asyncio.get_running_loop().create_task(_manter_periodicamente(intervalo * 60))
+
+
+def estatisticas_cache_vrp(session: Session) -> EstatisticasCacheVRP:
+    registros, total_bytes, acertos_registrados = session.execute(
+        select(
+            func.count(CacheResultadoVRP.id),
+            func.coalesce(func.sum(_tamanho_registro()), 0),
+            func.coalesce(func.sum(CacheResultadoVRP.acertos), 0),
+        )
+    ).one()
+    expirados = session.execute(
+        select(func.count(CacheResultadoVRP.id)).where(_expirado())
+    ).scalar_one()
+    with _lock:
+        acertos, faltas = _contadores["acertos"], _contadores["faltas"]
+    return EstatisticasCacheVRP(
+        registros=registros,
+        bytes=int(total_bytes),
+        expirados=expirados,
+        acertos=acertos,
+        faltas=faltas,
+        acertos_registrados=int(acertos_registrados),
+        maximo_registros=settings.ROTEIRIZACAO_CACHE_MAXIMO_REGISTROS,
+        maximo_bytes=settings.ROTEIRIZACAO_CACHE_MAXIMO_BYTES,
+        ultima_manutencao=_ultima_manutencao,
+    )
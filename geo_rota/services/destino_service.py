@@ -4,6 +4,7 @@ from sqlalchemy.orm import Session
 
 from geo_rota.models import DestinoRota
 from geo_rota.schemas import DestinoRotaCreate, DestinoRotaUpdate
+from geo_rota.utils.endereco import montar_endereco
 from geo_rota.utils.geocode import GeocodeError, geocode_address
 
 
@@ -21,29 +22,7 @@ def _normalizar_campos(payload: dict) -> None:
 
 
 def _montar_endereco_completo(payload: dict) -> str:
-    partes: list[str] = []
-    logradouro = payload.get("logradouro", "")
-    numero = payload.get("numero", "")
-    complemento = payload.get("complemento")
-    bairro = payload.get("bairro", "")
-    cidade = payload.get("cidade", "")
-    estado = payload.get("estado", "")
-    cep = payload.get("cep", "")
-
-    cabeca = ", ".join(filter(None, [logradouro, numero]))
-    if cabeca:
-        partes.append(cabeca)
-    if complemento:
-        partes.append(complemento)
-    if bairro:
-        partes.append(bairro)
-    cidade_estado = " - ".join(filter(None, [cidade, estado]))
-    if cidade_estado:
-        partes.append(cidade_estado)
-    if cep:
-        partes.append(cep)
-    partes.append("Brasil")
-    return ", ".join(partes)
+    return montar_endereco(*(payload.get(campo) for campo in ENDERECO_CAMPOS))
 
 
 def criar_destino(db: Session, dados: DestinoRotaCreate) -> DestinoRota:
@@ -12,6 +12,7 @@ from geo_rota.schemas import (
     IndisponibilidadeFuncionarioCreate,
     IndisponibilidadeFuncionarioUpdate,
 )
+from geo_rota.services.geocodificacao_service import marcar_geocodificacao_pendente
 
 
 def _criar_escalas_para_funcionario(
@@ -83,6 +84,7 @@ def criar_funcionario(db: Session, dados: FuncionarioCreatePayload) -> Funcionar
     grupos_rota = payload.pop("grupos_rota", [])
 
     funcionario = Funcionario(**payload)
+    marcar_geocodificacao_pendente(funcionario)
     db.add(funcionario)
     db.flush()  # garante ID para escalas
 
@@ -129,6 +131,7 @@ def atualizar_funcionario(
 
     for campo, valor in payload.items():
         setattr(funcionario, campo, valor)
+    marcar_geocodificacao_pendente(funcionario)
 
     if escalas is not None:
         for escala in list(funcionario.escalas_trabalho):
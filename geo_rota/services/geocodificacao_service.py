@@ -0,0 +1,220 @@
+"""
+Geocodificação dos endereços de funcionários fora do caminho das requisições.
+
+As coordenadas ficam gravadas no próprio cadastro junto com uma impressão digital
+do endereço. O cadastro e a edição apenas marcam o funcionário como pendente; a
+geocodificação roda em segundo plano, com novas tentativas em caso de falha, e a
+geração de rotas passa a ler as coordenadas já persistidas.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import logging
+import time
+from datetime import datetime
+from typing import Dict, Iterable, Optional, Sequence, Tuple
+
+from geopy.exc import GeocoderServiceError
+from sqlalchemy.orm import Session
+
+from geo_rota.core.config import settings
+from geo_rota.core.database import SessionLocal
+from geo_rota.models import DestinoRota, Empresa, Funcionario
+from geo_rota.models.enums import StatusGeocodificacaoEnum
+from geo_rota.utils import GeocodeError, ResultadoGeocodificacao, geocode_address_detalhado, geocode_addresses
+from geo_rota.utils.endereco import canonicalizar_endereco, montar_endereco
+
+logger = logging.getLogger("geo_rota.geocodificacao")
+
+
+def montar_endereco_funcionario(funcionario: Funcionario) -> str:
+    """Concatena os campos de endereço do funcionário em um formato padrão."""
+    return montar_endereco(
+        funcionario.logradouro,
+        funcionario.numero,
+        funcionario.complemento,
+        funcionario.bairro,
+        funcionario.cidade,
+        funcionario.estado,
+        funcionario.cep,
+    )
+
+
+def montar_endereco_destino(destino: DestinoRota) -> str:
+    return montar_endereco(
+        destino.logradouro,
+        destino.numero,
+        destino.complemento,
+        destino.bairro,
+        destino.cidade,
+        destino.estado,
+        destino.cep,
+    )
+
+
+def montar_endereco_empresa(empresa: Empresa) -> str:
+    """Gera o endereço completo utilizado como destino padrão da empresa."""
+    return montar_endereco(empresa.endereco_base, cidade=empresa.cidade, estado=empresa.estado, cep=empresa.cep)
+
+
+def calcular_hash_endereco(funcionario: Funcionario) -> str:
+    endereco = canonicalizar_endereco(montar_endereco_funcionario(funcionario))
+    return hashlib.sha256(endereco.encode("utf-8")).hexdigest()
+
+
+def _coordenadas_atualizadas(funcionario: Funcionario) -> bool:
+    return (
+        funcionario.latitude is not None
+        and funcionario.longitude is not None
+        and funcionario.endereco_hash == calcular_hash_endereco(funcionario)
+    )
+
+
+def _aplicar_coordenadas(funcionario: Funcionario, resultado: ResultadoGeocodificacao) -> None:
+    funcionario.latitude, funcionario.longitude = resultado.coordenadas
+    funcionario.geocodificacao_precisao = resultado.precisao
+    funcionario.endereco_hash = calcular_hash_endereco(funcionario)
+    funcionario.geocodificacao_status = StatusGeocodificacaoEnum.CONCLUIDA
+    funcionario.geocodificacao_erro = None
+    funcionario.geocodificado_em = datetime.utcnow()
+
+
+def _registrar_falha(funcionario: Funcionario, mensagem: str) -> None:
+    funcionario.geocodificacao_status = StatusGeocodificacaoEnum.FALHA
+    funcionario.geocodificacao_erro = mensagem[:255]
+
+
+def marcar_geocodificacao_pendente(funcionario: Funcionario) -> bool:
+    """
+    Marca o funcionário para geocodificação quando o endereço mudou.
+
+    Retorna ``True`` se uma nova geocodificação precisa ser agendada.
+    """
+    if _coordenadas_atualizadas(funcionario):
+        return False
+    funcionario.latitude = None
+    funcionario.longitude = None
+    funcionario.geocodificacao_precisao = None
+    funcionario.endereco_hash = calcular_hash_endereco(funcionario)
+    funcionario.geocodificacao_status = StatusGeocodificacaoEnum.PENDENTE
+    funcionario.geocodificacao_tentativas = 0
+    funcionario.geocodificacao_erro = None
+    return True
+
+
+def geocodificar_funcionario(funcionario_id: int) -> None:
+    """
+    Tarefa de segundo plano que geocodifica e persiste o endereço de um funcionário.
+
+    Falhas do provedor são repetidas com espera exponencial até o limite configurado;
+    endereços que o provedor não encontra são marcados como falha imediatamente.
+    """
+    tentativas_maximas = max(settings.GEOCODE_TENTATIVAS_MAXIMAS, 1)
+    for tentativa in range(1, tentativas_maximas + 1):
+        with SessionLocal() as session:
+            funcionario = session.get(Funcionario, funcionario_id)
+            if funcionario is None or _coordenadas_atualizadas(funcionario):
+                return
+
+            funcionario.geocodificacao_tentativas = (funcionario.geocodificacao_tentativas or 0) + 1
+            try:
+                resultado = geocode_address_detalhado(montar_endereco_funcionario(funcionario))
+            except GeocodeError as exc:
+                _registrar_falha(funcionario, str(exc))
+                session.commit()
+                return
+            except GeocoderServiceError as exc:
+                _registrar_falha(funcionario, str(exc))
+                session.commit()
+                logger.warning(
+                    "Tentativa %s/%s de geocodificar o funcionário %s falhou: %s",
+                    tentativa,
+                    tentativas_maximas,
+                    funcionario_id,
+                    exc,
+                )
+            else:
+                _aplicar_coordenadas(funcionario, resultado)
+                session.commit()
+                return
+
+        if tentativa < tentativas_maximas:
+            time.sleep(settings.GEOCODE_INTERVALO_RETENTATIVA_SEGUNDOS * 2 ** (tentativa - 1))
+
+
+def geocodificar_funcionarios_pendentes(
+    session: Session,
+    empresa_id: Optional[int] = None,
+    funcionarios_ids: Optional[Iterable[int]] = None,
+) -> int:
+    """
+    Geocodifica em lote os funcionários pendentes ou com falha e retorna quantos foram resolvidos.
+    """
+    consulta = session.query(Funcionario).filter(
+        Funcionario.geocodificacao_status != StatusGeocodificacaoEnum.CONCLUIDA
+    )
+    if empresa_id is not None:
+        consulta = consulta.filter(Funcionario.empresa_id == empresa_id)
+    if funcionarios_ids is not None:
+        consulta = consulta.filter(Funcionario.id.in_(list(funcionarios_ids)))
+    funcionarios = consulta.all()
+    if not funcionarios:
+        return 0
+
+    enderecos = {funcionario.id: montar_endereco_funcionario(funcionario) for funcionario in funcionarios}
+    resultados, falhas = geocode_addresses(enderecos.values())
+    resolvidos = 0
+    for funcionario in funcionarios:
+        endereco = enderecos[funcionario.id]
+        funcionario.geocodificacao_tentativas = (funcionario.geocodificacao_tentativas or 0) + 1
+        if endereco in resultados:
+            _aplicar_coordenadas(funcionario, resultados[endereco])
+            resolvidos += 1
+        else:
+            _registrar_falha(funcionario, falhas.get(endereco, "Endereço não resolvido."))
+    session.commit()
+    return resolvidos
+
+
+def geocodificar_pendentes_em_segundo_plano(empresa_id: Optional[int] = None) -> None:
+    """Tarefa de segundo plano que reprocessa em lote os cadastros pendentes ou com falha."""
+    with SessionLocal() as session:
+        resolvidos = geocodificar_funcionarios_pendentes(session, empresa_id=empresa_id)
+    logger.info("Reprocessamento de geocodificação concluído: %s funcionário(s) resolvido(s).", resolvidos)
+
+
+def geocodificar_funcionarios_em_segundo_plano(funcionarios_ids: Sequence[int], tamanho_lote: int = 500) -> None:
+    """Tarefa de segundo plano que geocodifica em lotes os funcionários informados (ex.: após importação)."""
+    ids = list(funcionarios_ids)
+    resolvidos = 0
+    with SessionLocal() as session:
+        for inicio in range(0, len(ids), tamanho_lote):
+            resolvidos += geocodificar_funcionarios_pendentes(session, funcionarios_ids=ids[inicio : inicio + tamanho_lote])
+    logger.info("Geocodificação em lote concluída: %s de %s funcionário(s) resolvido(s).", resolvidos, len(ids))
+
+
+def obter_coordenadas_funcionarios(
+    funcionarios: Sequence[Funcionario],
+) -> Tuple[Dict[int, Tuple[float, float]], Dict[int, str]]:
+    """
+    Retorna as coordenadas persistidas dos funcionários e as falhas por ID.
+
+    Não consulta provedores: quem não tem coordenadas vigentes fica nas falhas. Um
+    cadastro com endereço alterado volta a ``PENDENTE`` (gravado no próprio objeto,
+    cabendo ao chamador confirmar a transação) para a tarefa de segundo plano
+    reprocessá-lo.
+    """
+    coordenadas: Dict[int, Tuple[float, float]] = {}
+    falhas: Dict[int, str] = {}
+    for funcionario in funcionarios:
+        if _coordenadas_atualizadas(funcionario):
+            coordenadas[funcionario.id] = (funcionario.latitude, funcionario.longitude)
+            continue
+        if funcionario.endereco_hash != calcular_hash_endereco(funcionario):
+            marcar_geocodificacao_pendente(funcionario)
+        if funcionario.geocodificacao_status == StatusGeocodificacaoEnum.FALHA:
+            falhas[funcionario.id] = funcionario.geocodificacao_erro or "Endereço não resolvido."
+        else:
+            falhas[funcionario.id] = "Geocodificação do endereço ainda pendente."
+    return coordenadas, falhas
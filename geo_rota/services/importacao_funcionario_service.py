@@ -0,0 +1,409 @@
+"""
+Importação em massa de funcionários a partir de planilhas CSV ou XLSX.
+
+O arquivo é lido linha a linha, cada linha é validada com o mesmo schema do
+cadastro individual e as linhas válidas são gravadas em lotes com ``executemany``
+(funcionários, escalas e vínculos com grupos de rota). Linhas inválidas não
+interrompem a importação: voltam no relatório com o número da linha e os motivos.
+
+Colunas aceitas (cabeçalho, sem diferenciar maiúsculas ou acentos): as mesmas do
+``FuncionarioCreate`` mais ``escalas`` no formato ``0-4:manha;5:tarde`` (dia da
+semana 0 = segunda) e ``grupos_rota`` com IDs ou nomes separados por ``;``.
+"""
+
+from __future__ import annotations
+
+import csv
+import io
+import re
+import zipfile
+from dataclasses import dataclass, field
+from datetime import date, datetime
+from typing import Any, BinaryIO, Dict, Iterator, List, Optional, Tuple
+
+from pydantic import ValidationError
+from sqlalchemy import insert, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from geo_rota.models import Empresa, EscalaTrabalho, Funcionario, FuncionarioGrupoRota, GrupoRota
+from geo_rota.models.enums import TurnoTrabalhoEnum
+from geo_rota.schemas import ErroImportacaoFuncionario, FuncionarioCreate, ResultadoImportacaoFuncionarios
+from geo_rota.services.geocodificacao_service import marcar_geocodificacao_pendente
+from geo_rota.utils.endereco import remover_acentos
+
+TAMANHO_LOTE_IMPORTACAO = 500
+
+_ALIASES_COLUNAS = {
+    "nome": "nome_completo",
+    "escalas_trabalho": "escalas",
+    "grupos": "grupos_rota",
+    "grupo_rota": "grupos_rota",
+    "uf": "estado",
+}
+_VERDADEIROS = {"1", "s", "sim", "true", "verdadeiro", "x", "y", "yes"}
+_FALSOS = {"0", "n", "nao", "false", "falso", "no", ""}
+_CAMPOS_BOOLEANOS = ("possui_cnh", "apto_dirigir", "ativo")
+
+
+@dataclass
+class _LinhaValida:
+    linha: int
+    valores: Dict[str, Any]
+    escalas: List[Dict[str, Any]] = field(default_factory=list)
+    grupos_ids: List[int] = field(default_factory=list)
+
+
+def _normalizar_cabecalho(nome: Any) -> str:
+    chave = remover_acentos(str(nome or "")).strip().lower()
+    chave = re.sub(r"[^a-z0-9]+", "_", chave).strip("_")
+    return _ALIASES_COLUNAS.get(chave, chave)
+
+
+def _texto(valor: Any) -> Optional[str]:
+    if valor is None:
+        return None
+    if isinstance(valor, float) and valor.is_integer():
+        valor = int(valor)  # planilhas gravam números inteiros como float
+    texto = str(valor).strip()
+    return texto or None
+
+
+def _ler_csv(arquivo: BinaryIO) -> Iterator[Tuple[int, Dict[str, Any]]]:
+    texto = io.TextIOWrapper(arquivo, encoding="utf-8-sig", newline="")
+    amostra = texto.read(4096)
+    texto.seek(0)
+    try:
+        dialeto = csv.Sniffer().sniff(amostra, delimiters=",;\t")
+    except csv.Error:
+        dialeto = csv.excel
+    try:
+        leitor = csv.reader(texto, dialeto)
+        cabecalho = next(leitor, None)
+        if not cabecalho:
+            return
+        colunas = [_normalizar_cabecalho(coluna) for coluna in cabecalho]
+        for numero_linha, valores in enumerate(leitor, start=2):
+            if not any(valor.strip() for valor in valores):
+                continue
+            yield numero_linha, dict(zip(colunas, valores))
+    finally:
+        texto.detach()  # o arquivo enviado continua aberto para a próxima leitura
+
+
+def _ler_xlsx(arquivo: BinaryIO) -> Iterator[Tuple[int, Dict[str, Any]]]:
+    try:
+        from openpyxl import load_workbook
+    except ImportError as exc:  # pragma: no cover - dependência opcional
+        raise ValueError("A importação de XLSX requer o pacote 'openpyxl'; envie o arquivo em CSV.") from exc
+
+    planilha = load_workbook(arquivo, read_only=True, data_only=True)
+    try:
+        linhas = planilha.active.iter_rows(values_only=True)
+        cabecalho = next(linhas, None)
+        if not cabecalho:
+            return
+        colunas = [_normalizar_cabecalho(coluna) for coluna in cabecalho]
+        for numero_linha, valores in enumerate(linhas, start=2):
+            if not any(_texto(valor) for valor in valores):
+                continue
+            yield numero_linha, dict(zip(colunas, valores))
+    finally:
+        planilha.close()
+
+
+def ler_planilha_funcionarios(arquivo: BinaryIO, nome_arquivo: str) -> Iterator[Tuple[int, Dict[str, Any]]]:
+    """
+    Itera sobre ``(numero_linha, colunas)`` do arquivo sem carregá-lo inteiro em memória.
+
+    O arquivo é percorrido uma vez antes de devolver o iterador, para que erros de
+    codificação ou de formato apareçam antes de qualquer lote ser gravado.
+    ``UnicodeDecodeError`` é propagado para o chamador orientar a troca de codificação.
+    """
+    extensao = nome_arquivo.lower().rsplit(".", 1)[-1] if "." in nome_arquivo else ""
+    if extensao == "xlsx":
+        leitor = _ler_xlsx
+    elif extensao in ("csv", "txt", ""):
+        leitor = _ler_csv
+    else:
+        raise ValueError("Formato de arquivo não suportado. Envie um CSV ou XLSX.")
+    try:
+        for _ in leitor(arquivo):
+            pass
+    except csv.Error as exc:
+        raise ValueError(f"Não foi possível ler o arquivo CSV: {exc}.") from exc
+    except zipfile.BadZipFile as exc:
+        raise ValueError("Não foi possível ler o arquivo XLSX: o arquivo está corrompido.") from exc
+    arquivo.seek(0)
+    return leitor(arquivo)
+
+
+def _converter_booleano(valor: Any, campo: str) -> Optional[bool]:
+    if isinstance(valor, bool):
+        return valor
+    texto = remover_acentos(_texto(valor) or "").lower()
+    if texto in _VERDADEIROS:
+        return True
+    if texto in _FALSOS:
+        return None if not texto else False
+    raise ValueError(f"Valor inválido para '{campo}': '{valor}'.")
+
+
+def _converter_data(valor: Any) -> Optional[date]:
+    if isinstance(valor, datetime):
+        return valor.date()
+    if isinstance(valor, date):
+        return valor
+    texto = _texto(valor)
+    if not texto:
+        return None
+    for formato in ("%Y-%m-%d", "%d/%m/%Y"):
+        try:
+            return datetime.strptime(texto, formato).date()
+        except ValueError:
+            continue
+    raise ValueError(f"Data inválida para 'cnh_valida_ate': '{texto}' (use AAAA-MM-DD ou DD/MM/AAAA).")
+
+
+def _converter_escalas(valor: Any) -> List[Dict[str, Any]]:
+    escalas: Dict[Tuple[int, TurnoTrabalhoEnum], Dict[str, Any]] = {}
+    for item in re.split(r"[;|]", _texto(valor) or ""):
+        item = item.strip()
+        if not item:
+            continue
+        dias, _, turno_texto = item.partition(":")
+        try:
+            turno = TurnoTrabalhoEnum(remover_acentos(turno_texto.strip()).lower())
+        except ValueError as exc:
+            raise ValueError(f"Turno inválido na escala '{item}' (use manha, tarde ou noite).") from exc
+        inicio, _, fim = dias.strip().partition("-")
+        try:
+            primeiro, ultimo = int(inicio), int(fim or inicio)
+        except ValueError as exc:
+            raise ValueError(f"Dia da semana inválido na escala '{item}'.") from exc
+        if not 0 <= primeiro <= ultimo <= 6:
+            raise ValueError(f"Dia da semana inválido na escala '{item}' (0 = segunda, 6 = domingo).")
+        for dia in range(primeiro, ultimo + 1):
+            escalas[(dia, turno)] = {"dia_semana": dia, "turno": turno, "disponivel": True}
+    return list(escalas.values())
+
+
+def _resolver_grupos(valor: Any, grupos_por_id: Dict[int, str], grupos_por_nome: Dict[str, int]) -> List[int]:
+    ids: List[int] = []
+    for item in re.split(r"[;|]", _texto(valor) or ""):
+        item = item.strip()
+        if not item:
+            continue
+        if item.isdigit() and int(item) in grupos_por_id:
+            grupo_id = int(item)
+        else:
+            grupo_id = grupos_por_nome.get(remover_acentos(item).lower())
+        if grupo_id is None:
+            raise ValueError(f"Grupo de rota '{item}' não encontrado para a empresa.")
+        if grupo_id not in ids:
+            ids.append(grupo_id)
+    return ids
+
+
+def _validar_linha(
+    colunas: Dict[str, Any],
+    empresa_id: int,
+    grupos_por_id: Dict[int, str],
+    grupos_por_nome: Dict[str, int],
+) -> Tuple[Optional[Dict[str, Any]], List[Dict[str, Any]], List[int], List[str]]:
+    mensagens: List[str] = []
+    dados: Dict[str, Any] = {}
+    for campo in FuncionarioCreate.model_fields:
+        if campo == "empresa_id" or campo not in colunas:
+            continue
+        valor = colunas[campo]
+        try:
+            if campo in _CAMPOS_BOOLEANOS:
+                convertido = _converter_booleano(valor, campo)
+            elif campo == "cnh_valida_ate":
+                convertido = _converter_data(valor)
+            else:
+                convertido = _texto(valor)
+        except ValueError as exc:
+            mensagens.append(str(exc))
+            continue
+        if convertido is not None:
+            dados[campo] = convertido
+    if "estado" in dados:
+        dados["estado"] = dados["estado"].upper()
+
+    escalas: List[Dict[str, Any]] = []
+    grupos_ids: List[int] = []
+    try:
+        escalas = _converter_escalas(colunas.get("escalas"))
+    except ValueError as exc:
+        mensagens.append(str(exc))
+    try:
+        grupos_ids = _resolver_grupos(colunas.get("grupos_rota"), grupos_por_id, grupos_por_nome)
+    except ValueError as exc:
+        mensagens.append(str(exc))
+
+    try:
+        validado = FuncionarioCreate(empresa_id=empresa_id, **dados)
+    except ValidationError as exc:
+        for erro in exc.errors():
+            campo = ".".join(str(parte) for parte in erro["loc"])
+            mensagens.append(f"{campo}: {erro['msg']}")
+        return None, escalas, grupos_ids, mensagens
+    return validado.model_dump(), escalas, grupos_ids, mensagens
+
+
+def _valores_funcionario(dados: Dict[str, Any]) -> Dict[str, Any]:
+    """Aplica os defaults do cadastro e a marcação de geocodificação pendente."""
+    funcionario = Funcionario(**dados)
+    marcar_geocodificacao_pendente(funcionario)
+    valores = {}
+    for coluna in Funcionario.__table__.columns:
+        if coluna.key == "id":
+            continue
+        valor = getattr(funcionario, coluna.key)
+        if valor is None and coluna.default is not None and coluna.default.is_scalar:
+            valor = coluna.default.arg
+        valores[coluna.key] = valor
+    return valores
+
+
+def _inserir_lote(db: Session, lote: List[_LinhaValida]) -> List[int]:
+    """Insere o lote com uma instrução por tabela e retorna os IDs na ordem das linhas."""
+    resultado = db.execute(
+        insert(Funcionario).returning(Funcionario.id, sort_by_parameter_order=True),
+        [item.valores for item in lote],
+    )
+    ids = list(resultado.scalars())
+    escalas = [
+        {"funcionario_id": funcionario_id, "hora_inicio": None, "hora_fim": None, **escala}
+        for funcionario_id, item in zip(ids, lote)
+        for escala in item.escalas
+    ]
+    vinculos = [
+        {"funcionario_id": funcionario_id, "grupo_rota_id": grupo_id}
+        for funcionario_id, item in zip(ids, lote)
+        for grupo_id in item.grupos_ids
+    ]
+    if escalas:
+        db.execute(insert(EscalaTrabalho), escalas)
+    if vinculos:
+        db.execute(insert(FuncionarioGrupoRota), vinculos)
+    return ids
+
+
+def _gravar_lote(
+    db: Session,
+    lote: List[_LinhaValida],
+    resultado: ResultadoImportacaoFuncionarios,
+    ids_importados: List[int],
+) -> None:
+    if not lote:
+        return
+    try:
+        ids_importados.extend(_inserir_lote(db, lote))
+        db.commit()
+        resultado.importados += len(lote)
+        return
+    except IntegrityError:
+        db.rollback()
+
+    # Algum registro conflitou (ex.: CPF gravado em paralelo): refaz linha a linha para isolar o erro.
+    for item in lote:
+        try:
+            with db.begin_nested():
+                ids = _inserir_lote(db, [item])
+        except IntegrityError as exc:
+            resultado.com_erro += 1
+            resultado.erros.append(
+                ErroImportacaoFuncionario(
+                    linha=item.linha,
+                    cpf=item.valores.get("cpf"),
+                    mensagens=[f"Registro conflitante no banco: {exc.orig}"],
+                )
+            )
+            continue
+        ids_importados.extend(ids)
+        resultado.importados += 1
+    db.commit()
+
+
+def _existentes(db: Session, coluna, valores: List[str]) -> set:
+    if not valores:
+        return set()
+    return set(db.execute(select(coluna).where(coluna.in_(valores))).scalars())
+
+
+def importar_funcionarios(
+    db: Session,
+    empresa_id: int,
+    linhas: Iterator[Tuple[int, Dict[str, Any]]],
+    tamanho_lote: int = TAMANHO_LOTE_IMPORTACAO,
+) -> Tuple[ResultadoImportacaoFuncionarios, List[int]]:
+    """
+    Valida e grava as linhas em lotes; retorna o relatório e os IDs criados.
+
+    CPF e e-mail são verificados contra o próprio arquivo e contra o banco (uma
+    consulta por lote). A geocodificação fica a cargo do chamador, em lote.
+    """
+    if db.get(Empresa, empresa_id) is None:
+        raise ValueError("Empresa não encontrada.")
+
+    grupos = db.execute(select(GrupoRota.id, GrupoRota.nome).where(GrupoRota.empresa_id == empresa_id)).all()
+    grupos_por_id = {grupo.id: grupo.nome for grupo in grupos}
+    grupos_por_nome = {remover_acentos(grupo.nome).lower(): grupo.id for grupo in grupos}
+
+    resultado = ResultadoImportacaoFuncionarios()
+    ids_importados: List[int] = []
+    cpfs_no_arquivo: Dict[str, int] = {}
+    emails_no_arquivo: Dict[str, int] = {}
+    pendentes: List[_LinhaValida] = []
+
+    def registrar_erro(linha: int, cpf: Optional[str], mensagens: List[str]) -> None:
+        resultado.com_erro += 1
+        resultado.erros.append(ErroImportacaoFuncionario(linha=linha, cpf=cpf, mensagens=mensagens))
+
+    def descarregar() -> None:
+        cpfs_banco = _existentes(db, Funcionario.cpf, [item.valores["cpf"] for item in pendentes])
+        emails_banco = _existentes(
+            db, Funcionario.email, [item.valores["email"] for item in pendentes if item.valores.get("email")]
+        )
+        validos: List[_LinhaValida] = []
+        for item in pendentes:
+            mensagens = []
+            if item.valores["cpf"] in cpfs_banco:
+                mensagens.append("CPF já cadastrado.")
+            if item.valores.get("email") and item.valores["email"] in emails_banco:
+                mensagens.append("E-mail já cadastrado.")
+            if mensagens:
+                registrar_erro(item.linha, item.valores["cpf"], mensagens)
+            else:
+                validos.append(item)
+        _gravar_lote(db, validos, resultado, ids_importados)
+        pendentes.clear()
+
+    for numero_linha, colunas in linhas:
+        resultado.total_linhas += 1
+        dados, escalas, grupos_ids, mensagens = _validar_linha(colunas, empresa_id, grupos_por_id, grupos_por_nome)
+        cpf = (dados or {}).get("cpf") or _texto(colunas.get("cpf"))
+        if dados is not None:
+            if dados["cpf"] in cpfs_no_arquivo:
+                mensagens.append(f"CPF repetido no arquivo (linha {cpfs_no_arquivo[dados['cpf']]}).")
+            email = dados.get("email")
+            if email and email in emails_no_arquivo:
+                mensagens.append(f"E-mail repetido no arquivo (linha {emails_no_arquivo[email]}).")
+        if dados is None or mensagens:
+            registrar_erro(numero_linha, cpf, mensagens)
+            continue
+
+        cpfs_no_arquivo[dados["cpf"]] = numero_linha
+        if dados.get("email"):
+            emails_no_arquivo[dados["email"]] = numero_linha
+        pendentes.append(_LinhaValida(numero_linha, _valores_funcionario(dados), escalas, grupos_ids))
+        if len(pendentes) >= tamanho_lote:
+            descarregar()
+
+    if pendentes:
+        descarregar()
+    resultado.erros.sort(key=lambda erro: erro.linha)
+    return resultado, ids_importados
@@ -31,30 +31,15 @@ from geo_rota.schemas import (
     RotaCreate,
     RotaUpdate,
 )
-from geo_rota.utils import GeocodeError, geocode_address
+from geo_rota.utils import geocode_address
+from geo_rota.utils.endereco import montar_endereco
+from geo_rota.services.geocodificacao_service import montar_endereco_destino, obter_coordenadas_funcionarios
 from geo_rota.services.roteirizacao_service import recalcular_rota_existente
 
 
-def _montar_endereco_funcionario(funcionario: Funcionario) -> str:
-    partes = [
-        funcionario.logradouro,
-        funcionario.numero,
-        funcionario.complemento,
-        funcionario.bairro,
-        funcionario.cidade,
-        funcionario.estado,
-        funcionario.cep,
-        "Brasil",
-    ]
-    return ", ".join(filter(None, partes))
-
-
 def _obter_coordenadas_funcionario(funcionario: Funcionario) -> tuple[float, float] | None:
-    endereco = _montar_endereco_funcionario(funcionario)
-    try:
-        return geocode_address(endereco)
-    except GeocodeError:
-        return None
+    coordenadas, _ = obter_coordenadas_funcionarios([funcionario])
+    return coordenadas.get(funcionario.id)
 
 
 def _registrar_conflito_alocacao(
@@ -128,20 +113,7 @@ def _resolver_destino_para_atualizacao(
         if not destino or destino.empresa_id != rota.empresa_id:
             raise ValueError("Destino informado não pertence à empresa da rota.")
         if destino.latitude is None or destino.longitude is None:
-            endereco_destino = ", ".join(
-                filter(
-                    None,
-                    [
-                        destino.logradouro,
-                        destino.numero,
-                        destino.complemento,
-                        destino.bairro,
-                        f"{destino.cidade} - {destino.estado}",
-                        destino.cep,
-                        "Brasil",
-                    ],
-                )
-            )
+            endereco_destino = montar_endereco_destino(destino)
             destino.latitude, destino.longitude = geocode_address(endereco_destino)
         return destino
 
@@ -160,15 +132,15 @@ def _resolver_destino_para_atualizacao(
     destino_estado = payload.destino_estado.strip().upper()
     destino_cep = payload.destino_cep.replace(" ", "").strip()
     destino_complemento = payload.destino_complemento.strip() if payload.destino_complemento else None
-    endereco_componentes = [
-        ", ".join(filter(None, [payload.destino_logradouro.strip(), payload.destino_numero.strip()])),
+    endereco = montar_endereco(
+        payload.destino_logradouro,
+        payload.destino_numero,
         destino_complemento,
-        payload.destino_bairro.strip(),
-        f"{payload.destino_cidade.strip()} - {destino_estado}",
+        payload.destino_bairro,
+        payload.destino_cidade,
+        destino_estado,
         destino_cep,
-        "Brasil",
-    ]
-    endereco = ", ".join(filter(None, endereco_componentes))
+    )
     latitude, longitude = geocode_address(endereco)
     destino = DestinoRota(
         empresa_id=rota.empresa_id,
@@ -555,9 +527,10 @@ def atualizar_funcionarios_rota(
     db.query(AtribuicaoRota).filter(AtribuicaoRota.rota_id == rota.id).delete()
     db.flush()
 
+    coordenadas_funcionarios, _ = obter_coordenadas_funcionarios(funcionarios)
     for indice, atribuicao in enumerate(payload.atribuicoes):
         funcionario = funcionarios_map[atribuicao.funcionario_id]
-        coordenadas = _obter_coordenadas_funcionario(funcionario)
+        coordenadas = coordenadas_funcionarios.get(funcionario.id)
         nova_atribuicao = AtribuicaoRota(
             rota_id=rota.id,
             funcionario_id=funcionario.id,
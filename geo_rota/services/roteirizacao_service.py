@@ -12,12 +12,18 @@ from __future__ import annotations
 
 import hashlib
 import json
+import logging
+import math
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
 from dataclasses import dataclass
-from datetime import date, datetime, timedelta
+from datetime import date
 from typing import Dict, List, Optional, Sequence, Tuple
 
+import numpy as np
 from geopy.exc import GeocoderServiceError
-from ortools.constraint_solver import pywrapcp, routing_enums_pb2
 from sqlalchemy import and_, func
 from sqlalchemy.orm import Session, aliased
 
@@ -41,14 +47,31 @@ from geo_rota.models.enums import (
     CategoriaCustoVeiculo,
     ModoAlgoritmoEnum,
     PapelAtribuicaoRota,
+    QualidadeRoteirizacaoEnum,
     StatusRotaEnum,
     TipoDisponibilidadeVeiculoEnum,
     TurnoTrabalhoEnum,
 )
 from geo_rota.schemas.route import RequisicaoGerarRota, RequisicaoGerarRotasVRP
 from geo_rota.core.config import settings
-from geo_rota.utils import GeocodeError, distance_km, geocode_address
-from geo_rota.utils.osrm import OSRMServiceError, montar_matrizes_osrm
+from geo_rota.services.cache_vrp_service import armazenar_plano_cacheado, ler_payload, obter_plano_cacheado
+from geo_rota.services.geocodificacao_service import (
+    montar_endereco_destino,
+    montar_endereco_empresa,
+    calcular_hash_endereco,
+    montar_endereco_funcionario,
+    obter_coordenadas_funcionarios,
+)
+from geo_rota.utils import GeocodeError, geocode_address
+from geo_rota.utils import decomposicao_vrp, memo_sequenciamento
+from geo_rota.utils.distancia import matriz_distancias, matriz_distancias_metros
+from geo_rota.utils.endereco import montar_endereco
+from geo_rota.utils.matriz_trajeto import montar_matrizes_trajeto
+from geo_rota.utils.modelo_roteamento import PENALIDADE_NAO_ATENDIDO, resolver_vrp
+from geo_rota.utils.osrm import VALOR_INALCANCAVEL, OSRMServiceError
+from geo_rota.utils.sequenciamento import LIMITE_EXATO, custo_caminho, ordenar_paradas
+
+logger = logging.getLogger("geo_rota.roteirizacao")
 
 # Fator de custo relativo por categoria do veículo (quanto maior, mais caro).
 CUSTO_RELATIVO_CATEGORIA: dict[CategoriaCustoVeiculo, float] = {
@@ -70,39 +93,16 @@ class CapacidadeVeiculoInsuficienteError(ValueError):
 
 def _montar_endereco_completo(funcionario: Funcionario) -> str:
     """Concatena os campos de endereço do funcionário em um formato padrão."""
-    partes = [
-        funcionario.logradouro,
-        funcionario.numero,
-        funcionario.complemento,
-        funcionario.bairro,
-        funcionario.cidade,
-        funcionario.estado,
-        funcionario.cep,
-    ]
-    return ", ".join(filter(None, partes))
+    return montar_endereco_funcionario(funcionario)
 
 
 def _montar_endereco_destino(destino: DestinoRota) -> str:
-    partes = [
-        destino.logradouro,
-        destino.numero,
-        destino.complemento,
-        destino.bairro,
-        f"{destino.cidade} - {destino.estado}",
-        destino.cep,
-    ]
-    return ", ".join(filter(None, partes + ["Brasil"]))
+    return montar_endereco_destino(destino)
 
 
 def _montar_endereco_empresa(empresa: Empresa) -> str:
     """Gera o endereço completo utilizado como destino padrão da empresa."""
-    partes = [
-        empresa.endereco_base,
-        empresa.cidade,
-        empresa.estado,
-        empresa.cep,
-    ]
-    return ", ".join(filter(None, partes))
+    return montar_endereco_empresa(empresa)
 
 
 def _resolver_destino(
@@ -145,15 +145,15 @@ def _resolver_destino(
         destino_cep = requisicao.destino_cep.replace(" ", "").strip()
         destino_complemento = requisicao.destino_complemento.strip() if requisicao.destino_complemento else None
 
-        endereco_componentes = [
-            ", ".join(filter(None, [requisicao.destino_logradouro.strip(), requisicao.destino_numero.strip()])),
+        destino_endereco = montar_endereco(
+            requisicao.destino_logradouro,
+            requisicao.destino_numero,
             destino_complemento,
-            requisicao.destino_bairro.strip(),
-            f"{requisicao.destino_cidade.strip()} - {destino_estado}",
+            requisicao.destino_bairro,
+            requisicao.destino_cidade,
+            destino_estado,
             destino_cep,
-            "Brasil",
-        ]
-        destino_endereco = ", ".join(filter(None, endereco_componentes))
+        )
 
         try:
             destino_coordenadas = geocode_address(destino_endereco)
@@ -181,19 +181,59 @@ def _resolver_destino(
 
 def _obter_coordenadas_funcionarios(
     funcionarios: Sequence[Funcionario],
-) -> Dict[int, Tuple[float, float]]:
+    parcial: bool = False,
+) -> Tuple[Dict[int, Tuple[float, float]], Dict[int, str]]:
     """
-    Geocodifica e retorna as coordenadas de cada funcionário disponibilizado.
+    Retorna as coordenadas persistidas de cada funcionário; sem coordenadas vigentes, ele entra nas falhas.
+
+    Com ``parcial`` as falhas são devolvidas por ID para que o chamador siga com os
+    demais; sem ele, a primeira falha interrompe a geração.
     """
-    coordenadas: Dict[int, Tuple[float, float]] = {}
-    for funcionario in funcionarios:
-        endereco = _montar_endereco_completo(funcionario)
-        try:
-            coordenadas[funcionario.id] = geocode_address(endereco)
-        except (GeocodeError, GeocoderServiceError) as exc:
-            nome = (funcionario.nome_completo or "").strip() or f"ID {funcionario.id}"
-            raise GeocodeError(f"Falha ao geocodificar o endereço de {nome}: {exc}") from exc
-    return coordenadas
+    coordenadas, falhas = obter_coordenadas_funcionarios(funcionarios)
+    if not parcial:
+        for funcionario in funcionarios:
+            if funcionario.id in falhas:
+                nome = (funcionario.nome_completo or "").strip() or f"ID {funcionario.id}"
+                raise GeocodeError(f"Endereço de {nome} sem coordenadas: {falhas[funcionario.id]}")
+    return coordenadas, falhas
+
+
+def _separar_funcionarios_geocodificados(
+    funcionarios: Sequence[Funcionario],
+    parcial: bool,
+) -> Tuple[List[Funcionario], Dict[int, Tuple[float, float]], Dict[int, str]]:
+    """Lê as coordenadas do grupo e separa quem está sem elas (apenas no modo parcial)."""
+    try:
+        coordenadas, falhas = _obter_coordenadas_funcionarios(funcionarios, parcial=parcial)
+    except GeocodeError as exc:
+        raise ValueError(str(exc)) from exc
+    except GeocoderServiceError as exc:
+        raise ValueError(f"Falha ao geocodificar um endereço: {exc}") from exc
+
+    geocodificados = [funcionario for funcionario in funcionarios if funcionario.id not in falhas]
+    if not geocodificados:
+        raise ValueError("Nenhum funcionário disponível tem coordenadas; aguarde a geocodificação ou revise os endereços cadastrados.")
+    return geocodificados, coordenadas, falhas
+
+
+def _registrar_pendentes_geocodificacao(
+    session: Session,
+    falhas: Dict[int, str],
+    requisicao: RequisicaoGerarRota,
+    grupo: GrupoRota,
+    rota_id: Optional[int] = None,
+) -> None:
+    for funcionario_id, detalhe in falhas.items():
+        session.add(
+            FuncionarioPendenteRota(
+                rota_id=rota_id,
+                funcionario_id=funcionario_id,
+                data_agendada=requisicao.data_agendada,
+                turno=requisicao.turno,
+                motivo=f"Endereço não geocodificado ({detalhe}). Corrija o cadastro e gere a rota novamente.",
+                grupo_rota_id=grupo.id,
+            )
+        )
 
 
 def _dia_semana(data_referencia: date) -> int:
@@ -260,71 +300,165 @@ def _filtrar_funcionarios_disponiveis(
     return list(query.all())
 
 
+@dataclass
+class AvaliacaoMotorista:
+    funcionario_id: int
+    limite_inferior_m: Optional[int]
+    distancia_m: Optional[int] = None
+    situacao: str = "nao_avaliado"  # escolhido, avaliado, podado ou nao_avaliado
+
+
+def _limites_inferiores_motorista(matriz: np.ndarray) -> np.ndarray:
+    """
+    Limite inferior (metros) do trajeto completo partindo de cada funcionário.
+
+    ``matriz`` traz os funcionários nas primeiras linhas e o destino na última. Vale o
+    maior de dois limites: o desvio até o passageiro mais distante e de lá ao destino
+    (desigualdade triangular), e a soma da saída mais barata de cada ponto do trajeto.
+    """
+    quantidade = len(matriz) - 1
+    matriz = np.asarray(matriz, dtype=np.int64)
+    ate_destino = matriz[:quantidade, quantidade]
+    if quantidade == 1:
+        return ate_destino.copy()
+
+    # desvio[c, p] = d[c, p] + d[p, destino]; na diagonal sobra d[c, destino].
+    desvio = matriz[:quantidade, :quantidade] + ate_destino[None, :]
+    limite_desvio = desvio.max(axis=1)
+
+    # Cada ponto sai uma vez. Se a saída mais barata de um passageiro é o próprio
+    # candidato (que só parte), vale a segunda mais barata.
+    saidas = matriz[:quantidade].copy()
+    saidas[np.arange(quantidade), np.arange(quantidade)] = np.iinfo(np.int64).max // 4
+    mais_barata = saidas.min(axis=1)
+    destino_mais_barato = saidas.argmin(axis=1)
+    segunda_mais_barata = np.partition(saidas, 1, axis=1)[:, 1]
+    acrescimo = np.bincount(
+        destino_mais_barato,
+        weights=segunda_mais_barata - mais_barata,
+        minlength=quantidade + 1,
+    )[:quantidade]
+    limite_saidas = mais_barata.sum() + np.rint(acrescimo).astype(np.int64)
+    return np.maximum(limite_desvio, limite_saidas)
+
+
 def _selecionar_motorista(
     funcionarios: Sequence[Funcionario],
     motorista_id: Optional[int],
     coordenadas: Optional[Dict[int, Tuple[float, float]]] = None,
     destino_coordenadas: Optional[Tuple[float, float]] = None,
-) -> Funcionario:
+    matriz: Optional[np.ndarray] = None,
+) -> Tuple[Funcionario, List[AvaliacaoMotorista]]:
     """
-    Retorna o motorista informado ou escolhe automaticamente o motorista apto com menor estimativa de trajeto.
+    Retorna o motorista informado ou escolhe automaticamente o motorista apto com menor trajeto,
+    junto com a avaliação de cada candidato.
+
+    Um sequenciamento com partida livre entre os candidatos dá o melhor motorista de saída;
+    os demais são podados quando o limite inferior do trajeto não supera esse custo, e no
+    máximo ``ROTEIRIZACAO_MOTORISTA_CANDIDATOS_EXATOS`` são sequenciados individualmente,
+    tudo dentro do orçamento ``ROTEIRIZACAO_MOTORISTA_TEMPO_MAXIMO_S``.
+    ``matriz`` (metros) segue a ordem de ``funcionarios`` com o destino por último.
     """
     if motorista_id is not None:
         for funcionario in funcionarios:
             if funcionario.id == motorista_id and funcionario.apto_dirigir and funcionario.possui_cnh:
-                return funcionario
+                return funcionario, []
         raise ValueError("Motorista informado não está disponível ou não possui CNH válida.")
 
     candidatos = [f for f in funcionarios if f.apto_dirigir and f.possui_cnh]
     if not candidatos:
         raise ValueError("Nenhum motorista habilitado disponível para o grupo/data/turno informados.")
 
-    if coordenadas is None or destino_coordenadas is None:
-        return candidatos[0]
-
-    melhor_motorista = candidatos[0]
-    melhor_distancia: Optional[float] = None
-
-    for candidato in candidatos:
-        coord_motorista = coordenadas.get(candidato.id)
-        if coord_motorista is None:
+    if (
+        coordenadas is None
+        or destino_coordenadas is None
+        or any(coordenadas.get(funcionario.id) is None for funcionario in funcionarios)
+    ):
+        avaliacoes = [AvaliacaoMotorista(candidato.id, None) for candidato in candidatos]
+        avaliacoes[0].situacao = "escolhido"
+        return candidatos[0], avaliacoes
+
+    pontos = [coordenadas[funcionario.id] for funcionario in funcionarios] + [destino_coordenadas]
+    if matriz is None:
+        matriz = _gerar_matriz_distancia(pontos)
+    indice_destino = len(pontos) - 1
+    posicao = {funcionario.id: indice for indice, funcionario in enumerate(funcionarios)}
+    limites = _limites_inferiores_motorista(matriz)
+    avaliacoes = sorted(
+        (AvaliacaoMotorista(candidato.id, int(limites[posicao[candidato.id]])) for candidato in candidatos),
+        key=lambda avaliacao: avaliacao.limite_inferior_m,
+    )
+    prazo = time.monotonic() + settings.ROTEIRIZACAO_MOTORISTA_TEMPO_MAXIMO_S
+
+    # Um único sequenciamento com partida livre: uma origem virtual liga, a custo zero,
+    # só aos candidatos, e a primeira parada da ordem é o melhor motorista.
+    indices_candidatos = [posicao[candidato.id] for candidato in candidatos]
+    melhor: Optional[AvaliacaoMotorista] = None
+    if len(indices_candidatos) > 1:
+        origem_virtual = len(pontos)
+        estendida = np.full((len(pontos) + 1, len(pontos) + 1), VALOR_INALCANCAVEL, dtype=np.int64)
+        estendida[:origem_virtual, :origem_virtual] = matriz
+        estendida[origem_virtual, indices_candidatos] = 0
+        try:
+            ordem = ordenar_paradas(estendida, origem_virtual, indice_destino, max(prazo - time.monotonic(), 0.1))
+        except RuntimeError:
+            ordem = []
+        if ordem and ordem[0] in indices_candidatos:
+            melhor = next(avaliacao for avaliacao in avaliacoes if posicao[avaliacao.funcionario_id] == ordem[0])
+            melhor.distancia_m = custo_caminho(estendida, [origem_virtual, *ordem, indice_destino])
+            melhor.situacao = "avaliado"
+
+    # Os demais só são sequenciados se o limite inferior ainda permite superar o melhor.
+    sequenciados = 0
+    for avaliacao in avaliacoes:
+        if avaliacao is melhor:
             continue
-
-        coords_trajeto: List[Tuple[float, float]] = [coord_motorista]
-        for passageiro in funcionarios:
-            if passageiro.id == candidato.id:
-                continue
-            coord_passageiro = coordenadas.get(passageiro.id)
-            if coord_passageiro is None:
-                coords_trajeto = []
-                break
-            coords_trajeto.append(coord_passageiro)
-
-        if not coords_trajeto:
+        if melhor is not None and avaliacao.limite_inferior_m >= melhor.distancia_m:
+            avaliacao.situacao = "podado"
             continue
-
-        coords_trajeto.append(destino_coordenadas)
-        indice_destino = len(coords_trajeto) - 1
-        if indice_destino <= 0:
+        restante = prazo - time.monotonic()
+        if melhor is not None and (sequenciados >= settings.ROTEIRIZACAO_MOTORISTA_CANDIDATOS_EXATOS or restante <= 0):
             continue
 
+        origem = posicao[avaliacao.funcionario_id]
+        indices = [origem, *(indice for indice in range(indice_destino) if indice != origem), indice_destino]
+        submatriz = matriz[np.ix_(indices, indices)]
         try:
-            ordem_passageiros = _resolver_ordem_embarque(coords_trajeto, indice_destino)
-            distancia_estimativa = _calcular_distancia_total(coords_trajeto, ordem_passageiros, indice_destino)
-        except Exception:  # fallback em caso de falha na otimização
-            distancia_estimativa = None
-
-        if distancia_estimativa is None:
+            ordem = _resolver_ordem_embarque(
+                [pontos[indice] for indice in indices],
+                indice_destino,
+                submatriz,
+                tempo_limite=max(restante, 0.1),
+            )
+        except RuntimeError:
             continue
-
-        if melhor_distancia is None or distancia_estimativa < melhor_distancia:
-            melhor_distancia = distancia_estimativa
-            melhor_motorista = candidato
-
-    if melhor_distancia is None:
-        return candidatos[0]
-
-    return melhor_motorista
+        sequenciados += 1
+        avaliacao.distancia_m = custo_caminho(submatriz, [0, *ordem, indice_destino])
+        avaliacao.situacao = "avaliado"
+        if melhor is None or avaliacao.distancia_m < melhor.distancia_m:
+            melhor = avaliacao
+
+    escolhida = melhor or avaliacoes[0]
+    escolhida.situacao = "escolhido"
+    logger.debug(
+        "Motorista %s escolhido entre %s candidatos (%s sequenciados além da partida livre).",
+        escolhida.funcionario_id,
+        len(avaliacoes),
+        sequenciados,
+    )
+    motorista = next(candidato for candidato in candidatos if candidato.id == escolhida.funcionario_id)
+    return motorista, avaliacoes
+
+
+def _resumir_avaliacao_motoristas(avaliacoes: Sequence[AvaliacaoMotorista]) -> str:
+    if not avaliacoes:
+        return ""
+    sequenciados = sum(1 for avaliacao in avaliacoes if avaliacao.distancia_m is not None)
+    podados = sum(1 for avaliacao in avaliacoes if avaliacao.situacao == "podado")
+    return (
+        f" Motorista escolhido entre {len(avaliacoes)} candidatos "
+        f"({sequenciados} sequenciados, {podados} podados)."
+    )
 
 
 def _parse_dias_semana(dias: Optional[str]) -> set[int]:
@@ -385,30 +519,27 @@ def _selecionar_disponibilidade_veiculo(
     return escolhida.veiculo, escolhida
 
 
-def _gerar_matriz_distancia(coords: Sequence[Tuple[float, float]]) -> List[List[int]]:
+def _gerar_matriz_distancia(coords: Sequence[Tuple[float, float]]) -> np.ndarray:
     """
-    Constrói a matriz de distâncias (em metros) entre todos os pontos, arredondando para inteiros.
+    Constrói a matriz int32 de distâncias (em metros) entre todos os pontos, sem depender do OSRM.
     """
-    matriz: List[List[int]] = []
-    for origem in coords:
-        linha = []
-        for destino in coords:
-            if origem == destino:
-                linha.append(0)
-            else:
-                linha.append(int(distance_km(origem, destino) * 1000))  # distancia em metros
-        matriz.append(linha)
-    return matriz
+    return matriz_distancias_metros(coords)
 
 
 def _resolver_ordem_embarque(
     coords: Sequence[Tuple[float, float]],
     indice_destino_final: int,
+    matriz: Optional[np.ndarray] = None,
+    tempo_limite: Optional[float] = None,
 ) -> List[int]:
     """
-    Resolve um problema de caixeiro viajante simples para ordenar paradas.
+    Ordena as paradas de uma rota única (ver ``geo_rota.utils.sequenciamento``).
 
     O índice 0 é o motorista (ponto de partida) e `indice_destino_final` marca o destino fixo.
+    ``matriz`` (metros, na ordem de ``coords``) evita recalcular as distâncias.
+    ``tempo_limite`` (segundos) só se aplica às rotas grandes demais para a solução exata.
+    Ordens já resolvidas para o mesmo conjunto de paradas vêm de ``utils.memo_sequenciamento``;
+    só são memorizadas as exatas e as de buscas sem ``tempo_limite``.
     Retorna somente a ordem dos passageiros (índices intermediários).
     """
     if indice_destino_final <= 0 or indice_destino_final >= len(coords):
@@ -417,66 +548,37 @@ def _resolver_ordem_embarque(
     if len(coords) <= 2:
         return []
 
-    dist_matrix = _gerar_matriz_distancia(coords)
-    manager = pywrapcp.RoutingIndexManager(
-        len(dist_matrix),
-        1,
-        [0],
-        [indice_destino_final],
-    )
-    routing = pywrapcp.RoutingModel(manager)
-
-    def distance_callback(from_index: int, to_index: int) -> int:
-        origem = manager.IndexToNode(from_index)
-        destino = manager.IndexToNode(to_index)
-        return dist_matrix[origem][destino]
-
-    transit_callback_index = routing.RegisterTransitCallback(distance_callback)
-    routing.SetArcCostEvaluatorOfAllVehicles(transit_callback_index)
-
-    search_parameters = pywrapcp.DefaultRoutingSearchParameters()
-    search_parameters.first_solution_strategy = routing_enums_pb2.FirstSolutionStrategy.PATH_CHEAPEST_ARC
-    search_parameters.local_search_metaheuristic = routing_enums_pb2.LocalSearchMetaheuristic.GUIDED_LOCAL_SEARCH
-    search_parameters.time_limit.FromSeconds(5)
+    memorizada = memo_sequenciamento.obter_ordem(coords, indice_destino_final)
+    if memorizada is not None:
+        return memorizada
 
-    solution = routing.SolveWithParameters(search_parameters)
-    if solution is None:
-        raise RuntimeError("Falha ao resolver a otimização de rota. Tente novamente mais tarde.")
-
-    # Extrai a ordem de visita do veículo (excluindo o depósito final).
-    ordem_passageiros: List[int] = []
-    index = routing.Start(0)
-    while not routing.IsEnd(index):
-        node_index = manager.IndexToNode(index)
-        if node_index not in (0, indice_destino_final):
-            ordem_passageiros.append(node_index)
-        index = solution.Value(routing.NextVar(index))
-    return ordem_passageiros
+    dist_matrix = matriz if matriz is not None else _gerar_matriz_distancia(coords)
+    ordem = ordenar_paradas(dist_matrix, 0, indice_destino_final, tempo_limite)
+    # Uma busca cortada por tempo_limite não entra na memória: a próxima consulta do mesmo
+    # conjunto (ex.: o sequenciamento final depois da escolha do motorista) herdaria a ordem parcial.
+    if tempo_limite is None or len(coords) - 2 <= LIMITE_EXATO:
+        memo_sequenciamento.memorizar_ordem(coords, indice_destino_final, ordem)
+    return ordem
 
 
 def _calcular_distancia_total(
     coords: Sequence[Tuple[float, float]],
     ordem_passageiros: Sequence[int],
     indice_destino_final: int,
+    matriz: Optional[np.ndarray] = None,
 ) -> float:
     """
-    Calcula a distância percorrida até o destino fixo informado.
+    Calcula a distância (km) percorrida até o destino fixo informado.
+
+    Usa ``matriz`` (metros, na ordem de ``coords``) quando fornecida.
     """
     if indice_destino_final <= 0 or indice_destino_final >= len(coords):
         raise ValueError("Índice do destino final inválido para cálculo de distância.")
 
-    total = 0.0
-    atual = coords[0]
-
-    if not ordem_passageiros:
-        return distance_km(atual, coords[indice_destino_final])
-
-    for idx in ordem_passageiros:
-        proximo = coords[idx]
-        total += distance_km(atual, proximo)
-        atual = proximo
-    total += distance_km(atual, coords[indice_destino_final])
-    return total
+    if matriz is None:
+        matriz = matriz_distancias(coords)
+    caminho = np.asarray([0, *ordem_passageiros, indice_destino_final], dtype=np.intp)
+    return float(matriz[caminho[:-1], caminho[1:]].sum(dtype=np.float64)) / 1000
 
 
 def _sugerir_veiculos_para_quantidade(qtd_pessoas: int) -> List[dict]:
@@ -557,7 +659,7 @@ def recalcular_rota_existente(session: Session, rota_id: int) -> Rota:
     if not funcionarios_map:
         raise ValueError("Não foi possível obter os funcionários vinculados à rota.")
 
-    coordenadas_funcionarios = _obter_coordenadas_funcionarios(list(funcionarios_map.values()))
+    coordenadas_funcionarios, _ = _obter_coordenadas_funcionarios(list(funcionarios_map.values()))
 
     motorista = funcionarios_map.get(rota.motorista_id) if rota.motorista_id else None
     if motorista is None:
@@ -582,7 +684,8 @@ def recalcular_rota_existente(session: Session, rota_id: int) -> Rota:
     destino_coordenadas = (destino.latitude, destino.longitude)
     coordenadas_com_destino = coordenadas + [destino_coordenadas]
     indice_destino_final = len(coordenadas_com_destino) - 1
-    ordem_passageiros = _resolver_ordem_embarque(coordenadas_com_destino, indice_destino_final)
+    matriz_distancias = _gerar_matriz_distancia(coordenadas_com_destino)
+    ordem_passageiros = _resolver_ordem_embarque(coordenadas_com_destino, indice_destino_final, matriz_distancias)
 
     ordem_map: dict[int, int] = {motorista.id: 0}
     for indice, idx_passageiro in enumerate(ordem_passageiros, start=1):
@@ -603,6 +706,7 @@ def recalcular_rota_existente(session: Session, rota_id: int) -> Rota:
         coordenadas_com_destino,
         ordem_passageiros,
         indice_destino_final,
+        matriz_distancias,
     )
     rota.distancia_total_km = round(distancia_total_km, 2)
     fator_custo = CUSTO_RELATIVO_CATEGORIA.get(
@@ -639,6 +743,7 @@ class RotaPlanejadaVRP:
     distancia_m: int
     duracao_s: int
     custo_estimado: float
+    motorista_id: Optional[int] = None  # definido quando o VRP escolhe o motorista (primeira parada)
 
 
 def _listar_frota_disponivel(
@@ -699,19 +804,39 @@ def _listar_frota_disponivel(
 
 
 def _montar_chave_cache_vrp(
-    requisicao: RequisicaoGerarRota,
+    requisicao: RequisicaoGerarRotasVRP,
     destino_coordenadas: Tuple[float, float],
-    funcionarios_planejados: Sequence[FuncionarioPlanejamento],
+    funcionarios: Sequence[Funcionario],
     frota: Sequence[VeiculoPlanejado],
 ) -> Tuple[str, str]:
-    funcionarios_payload = [
-        {
-            "id": item.funcionario.id,
-            "lat": round(item.coordenadas[0], 5),
-            "lon": round(item.coordenadas[1], 5),
-        }
-        for item in sorted(funcionarios_planejados, key=lambda fp: fp.funcionario.id)
-    ]
+    """
+    Impressão digital do contexto do VRP, sem data nem turno.
+
+    Usa apenas o que já está disponível antes da geocodificação (IDs, impressão digital
+    do endereço e coordenadas gravadas de cada funcionário, frota e destino), para que
+    um plano repetido em outro dia seja reaproveitado sem geocodificar, consultar o
+    OSRM ou resolver.
+    """
+    funcionarios_payload = []
+    for funcionario in sorted(funcionarios, key=lambda f: f.id):
+        hash_endereco = calcular_hash_endereco(funcionario)
+        coordenadas = None
+        if (
+            funcionario.latitude is not None
+            and funcionario.longitude is not None
+            and funcionario.endereco_hash == hash_endereco
+        ):
+            coordenadas = [round(funcionario.latitude, 6), round(funcionario.longitude, 6)]
+        funcionarios_payload.append(
+            {
+                "id": funcionario.id,
+                "endereco": hash_endereco[:16],
+                # Coordenadas vigentes (ou None, se pendentes): uma geocodificação concluída
+                # depois do plano, ou uma correção manual, gera outra chave.
+                "coordenadas": coordenadas,
+                "motorista": bool(funcionario.apto_dirigir and funcionario.possui_cnh),
+            }
+        )
     veiculos_payload = [
         {
             "id": item.veiculo.id,
@@ -724,49 +849,158 @@ def _montar_chave_cache_vrp(
     payload_dict = {
         "empresa_id": requisicao.empresa_id,
         "grupo_rota_id": requisicao.grupo_rota_id,
-        "data": requisicao.data_agendada.isoformat(),
-        "turno": requisicao.turno.value,
         "destino": [round(destino_coordenadas[0], 5), round(destino_coordenadas[1], 5)],
         "funcionarios": funcionarios_payload,
         "veiculos": veiculos_payload,
+        "motoristas_no_vrp": requisicao.motoristas_no_vrp,
+        "qualidade": requisicao.qualidade.value,
+        "tempo_maximo_s": requisicao.tempo_maximo_s,
+        "geocodificacao_parcial": requisicao.geocodificacao_parcial,
+        "decomposicao": _usar_decomposicao(requisicao, len(funcionarios)),
     }
     raw = json.dumps(payload_dict, sort_keys=True, separators=(",", ":"))
     return hashlib.sha256(raw.encode("utf-8")).hexdigest(), raw
 
 
-def _obter_plano_cacheado(session: Session, chave: str) -> Optional[dict]:
-    if not chave:
-        return None
-    ttl = timedelta(minutes=settings.ROTEIRIZACAO_CACHE_TTL_MINUTES)
-    registro = session.query(CacheResultadoVRP).filter(CacheResultadoVRP.chave_contexto == chave).first()
-    if not registro:
-        return None
-    if registro.atualizado_em and datetime.utcnow() - registro.atualizado_em > ttl:
-        return None
-    try:
-        return json.loads(registro.payload)
-    except json.JSONDecodeError:
-        return None
+@dataclass
+class PlanoAnterior:
+    descricao: str
+    rotas: List[Tuple[Optional[int], List[int]]]  # (veiculo_id, funcionários na ordem, motorista primeiro)
 
+    @property
+    def funcionario_ids(self) -> set[int]:
+        return {funcionario_id for _, funcionarios in self.rotas for funcionario_id in funcionarios}
 
-def _armazenar_plano_cacheado(session: Session, chave: str, payload: dict) -> None:
-    if not chave:
-        return
-    raw = json.dumps(payload, sort_keys=True, separators=(",", ":"))
-    registro = session.query(CacheResultadoVRP).filter(CacheResultadoVRP.chave_contexto == chave).first()
-    if registro:
-        registro.payload = raw
-    else:
-        session.add(
-            CacheResultadoVRP(
-                chave_contexto=chave,
-                payload=raw,
+
+def _motorista_primeiro(funcionarios: List[int], motorista_id: Optional[int]) -> List[int]:
+    if motorista_id is None or motorista_id not in funcionarios:
+        return funcionarios
+    return [motorista_id] + [funcionario_id for funcionario_id in funcionarios if funcionario_id != motorista_id]
+
+
+def _listar_planos_anteriores(
+    session: Session,
+    grupo: GrupoRota,
+    destino: DestinoRota,
+    destino_coordenadas: Tuple[float, float],
+    limite: int = 10,
+) -> List[PlanoAnterior]:
+    """
+    Planos recentes do grupo para o mesmo destino: os resultados VRP em cache e as
+    rotas já gravadas (que incluem ajustes manuais feitos depois da geração).
+    """
+    planos: List[PlanoAnterior] = []
+    destino_arredondado = [round(destino_coordenadas[0], 5), round(destino_coordenadas[1], 5)]
+    registros = (
+        session.query(CacheResultadoVRP)
+        .filter(CacheResultadoVRP.grupo_rota_id == grupo.id)
+        .order_by(CacheResultadoVRP.atualizado_em.desc())
+        .limit(limite)
+        .all()
+    )
+    for registro in registros:
+        payload = ler_payload(registro)
+        if payload is None:
+            continue
+        if payload.get("contexto", {}).get("destino") != destino_arredondado:
+            continue
+        rotas = [
+            (
+                rota.get("veiculo_id"),
+                _motorista_primeiro(list(rota.get("funcionarios", [])), rota.get("motorista_id")),
             )
+            for rota in payload.get("rotas", [])
+        ]
+        planos.append(PlanoAnterior(descricao=f"cache {registro.chave_contexto[:12]}", rotas=rotas))
+
+    rotas_gravadas = (
+        session.query(Rota)
+        .filter(
+            Rota.grupo_rota_id == grupo.id,
+            Rota.destino_id == destino.id,
+            Rota.status != StatusRotaEnum.CANCELADA,
         )
+        .order_by(Rota.data_agendada.desc(), Rota.turno, Rota.sequencia_planejamento)
+        .limit(limite * 20)
+        .all()
+    )
+    por_turno: Dict[Tuple[date, TurnoTrabalhoEnum], PlanoAnterior] = {}
+    for rota in rotas_gravadas:
+        chave = (rota.data_agendada, rota.turno)
+        if chave not in por_turno:
+            if len(por_turno) >= limite:
+                break
+            por_turno[chave] = PlanoAnterior(
+                descricao=f"rotas de {rota.data_agendada.isoformat()} ({rota.turno.value})",
+                rotas=[],
+            )
+        atribuicoes = sorted(
+            rota.atribuicoes,
+            key=lambda atr: atr.ordem_embarque if atr.ordem_embarque is not None else 999,
+        )
+        funcionarios = [atribuicao.funcionario_id for atribuicao in atribuicoes]
+        por_turno[chave].rotas.append((rota.veiculo_id, _motorista_primeiro(funcionarios, rota.motorista_id)))
+    planos.extend(por_turno.values())
+    return planos
+
 
+def _montar_plano_inicial(
+    planos: Sequence[PlanoAnterior],
+    funcionarios_planejados: Sequence[FuncionarioPlanejamento],
+    frota: Sequence[VeiculoPlanejado],
+) -> Optional[List[List[int]]]:
+    """
+    Funcionários por veículo da ``frota`` (na ordem de visita) tirados do plano anterior
+    mais parecido (Jaccard dos funcionários); quem saiu é descartado e quem entrou fica
+    para a inserção feita pelo solver.
+    """
+    atuais = {fp.funcionario.id for fp in funcionarios_planejados}
+    melhor: Optional[PlanoAnterior] = None
+    melhor_similaridade = 0.0
+    for plano in planos:
+        anteriores = plano.funcionario_ids
+        if not anteriores:
+            continue
+        similaridade = len(atuais & anteriores) / len(atuais | anteriores)
+        if similaridade > melhor_similaridade:
+            melhor, melhor_similaridade = plano, similaridade
+    if melhor is None or melhor_similaridade < settings.ROTEIRIZACAO_PARTIDA_QUENTE_SIMILARIDADE_MINIMA:
+        return None
 
-def _serializar_plano_vrp(rotas: Sequence[RotaPlanejadaVRP], pendentes: Sequence[int]) -> dict:
+    indice_veiculo = {item.veiculo.id: indice for indice, item in enumerate(frota)}
+    rotas: List[List[int]] = [[] for _ in frota]
+    usados: set[int] = set()
+    for veiculo_id, funcionarios in melhor.rotas:
+        indice = indice_veiculo.get(veiculo_id)
+        if indice is None or rotas[indice]:
+            continue
+        rotas[indice] = [f for f in funcionarios if f in atuais and f not in usados]
+        usados.update(rotas[indice])
+    if not usados:
+        return None
+    logger.info(
+        "Partida a quente do VRP a partir de %s (similaridade %.2f).",
+        melhor.descricao,
+        melhor_similaridade,
+    )
+    return rotas
+
+
+def _serializar_plano_vrp(
+    rotas: Sequence[RotaPlanejadaVRP],
+    pendentes: Sequence[int],
+    coordenadas_funcionarios: Optional[Dict[int, Tuple[float, float]]] = None,
+    falhas_geocodificacao: Optional[Dict[int, str]] = None,
+) -> dict:
+    # Coordenadas e falhas acompanham o plano: um acerto de cache dispensa a geocodificação.
     return {
+        "coordenadas": {
+            str(funcionario_id): [latitude, longitude]
+            for funcionario_id, (latitude, longitude) in (coordenadas_funcionarios or {}).items()
+        },
+        "falhas_geocodificacao": {
+            str(funcionario_id): detalhe for funcionario_id, detalhe in (falhas_geocodificacao or {}).items()
+        },
         "rotas": [
             {
                 "veiculo_id": rota.veiculo.id if rota.veiculo else None,
@@ -775,6 +1009,7 @@ def _serializar_plano_vrp(rotas: Sequence[RotaPlanejadaVRP], pendentes: Sequence
                 "distancia_m": rota.distancia_m,
                 "duracao_s": rota.duracao_s,
                 "custo": rota.custo_estimado,
+                "motorista_id": rota.motorista_id,
             }
             for rota in rotas
         ],
@@ -801,12 +1036,33 @@ def _converter_cache_para_plano(
                 distancia_m=int(rota_payload.get("distancia_m", 0)),
                 duracao_s=int(rota_payload.get("duracao_s", 0)),
                 custo_estimado=float(rota_payload.get("custo", 0.0)),
+                motorista_id=rota_payload.get("motorista_id"),
             )
         )
     pendentes = list(payload.get("pendentes", []))
     return rotas_cache, pendentes
 
 
+def _coordenadas_do_cache(
+    payload: dict,
+    funcionarios_por_id: Dict[int, Funcionario],
+) -> Optional[Dict[int, Tuple[float, float]]]:
+    """Coordenadas gravadas com o plano; None se faltar alguém (plano antigo ou incompleto)."""
+    gravadas = payload.get("coordenadas")
+    if not isinstance(gravadas, dict):
+        return None
+    falhas = payload.get("falhas_geocodificacao", {})
+    coordenadas: Dict[int, Tuple[float, float]] = {}
+    for funcionario_id in funcionarios_por_id:
+        valor = gravadas.get(str(funcionario_id))
+        if valor is None:
+            if str(funcionario_id) in falhas:
+                continue
+            return None
+        coordenadas[funcionario_id] = (float(valor[0]), float(valor[1]))
+    return coordenadas
+
+
 def _montar_funcionarios_planejados(
     funcionarios: Sequence[Funcionario],
     coordenadas: Dict[int, Tuple[float, float]],
@@ -820,110 +1076,138 @@ def _montar_funcionarios_planejados(
     return planejados
 
 
-def _matrizes_trajeto(coords: Sequence[Tuple[float, float]]) -> Tuple[List[List[int]], List[List[int]]]:
+def _matrizes_trajeto(coords: Sequence[Tuple[float, float]]) -> Tuple[np.ndarray, np.ndarray]:
     try:
-        return montar_matrizes_osrm(coords)
-    except OSRMServiceError:
+        return montar_matrizes_trajeto(coords)
+    except OSRMServiceError as exc:
+        logger.warning("OSRM indisponível para %s pontos, usando distâncias geodésicas: %s", len(coords), exc)
         distancias = _gerar_matriz_distancia(coords)
         # Aproxima duração assumindo 32 km/h de média.
-        duracoes: List[List[int]] = []
-        for linha in distancias:
-            nova_linha: List[int] = []
-            for distancia_m in linha:
-                duracao_segundos = int(round((distancia_m / 1000) / 32 * 3600)) if distancia_m else 0
-                nova_linha.append(max(duracao_segundos, 0))
-            duracoes.append(nova_linha)
+        duracoes = np.rint(distancias * (3.6 / 32)).astype(np.int32)
         return distancias, duracoes
 
 
-def _somar_metricas_da_rota(matriz: Sequence[Sequence[int]], rota_nodes: Sequence[int]) -> int:
-    total = 0
-    atual = 0
-    for node in rota_nodes:
-        total += matriz[atual][node]
-        atual = node
-    total += matriz[atual][0]
-    return total
+@dataclass
+class _SubproblemaVRP:
+    """Recorte do VRP (funcionários e veículos por índice) com as matrizes no formato de ``resolver_vrp``."""
 
+    funcionarios: List[int]  # índices em funcionarios_planejados; o nó i + 1 é funcionarios[i]
+    veiculos: List[int]  # índices na frota
+    distancia: np.ndarray
+    duracao: np.ndarray
+    capacidades: List[int]
+    aptos: Optional[List[int]]
+    plano_inicial: Optional[List[List[int]]]
 
-def _resolver_vrp_multi(
-    funcionarios_planejados: Sequence[FuncionarioPlanejamento],
-    destino_coordenadas: Tuple[float, float],
-    frota: Sequence[VeiculoPlanejado],
-) -> Tuple[List[RotaPlanejadaVRP], List[int]]:
-    if not funcionarios_planejados:
-        return [], []
-    if not frota:
-        raise ValueError("Nenhum veículo disponível para gerar rotas VRP.")
+    def argumentos(self, qualidade: QualidadeRoteirizacaoEnum, tempo_maximo_s: Optional[float]) -> tuple:
+        return (self.distancia, self.capacidades, qualidade, tempo_maximo_s, self.aptos, self.plano_inicial)
+
+
+@dataclass
+class _RotaParcial:
+    veiculo: int  # índice na frota
+    funcionarios: List[int]  # índices em funcionarios_planejados, na ordem de visita
+    distancia_m: int
+    duracao_s: int
 
-    coordenadas_solver = [destino_coordenadas] + [fp.coordenadas for fp in funcionarios_planejados]
-    distancia_matriz, duracao_matriz = _matrizes_trajeto(coordenadas_solver)
 
-    manager = pywrapcp.RoutingIndexManager(len(distancia_matriz), len(frota), 0)
-    routing = pywrapcp.RoutingModel(manager)
+def _apto_a_dirigir(funcionario: Funcionario) -> bool:
+    return bool(funcionario.apto_dirigir and funcionario.possui_cnh)
 
-    def distancia_callback(from_index: int, to_index: int) -> int:
-        origem = manager.IndexToNode(from_index)
-        destino = manager.IndexToNode(to_index)
-        return distancia_matriz[origem][destino]
 
-    transit_callback_index = routing.RegisterTransitCallback(distancia_callback)
-    routing.SetArcCostEvaluatorOfAllVehicles(transit_callback_index)
+def _metricas_rota(matriz: np.ndarray, nos: Sequence[int], motoristas: bool) -> int:
+    """Sem motoristas a rota sai do destino e volta a ele; com motoristas vai da casa do motorista ao destino."""
+    return custo_caminho(matriz, [*nos, 0] if motoristas else [0, *nos, 0])
 
-    def demanda_callback(from_index: int) -> int:
-        node = manager.IndexToNode(from_index)
-        return 0 if node == 0 else 1
 
-    demanda_index = routing.RegisterUnaryTransitCallback(demanda_callback)
-    capacidades = [max(v.capacidade_util, 1) for v in frota]
-    routing.AddDimensionWithVehicleCapacity(
-        demanda_index,
-        0,
-        capacidades,
-        True,
-        "Capacity",
+def _montar_subproblema_vrp(
+    funcionarios_planejados: Sequence[FuncionarioPlanejamento],
+    destino_coordenadas: Tuple[float, float],
+    frota: Sequence[VeiculoPlanejado],
+    funcionarios: Sequence[int],
+    veiculos: Sequence[int],
+    motoristas: bool,
+    plano_inicial: Optional[Dict[int, Sequence[int]]] = None,
+) -> _SubproblemaVRP:
+    """``plano_inicial`` traz, por índice de veículo, os índices de funcionários já roteados."""
+    funcionarios = list(funcionarios)
+    veiculos = list(veiculos)
+    coordenadas_solver = [destino_coordenadas] + [funcionarios_planejados[i].coordenadas for i in funcionarios]
+    distancia, duracao = _matrizes_trajeto(coordenadas_solver)
+    aptos = None
+    if motoristas:
+        aptos = [no for no, i in enumerate(funcionarios, start=1) if _apto_a_dirigir(funcionarios_planejados[i].funcionario)]
+    plano_nos = None
+    if plano_inicial:
+        no_por_funcionario = {i: no for no, i in enumerate(funcionarios, start=1)}
+        plano_nos = [
+            [no_por_funcionario[i] for i in plano_inicial.get(veiculo, []) if i in no_por_funcionario]
+            for veiculo in veiculos
+        ]
+    return _SubproblemaVRP(
+        funcionarios=funcionarios,
+        veiculos=veiculos,
+        distancia=distancia,
+        duracao=duracao,
+        # No VRP com motoristas o motorista ocupa um dos assentos.
+        capacidades=[frota[v].capacidade_util + 1 if motoristas else max(frota[v].capacidade_util, 1) for v in veiculos],
+        aptos=aptos,
+        plano_inicial=plano_nos,
     )
 
-    penalty = 10_000_000
-    for node in range(1, len(distancia_matriz)):
-        routing.AddDisjunction([manager.NodeToIndex(node)], penalty)
 
-    search_parameters = pywrapcp.DefaultRoutingSearchParameters()
-    search_parameters.first_solution_strategy = routing_enums_pb2.FirstSolutionStrategy.SAVINGS
-    search_parameters.local_search_metaheuristic = routing_enums_pb2.LocalSearchMetaheuristic.GUIDED_LOCAL_SEARCH
-    search_parameters.time_limit.FromSeconds(20)
+def _rotas_do_subproblema(
+    subproblema: _SubproblemaVRP,
+    rotas_nos: Sequence[Sequence[int]],
+    motoristas: bool,
+) -> List[_RotaParcial]:
+    return [
+        _RotaParcial(
+            veiculo=subproblema.veiculos[posicao],
+            funcionarios=[subproblema.funcionarios[no - 1] for no in nos],
+            distancia_m=_metricas_rota(subproblema.distancia, nos, motoristas),
+            duracao_s=_metricas_rota(subproblema.duracao, nos, motoristas),
+        )
+        for posicao, nos in enumerate(rotas_nos)
+        if nos
+    ]
+
+
+def _plano_inicial_por_indice(
+    plano_inicial: Optional[Sequence[Sequence[int]]],
+    funcionarios_planejados: Sequence[FuncionarioPlanejamento],
+) -> Optional[Dict[int, List[int]]]:
+    """Converte o plano inicial (IDs de funcionários por veículo da frota) para índices."""
+    if not plano_inicial:
+        return None
+    indice_por_id = {fp.funcionario.id: indice for indice, fp in enumerate(funcionarios_planejados)}
+    return {
+        veiculo: [indice_por_id[f] for f in funcionarios if f in indice_por_id]
+        for veiculo, funcionarios in enumerate(plano_inicial)
+    }
 
-    solution = routing.SolveWithParameters(search_parameters)
-    if solution is None:
-        raise RuntimeError("Falha ao resolver o VRP multi-veículos. Tente novamente mais tarde.")
 
+def _montar_rotas_planejadas(
+    rotas: Sequence[_RotaParcial],
+    funcionarios_planejados: Sequence[FuncionarioPlanejamento],
+    frota: Sequence[VeiculoPlanejado],
+    motoristas: bool,
+) -> Tuple[List[RotaPlanejadaVRP], List[int]]:
     rotas_planejadas: List[RotaPlanejadaVRP] = []
     funcionarios_atendidos: set[int] = set()
-
-    for idx_veiculo in range(len(frota)):
-        index = routing.Start(idx_veiculo)
-        rota_nodes: List[int] = []
-        while not routing.IsEnd(index):
-            node_index = manager.IndexToNode(index)
-            if node_index != 0:
-                rota_nodes.append(node_index)
-            index = solution.Value(routing.NextVar(index))
-        if not rota_nodes:
-            continue
-        funcionarios_ids = [funcionarios_planejados[node - 1].funcionario.id for node in rota_nodes]
+    for rota in sorted(rotas, key=lambda r: r.veiculo):
+        funcionarios_ids = [funcionarios_planejados[i].funcionario.id for i in rota.funcionarios]
         funcionarios_atendidos.update(funcionarios_ids)
-        distancia_total = _somar_metricas_da_rota(distancia_matriz, rota_nodes)
-        duracao_total = _somar_metricas_da_rota(duracao_matriz, rota_nodes)
-        veiculo_planejado = frota[idx_veiculo]
-        custo_estimado = (distancia_total / 1000) * veiculo_planejado.custo_relativo
+        veiculo_planejado = frota[rota.veiculo]
         rotas_planejadas.append(
             RotaPlanejadaVRP(
                 veiculo=veiculo_planejado.veiculo,
                 disponibilidade=veiculo_planejado.disponibilidade,
                 funcionario_ids=funcionarios_ids,
-                distancia_m=distancia_total,
-                duracao_s=duracao_total,
-                custo_estimado=custo_estimado,
+                distancia_m=rota.distancia_m,
+                duracao_s=rota.duracao_s,
+                custo_estimado=(rota.distancia_m / 1000) * veiculo_planejado.custo_relativo,
+                motorista_id=funcionarios_ids[0] if motoristas else None,
             )
         )
 
@@ -935,6 +1219,225 @@ def _resolver_vrp_multi(
     return rotas_planejadas, nao_alocados
 
 
+def _validar_entrada_vrp(
+    funcionarios_planejados: Sequence[FuncionarioPlanejamento],
+    frota: Sequence[VeiculoPlanejado],
+    motoristas: bool,
+) -> None:
+    if not frota:
+        raise ValueError("Nenhum veículo disponível para gerar rotas VRP.")
+    if motoristas and not any(_apto_a_dirigir(fp.funcionario) for fp in funcionarios_planejados):
+        raise ValueError("Nenhum motorista habilitado disponível para o grupo/data/turno informados.")
+
+
+def _resolver_vrp(
+    funcionarios_planejados: Sequence[FuncionarioPlanejamento],
+    destino_coordenadas: Tuple[float, float],
+    frota: Sequence[VeiculoPlanejado],
+    motoristas: bool,
+    qualidade: QualidadeRoteirizacaoEnum = QualidadeRoteirizacaoEnum.EQUILIBRADA,
+    tempo_maximo_s: Optional[float] = None,
+    plano_inicial: Optional[Sequence[Sequence[int]]] = None,
+) -> Tuple[List[RotaPlanejadaVRP], List[int]]:
+    """
+    VRP do grupo inteiro num único modelo.
+
+    Com ``motoristas`` cada veículo parte da casa do seu motorista e termina no destino:
+    a primeira parada de cada rota é um funcionário apto a dirigir (ver ``resolver_vrp``),
+    então motorista e veículo saem da mesma solução, sem sequenciamentos posteriores.
+    Sem ``motoristas`` o destino é o depósito único e o motorista é escolhido depois.
+    """
+    if not funcionarios_planejados:
+        return [], []
+    _validar_entrada_vrp(funcionarios_planejados, frota, motoristas)
+    subproblema = _montar_subproblema_vrp(
+        funcionarios_planejados,
+        destino_coordenadas,
+        frota,
+        range(len(funcionarios_planejados)),
+        range(len(frota)),
+        motoristas,
+        _plano_inicial_por_indice(plano_inicial, funcionarios_planejados),
+    )
+    rotas_nos = resolver_vrp(*subproblema.argumentos(qualidade, tempo_maximo_s))
+    return _montar_rotas_planejadas(
+        _rotas_do_subproblema(subproblema, rotas_nos, motoristas),
+        funcionarios_planejados,
+        frota,
+        motoristas,
+    )
+
+
+def _usar_decomposicao(requisicao: RequisicaoGerarRotasVRP, quantidade_funcionarios: int) -> bool:
+    if requisicao.decomposicao is not None:
+        return requisicao.decomposicao
+    return quantidade_funcionarios >= settings.ROTEIRIZACAO_DECOMPOSICAO_MINIMO_FUNCIONARIOS
+
+
+def _executor_decomposicao(tarefas: int) -> Optional[ProcessPoolExecutor]:
+    processos = min(settings.ROTEIRIZACAO_DECOMPOSICAO_PROCESSOS or os.cpu_count() or 1, tarefas)
+    if processos <= 1:
+        return None
+    # "spawn": o processo da API tem threads (OSRM, servidor), que não sobrevivem a um fork.
+    return ProcessPoolExecutor(max_workers=processos, mp_context=multiprocessing.get_context("spawn"))
+
+
+def _resolver_subproblemas(
+    executor: Optional[ProcessPoolExecutor],
+    subproblemas: Sequence[_SubproblemaVRP],
+    qualidade: QualidadeRoteirizacaoEnum,
+    tempo_maximo_s: Optional[float],
+) -> List[List[List[int]]]:
+    if executor is None or len(subproblemas) <= 1:
+        return [resolver_vrp(*sub.argumentos(qualidade, tempo_maximo_s)) for sub in subproblemas]
+    futuros = [executor.submit(resolver_vrp, *sub.argumentos(qualidade, tempo_maximo_s)) for sub in subproblemas]
+    return [futuro.result() for futuro in futuros]
+
+
+def _reparar_fronteiras(
+    executor: Optional[ProcessPoolExecutor],
+    funcionarios_planejados: Sequence[FuncionarioPlanejamento],
+    destino_coordenadas: Tuple[float, float],
+    frota: Sequence[VeiculoPlanejado],
+    motoristas: bool,
+    pontos: np.ndarray,
+    rotulos: np.ndarray,
+    veiculos_por_cluster: Sequence[Sequence[int]],
+    rotas: Dict[int, _RotaParcial],
+    tempo_maximo_s: Optional[float],
+) -> int:
+    """
+    Reotimiza, para cada par de clusters vizinhos, as rotas que passam pela faixa entre
+    eles junto com os pendentes e os veículos ociosos dos dois. A troca só é aceita se
+    reduzir a distância mais a penalidade dos não atendidos. Devolve as trocas aceitas.
+    """
+    trocas = 0
+    pares = decomposicao_vrp.pares_vizinhos(pontos, rotulos, settings.ROTEIRIZACAO_DECOMPOSICAO_MARGEM_FRONTEIRA)
+    for rodada in decomposicao_vrp.rodadas_disjuntas(pares):
+        candidatos: List[Tuple[_SubproblemaVRP, List[int], int]] = []
+        atendidos = {i for rota in rotas.values() for i in rota.funcionarios}
+        for a, b, faixa in rodada:
+            faixa_set = set(faixa.tolist())
+            veiculos_par = [*veiculos_por_cluster[a], *veiculos_por_cluster[b]]
+            na_faixa = [v for v in veiculos_par if v in rotas and faixa_set.intersection(rotas[v].funcionarios)]
+            ociosos = [v for v in veiculos_par if v not in rotas]
+            pendentes = [
+                i for i in np.flatnonzero((rotulos == a) | (rotulos == b)).tolist() if i not in atendidos
+            ]
+            if not na_faixa and not pendentes:
+                continue
+            if not na_faixa and not ociosos:
+                continue
+            subproblema = _montar_subproblema_vrp(
+                funcionarios_planejados,
+                destino_coordenadas,
+                frota,
+                [i for v in na_faixa for i in rotas[v].funcionarios] + pendentes,
+                na_faixa + ociosos,
+                motoristas,
+                {v: rotas[v].funcionarios for v in na_faixa},
+            )
+            custo_atual = sum(rotas[v].distancia_m for v in na_faixa) + PENALIDADE_NAO_ATENDIDO * len(pendentes)
+            candidatos.append((subproblema, na_faixa, custo_atual))
+
+        resultados = _resolver_subproblemas(
+            executor,
+            [subproblema for subproblema, _, _ in candidatos],
+            QualidadeRoteirizacaoEnum.PREVIA,
+            tempo_maximo_s,
+        )
+        for (subproblema, na_faixa, custo_atual), rotas_nos in zip(candidatos, resultados):
+            novas = _rotas_do_subproblema(subproblema, rotas_nos, motoristas)
+            nao_atendidos = len(subproblema.funcionarios) - sum(len(rota.funcionarios) for rota in novas)
+            custo_novo = sum(rota.distancia_m for rota in novas) + PENALIDADE_NAO_ATENDIDO * nao_atendidos
+            if custo_novo >= custo_atual:
+                continue
+            for veiculo in na_faixa:
+                del rotas[veiculo]
+            rotas.update({rota.veiculo: rota for rota in novas})
+            trocas += 1
+    return trocas
+
+
+def _resolver_vrp_decomposto(
+    funcionarios_planejados: Sequence[FuncionarioPlanejamento],
+    destino_coordenadas: Tuple[float, float],
+    frota: Sequence[VeiculoPlanejado],
+    motoristas: bool,
+    qualidade: QualidadeRoteirizacaoEnum = QualidadeRoteirizacaoEnum.EQUILIBRADA,
+    tempo_maximo_s: Optional[float] = None,
+    plano_inicial: Optional[Sequence[Sequence[int]]] = None,
+) -> Tuple[List[RotaPlanejadaVRP], List[int]]:
+    """
+    Agrupa primeiro, roteia depois: particiona os funcionários em torno do destino
+    (``utils.decomposicao_vrp``), divide a frota entre os clusters, resolve cada cluster
+    em um processo separado e termina com a reparação das fronteiras entre vizinhos.
+    Cada modelo do OR-tools cobre só um cluster (ou um par de faixas), em vez do grupo todo.
+    """
+    if not funcionarios_planejados:
+        return [], []
+    _validar_entrada_vrp(funcionarios_planejados, frota, motoristas)
+
+    pontos = decomposicao_vrp.projetar([fp.coordenadas for fp in funcionarios_planejados], destino_coordenadas)
+    quantidade = math.ceil(len(funcionarios_planejados) / settings.ROTEIRIZACAO_DECOMPOSICAO_TAMANHO_CLUSTER)
+    rotulos = decomposicao_vrp.particionar_funcionarios(pontos, min(quantidade, len(frota)))
+    aptos = np.asarray([_apto_a_dirigir(fp.funcionario) for fp in funcionarios_planejados], dtype=bool)
+    if motoristas:
+        rotulos = decomposicao_vrp.fundir_clusters_sem_motorista(pontos, rotulos, aptos)
+    clusters = int(rotulos.max()) + 1
+    membros = [np.flatnonzero(rotulos == cluster).tolist() for cluster in range(clusters)]
+    veiculos_por_cluster = decomposicao_vrp.distribuir_frota(
+        [len(m) for m in membros],
+        [v.capacidade_util for v in frota],
+        limites=np.bincount(rotulos[aptos], minlength=clusters).tolist() if motoristas else None,
+    )
+
+    plano_por_indice = _plano_inicial_por_indice(plano_inicial, funcionarios_planejados)
+    subproblemas = [
+        _montar_subproblema_vrp(
+            funcionarios_planejados,
+            destino_coordenadas,
+            frota,
+            membros[cluster],
+            veiculos_por_cluster[cluster],
+            motoristas,
+            plano_por_indice,
+        )
+        for cluster in range(clusters)
+        if membros[cluster] and veiculos_por_cluster[cluster]
+    ]
+    executor = _executor_decomposicao(len(subproblemas))
+    try:
+        resultados = _resolver_subproblemas(executor, subproblemas, qualidade, tempo_maximo_s)
+        rotas = {
+            rota.veiculo: rota
+            for subproblema, rotas_nos in zip(subproblemas, resultados)
+            for rota in _rotas_do_subproblema(subproblema, rotas_nos, motoristas)
+        }
+        trocas = _reparar_fronteiras(
+            executor,
+            funcionarios_planejados,
+            destino_coordenadas,
+            frota,
+            motoristas,
+            pontos,
+            rotulos,
+            veiculos_por_cluster,
+            rotas,
+            tempo_maximo_s,
+        )
+    finally:
+        if executor is not None:
+            executor.shutdown()
+    logger.info(
+        "VRP decomposto: %s funcionário(s) em %s cluster(s), %s reparação(ões) de fronteira aceita(s).",
+        len(funcionarios_planejados),
+        clusters,
+        trocas,
+    )
+    return _montar_rotas_planejadas(list(rotas.values()), funcionarios_planejados, frota, motoristas)
+
+
 def _persistir_rotas_vrp(
     session: Session,
     empresa: Empresa,
@@ -946,6 +1449,7 @@ def _persistir_rotas_vrp(
     pendentes: Sequence[int],
     coordenadas_funcionarios: Dict[int, Tuple[float, float]],
     funcionarios_por_id: Dict[int, Funcionario],
+    falhas_geocodificacao: Optional[Dict[int, str]] = None,
 ) -> List[Rota]:
     if not rotas_planejadas:
         raise ValueError("Nenhuma rota pôde ser montada com a frota disponível.")
@@ -981,10 +1485,11 @@ def _persistir_rotas_vrp(
             if func_id in funcionarios_por_id
         ]
 
-        motorista: Optional[Funcionario] = None
-        if funcionarios_rota:
+        motorista: Optional[Funcionario] = funcionarios_por_id.get(plano.motorista_id) if plano.motorista_id else None
+        avaliacao_motoristas: List[AvaliacaoMotorista] = []
+        if motorista is None and funcionarios_rota:
             try:
-                motorista = _selecionar_motorista(
+                motorista, avaliacao_motoristas = _selecionar_motorista(
                     funcionarios_rota,
                     None,
                     coordenadas=coordenadas_funcionarios,
@@ -995,7 +1500,9 @@ def _persistir_rotas_vrp(
         if motorista:
             rota.motorista_id = motorista.id
 
-        for ordem, funcionario in enumerate(funcionarios_rota, start=1):
+        # Com o motorista vindo do VRP a lista já está na ordem de embarque, começando por ele.
+        primeira_ordem = 0 if plano.motorista_id else 1
+        for ordem, funcionario in enumerate(funcionarios_rota, start=primeira_ordem):
             coordenadas = coordenadas_funcionarios.get(funcionario.id)
             session.add(
                 AtribuicaoRota(
@@ -1014,10 +1521,11 @@ def _persistir_rotas_vrp(
                 quantidade_funcionarios=len(funcionarios_rota),
                 veiculo_id=plano.veiculo.id if plano.veiculo else None,
                 motorista_id=motorista.id if motorista else None,
-                observacoes="Rota VRP gerada automaticamente.",
+                observacoes="Rota VRP gerada automaticamente." + _resumir_avaliacao_motoristas(avaliacao_motoristas),
             )
         )
         rota.sugestoes_veiculos = sugestoes
+        rota.avaliacao_motoristas = avaliacao_motoristas
         rotas_criadas.append(rota)
         sequencia += 1
 
@@ -1032,6 +1540,7 @@ def _persistir_rotas_vrp(
                 grupo_rota_id=grupo.id,
             )
         )
+    _registrar_pendentes_geocodificacao(session, falhas_geocodificacao or {}, requisicao, grupo)
 
     session.commit()
     for rota in rotas_criadas:
@@ -1100,15 +1609,15 @@ def gerar_rota_automatica(session: Session, requisicao: RequisicaoGerarRota) ->
         destino_cep = requisicao.destino_cep.replace(" ", "").strip()
         destino_complemento = requisicao.destino_complemento.strip() if requisicao.destino_complemento else None
 
-        endereco_componentes = [
-            ', '.join(filter(None, [requisicao.destino_logradouro.strip(), requisicao.destino_numero.strip()])),
+        destino_endereco = montar_endereco(
+            requisicao.destino_logradouro,
+            requisicao.destino_numero,
             destino_complemento,
-            requisicao.destino_bairro.strip(),
-            f"{requisicao.destino_cidade.strip()} - {destino_estado}",
+            requisicao.destino_bairro,
+            requisicao.destino_cidade,
+            destino_estado,
             destino_cep,
-            "Brasil",
-        ]
-        destino_endereco = ', '.join(filter(None, endereco_componentes))
+        )
 
         try:
             destino_coordenadas = geocode_address(destino_endereco)
@@ -1132,18 +1641,25 @@ def gerar_rota_automatica(session: Session, requisicao: RequisicaoGerarRota) ->
         session.add(destino)
         session.flush()
 
-    try:
-        coordenadas_funcionarios = _obter_coordenadas_funcionarios(funcionarios_disponiveis)
-    except GeocodeError as exc:
-        raise ValueError(str(exc)) from exc
-    except GeocoderServiceError as exc:
-        raise ValueError(f"Falha ao geocodificar um endereço: {exc}") from exc
+    funcionarios_disponiveis, coordenadas_funcionarios, falhas_geocodificacao = _separar_funcionarios_geocodificados(
+        funcionarios_disponiveis,
+        parcial=requisicao.geocodificacao_parcial,
+    )
+    if requisicao.motorista_id in falhas_geocodificacao:
+        raise ValueError(
+            f"Falha ao geocodificar o endereço do motorista selecionado: {falhas_geocodificacao[requisicao.motorista_id]}"
+        )
 
-    motorista = _selecionar_motorista(
+    # Uma matriz para o grupo inteiro: serve à escolha do motorista e ao trajeto final.
+    matriz_grupo = _gerar_matriz_distancia(
+        [coordenadas_funcionarios[funcionario.id] for funcionario in funcionarios_disponiveis] + [destino_coordenadas]
+    )
+    motorista, avaliacao_motoristas = _selecionar_motorista(
         funcionarios_disponiveis,
         requisicao.motorista_id,
         coordenadas=coordenadas_funcionarios,
         destino_coordenadas=destino_coordenadas,
+        matriz=matriz_grupo,
     )
 
     passageiros = [f for f in funcionarios_disponiveis if f.id != motorista.id]
@@ -1187,11 +1703,15 @@ def gerar_rota_automatica(session: Session, requisicao: RequisicaoGerarRota) ->
     coordenadas_com_destino = coordenadas + [destino_coordenadas]
     indice_destino_final = len(coordenadas_com_destino) - 1
 
-    ordem_passageiros = _resolver_ordem_embarque(coordenadas_com_destino, indice_destino_final)
+    posicao_no_grupo = {funcionario.id: indice for indice, funcionario in enumerate(funcionarios_disponiveis)}
+    indices_trajeto = [posicao_no_grupo[func.id] for func in funcionarios_trajeto] + [len(funcionarios_disponiveis)]
+    matriz_distancias = matriz_grupo[np.ix_(indices_trajeto, indices_trajeto)]
+    ordem_passageiros = _resolver_ordem_embarque(coordenadas_com_destino, indice_destino_final, matriz_distancias)
     distancia_total_km = _calcular_distancia_total(
         coordenadas_com_destino,
         ordem_passageiros,
         indice_destino_final,
+        matriz_distancias,
     )
     custo_estimado = distancia_total_km * CUSTO_RELATIVO_CATEGORIA.get(
         veiculo.categoria_custo if veiculo else CategoriaCustoVeiculo.BAIXO,
@@ -1271,19 +1791,22 @@ def gerar_rota_automatica(session: Session, requisicao: RequisicaoGerarRota) ->
             )
         )
 
+    _registrar_pendentes_geocodificacao(session, falhas_geocodificacao, requisicao, grupo, rota_id=rota.id)
+
     session.add(
         LogGeracaoRota(
             rota_id=rota.id,
             quantidade_funcionarios=len(passageiros_alocados),
             veiculo_id=veiculo.id if veiculo else None,
             motorista_id=motorista.id,
-            observacoes="Rota gerada automaticamente pela API.",
+            observacoes="Rota gerada automaticamente pela API." + _resumir_avaliacao_motoristas(avaliacao_motoristas),
         )
     )
 
     session.commit()
     session.refresh(rota)
     rota.sugestoes_veiculos = sugestoes_adicionais
+    rota.avaliacao_motoristas = avaliacao_motoristas
     return rota
 
 
@@ -1323,15 +1846,6 @@ def gerar_rotas_vrp(session: Session, requisicao: RequisicaoGerarRotasVRP) -> Li
 
     destino, destino_coordenadas = _resolver_destino(session, empresa, requisicao)
 
-    try:
-        coordenadas_funcionarios = _obter_coordenadas_funcionarios(funcionarios_disponiveis)
-    except GeocodeError as exc:
-        raise ValueError(str(exc)) from exc
-    except GeocoderServiceError as exc:
-        raise ValueError(f"Falha ao geocodificar um endereço: {exc}") from exc
-
-    funcionarios_planejados = _montar_funcionarios_planejados(funcionarios_disponiveis, coordenadas_funcionarios)
-
     frota_disponivel = _listar_frota_disponivel(
         session=session,
         grupo=grupo,
@@ -1344,25 +1858,61 @@ def gerar_rotas_vrp(session: Session, requisicao: RequisicaoGerarRotasVRP) -> Li
         raise ValueError("Nenhum veículo disponível atende à capacidade e ao período desejados.")
 
     funcionarios_por_id = {func.id: func for func in funcionarios_disponiveis}
+    decompor = _usar_decomposicao(requisicao, len(funcionarios_disponiveis))
 
-    chave_cache, contexto_raw = _montar_chave_cache_vrp(requisicao, destino_coordenadas, funcionarios_planejados, frota_disponivel)
-    rotas_planejadas: Optional[List[RotaPlanejadaVRP]] = None
-    pendentes: List[int] = []
+    # O contexto não depende de coordenadas: um plano repetido volta antes da geocodificação.
+    chave_cache, _ = _montar_chave_cache_vrp(requisicao, destino_coordenadas, funcionarios_disponiveis, frota_disponivel)
     if not requisicao.ignorar_cache:
-        cache_payload = _obter_plano_cacheado(session, chave_cache)
-        if cache_payload:
-            convertido = _converter_cache_para_plano(cache_payload, frota_disponivel)
-            if convertido:
-                rotas_planejadas, pendentes = convertido
+        cache_payload = obter_plano_cacheado(session, chave_cache)
+        convertido = _converter_cache_para_plano(cache_payload, frota_disponivel) if cache_payload else None
+        coordenadas_cache = _coordenadas_do_cache(cache_payload, funcionarios_por_id) if convertido else None
+        if convertido and coordenadas_cache is not None:
+            rotas_planejadas, pendentes = convertido
+            falhas_cache = {
+                int(funcionario_id): detalhe
+                for funcionario_id, detalhe in cache_payload.get("falhas_geocodificacao", {}).items()
+            }
+            return _persistir_rotas_vrp(
+                session=session,
+                empresa=empresa,
+                grupo=grupo,
+                destino=destino,
+                destino_coordenadas=destino_coordenadas,
+                requisicao=requisicao,
+                rotas_planejadas=rotas_planejadas,
+                pendentes=pendentes,
+                coordenadas_funcionarios=coordenadas_cache,
+                funcionarios_por_id=funcionarios_por_id,
+                falhas_geocodificacao=falhas_cache,
+            )
 
-    if rotas_planejadas is None:
-        rotas_planejadas, pendentes = _resolver_vrp_multi(funcionarios_planejados, destino_coordenadas, frota_disponivel)
-        plano_serializado = _serializar_plano_vrp(rotas_planejadas, pendentes)
-        plano_serializado["contexto"] = json.loads(contexto_raw)
-        _armazenar_plano_cacheado(session, chave_cache, plano_serializado)
+    funcionarios_disponiveis, coordenadas_funcionarios, falhas_geocodificacao = _separar_funcionarios_geocodificados(
+        funcionarios_disponiveis,
+        parcial=requisicao.geocodificacao_parcial,
+    )
+    funcionarios_planejados = _montar_funcionarios_planejados(funcionarios_disponiveis, coordenadas_funcionarios)
 
-    if rotas_planejadas is None:
-        raise RuntimeError("Falha ao montar rotas VRP após leitura do cache.")
+    plano_inicial = None
+    if settings.ROTEIRIZACAO_PARTIDA_QUENTE:
+        plano_inicial = _montar_plano_inicial(
+            _listar_planos_anteriores(session, grupo, destino, destino_coordenadas),
+            funcionarios_planejados,
+            frota_disponivel,
+        )
+    resolver = _resolver_vrp_decomposto if decompor else _resolver_vrp
+    rotas_planejadas, pendentes = resolver(
+        funcionarios_planejados,
+        destino_coordenadas,
+        frota_disponivel,
+        motoristas=requisicao.motoristas_no_vrp,
+        qualidade=requisicao.qualidade,
+        tempo_maximo_s=requisicao.tempo_maximo_s,
+        plano_inicial=plano_inicial,
+    )
+    plano_serializado = _serializar_plano_vrp(rotas_planejadas, pendentes, coordenadas_funcionarios, falhas_geocodificacao)
+    # Do contexto só o destino é lido de volta (partida a quente); a chave já identifica o resto.
+    plano_serializado["contexto"] = {"destino": [round(destino_coordenadas[0], 5), round(destino_coordenadas[1], 5)]}
+    armazenar_plano_cacheado(session, chave_cache, plano_serializado, grupo_rota_id=grupo.id)
 
     rotas_criadas = _persistir_rotas_vrp(
         session=session,
@@ -1375,5 +1925,6 @@ def gerar_rotas_vrp(session: Session, requisicao: RequisicaoGerarRotasVRP) -> Li
         pendentes=pendentes,
         coordenadas_funcionarios=coordenadas_funcionarios,
         funcionarios_por_id=funcionarios_por_id,
+        falhas_geocodificacao=falhas_geocodificacao,
     )
     return rotas_criadas
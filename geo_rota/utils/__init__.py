@@ -1,3 +1,19 @@
-from geo_rota.utils.geocode import GeocodeError, distance_km, geocode_address
+from geo_rota.utils.geocode import (
+    GeocodeError,
+    ResultadoGeocodificacao,
+    distance_km,
+    geocode_address,
+    geocode_address_detalhado,
+    geocode_addresses,
+    obter_estatisticas_cache_geocodificacao,
+)
 
-__all__ = ["GeocodeError", "distance_km", "geocode_address"]
+__all__ = [
+    "GeocodeError",
+    "ResultadoGeocodificacao",
+    "distance_km",
+    "geocode_address",
+    "geocode_address_detalhado",
+    "geocode_addresses",
+    "obter_estatisticas_cache_geocodificacao",
+]
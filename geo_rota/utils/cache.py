@@ -0,0 +1,75 @@
+"""
+Cache em memória limitado por tamanho e por tempo de vida.
+
+Substitui o ``lru_cache`` nos pontos em que os resultados precisam expirar ou
+em que o volume de chaves ultrapassa facilmente um limite fixo pequeno.
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Generic, Hashable, Optional, Tuple, TypeVar
+
+V = TypeVar("V")
+
+_AUSENTE = object()
+
+
+class CacheTTL(Generic[V]):
+    """
+    Dicionário LRU com expiração por entrada e contadores de acerto/falta.
+
+    Entradas vencidas são descartadas na leitura; ao exceder ``tamanho_maximo`` a
+    menos usada recentemente é removida.
+    """
+
+    def __init__(self, tamanho_maximo: int, ttl_segundos: float) -> None:
+        self.tamanho_maximo = max(tamanho_maximo, 1)
+        self.ttl_segundos = ttl_segundos
+        self._itens: "OrderedDict[Hashable, Tuple[float, V]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.acertos = 0
+        self.faltas = 0
+
+    def obter(self, chave: Hashable, padrao: Any = None) -> Optional[V]:
+        agora = time.monotonic()
+        with self._lock:
+            item = self._itens.get(chave, _AUSENTE)
+            if item is _AUSENTE:
+                self.faltas += 1
+                return padrao
+            expira_em, valor = item
+            if expira_em <= agora:
+                del self._itens[chave]
+                self.faltas += 1
+                return padrao
+            self._itens.move_to_end(chave)
+            self.acertos += 1
+            return valor
+
+    def definir(self, chave: Hashable, valor: V, ttl_segundos: Optional[float] = None) -> None:
+        ttl = self.ttl_segundos if ttl_segundos is None else min(ttl_segundos, self.ttl_segundos)
+        if ttl <= 0:
+            return
+        with self._lock:
+            self._itens[chave] = (time.monotonic() + ttl, valor)
+            self._itens.move_to_end(chave)
+            while len(self._itens) > self.tamanho_maximo:
+                self._itens.popitem(last=False)
+
+    def remover(self, chave: Hashable) -> None:
+        with self._lock:
+            self._itens.pop(chave, None)
+
+    def limpar(self) -> None:
+        with self._lock:
+            self._itens.clear()
+
+    def __len__(self) -> int:
+        return len(self._itens)
+
+    def estatisticas(self) -> Dict[str, int]:
+        with self._lock:
+            return {"tamanho": len(self._itens), "acertos": self.acertos, "faltas": self.faltas}
@@ -0,0 +1,173 @@
+"""
+Geocodificação offline por centróide de CEP.
+
+A base é compilada a partir de um CSV ``cep,latitude,longitude`` para um arquivo
+binário compacto: um vetor ordenado de CEPs (uint32) seguido dos pares de
+coordenadas (float32). O arquivo é mapeado em memória e a busca é uma pesquisa
+binária sobre o vetor de CEPs, sem acesso à rede.
+"""
+
+from __future__ import annotations
+
+import csv
+import logging
+import mmap
+import re
+import struct
+import sys
+import threading
+from array import array
+from bisect import bisect_left
+from pathlib import Path
+from typing import Optional, Tuple
+
+from geo_rota.core.config import settings
+from geo_rota.models.enums import PrecisaoGeocodificacaoEnum
+
+_MAGICO = b"GEOCEP01"
+# Cabeçalho: identificador, ordem de bytes (0 = little, 1 = big) e quantidade de registros.
+_CABECALHO = struct.Struct("<8sBxxxI")
+_CEP_REGEX = re.compile(r"(?<!\d)(\d{5})-?(\d{3})(?!\d)")
+
+logger = logging.getLogger("geo_rota.cep")
+
+
+class BaseCEPError(RuntimeError):
+    """Erro ao compilar ou abrir a base de centróides de CEP."""
+
+
+def extrair_cep(texto: str) -> Optional[str]:
+    """Retorna o último CEP (8 dígitos, sem hífen) encontrado no texto."""
+    encontrados = _CEP_REGEX.findall(texto or "")
+    if not encontrados:
+        return None
+    prefixo, sufixo = encontrados[-1]
+    return prefixo + sufixo
+
+
+def compilar_base_cep(origem_csv: str | Path, destino: str | Path) -> int:
+    """
+    Converte um CSV ``cep,latitude,longitude`` para o formato binário ordenado.
+
+    Aceita separador vírgula ou ponto e vírgula e CEPs com ou sem hífen. Em CEPs
+    repetidos prevalece a última linha. Retorna a quantidade de CEPs gravados.
+    """
+    registros: dict[int, Tuple[float, float]] = {}
+    with open(origem_csv, newline="", encoding="utf-8-sig") as arquivo:
+        amostra = arquivo.read(4096)
+        arquivo.seek(0)
+        dialeto = csv.Sniffer().sniff(amostra, delimiters=",;")
+        leitor = csv.DictReader(arquivo, dialect=dialeto)
+        for linha in leitor:
+            cep = re.sub(r"\D", "", linha.get("cep") or "")
+            if len(cep) != 8:
+                continue
+            try:
+                registros[int(cep)] = (float(linha["latitude"]), float(linha["longitude"]))
+            except (KeyError, TypeError, ValueError):
+                continue
+
+    ceps = array("I", sorted(registros))
+    coordenadas = array("f")
+    for cep in ceps:
+        coordenadas.extend(registros[cep])
+
+    ordem = 0 if sys.byteorder == "little" else 1
+    with open(destino, "wb") as saida:
+        saida.write(_CABECALHO.pack(_MAGICO, ordem, len(ceps)))
+        saida.write(ceps.tobytes())
+        saida.write(coordenadas.tobytes())
+    return len(ceps)
+
+
+class BaseCEP:
+    """Base de centróides de CEP mapeada em memória."""
+
+    def __init__(self, caminho: str | Path) -> None:
+        self.caminho = Path(caminho)
+        try:
+            self._arquivo = open(self.caminho, "rb")
+        except OSError as exc:
+            raise BaseCEPError(f"Não foi possível abrir a base de CEP '{caminho}': {exc}") from exc
+        try:
+            self._mapa = mmap.mmap(self._arquivo.fileno(), 0, access=mmap.ACCESS_READ)
+            magico, ordem, quantidade = _CABECALHO.unpack_from(self._mapa, 0)
+        except (ValueError, struct.error) as exc:
+            self._arquivo.close()
+            raise BaseCEPError(f"Arquivo de base de CEP inválido: '{caminho}'") from exc
+        if magico != _MAGICO:
+            self.fechar()
+            raise BaseCEPError(f"Arquivo de base de CEP inválido: '{caminho}'")
+        if ordem != (0 if sys.byteorder == "little" else 1):
+            self.fechar()
+            raise BaseCEPError("Base de CEP compilada com ordem de bytes diferente desta máquina.")
+
+        inicio_ceps = _CABECALHO.size
+        inicio_coordenadas = inicio_ceps + quantidade * 4
+        self._visao = memoryview(self._mapa)
+        self._ceps = self._visao[inicio_ceps:inicio_coordenadas].cast("I")
+        self._coordenadas = self._visao[inicio_coordenadas : inicio_coordenadas + quantidade * 8].cast("f")
+
+    def __len__(self) -> int:
+        return len(self._ceps)
+
+    def _coordenada(self, indice: int) -> Tuple[float, float]:
+        return float(self._coordenadas[2 * indice]), float(self._coordenadas[2 * indice + 1])
+
+    def buscar(self, cep: str) -> Optional[Tuple[float, float, PrecisaoGeocodificacaoEnum]]:
+        """
+        Busca o centróide do CEP informado.
+
+        Sem correspondência exata, usa a média dos CEPs do mesmo setor (5 primeiros
+        dígitos) e sinaliza a precisão reduzida.
+        """
+        digitos = re.sub(r"\D", "", cep or "")
+        if len(digitos) != 8:
+            return None
+        chave = int(digitos)
+        indice = bisect_left(self._ceps, chave)
+        if indice < len(self._ceps) and self._ceps[indice] == chave:
+            latitude, longitude = self._coordenada(indice)
+            return latitude, longitude, PrecisaoGeocodificacaoEnum.CEP
+
+        setor_inicio = chave - chave % 1000
+        inicio = bisect_left(self._ceps, setor_inicio)
+        fim = bisect_left(self._ceps, setor_inicio + 1000, lo=inicio)
+        if inicio == fim:
+            return None
+        latitudes = [self._coordenadas[2 * i] for i in range(inicio, fim)]
+        longitudes = [self._coordenadas[2 * i + 1] for i in range(inicio, fim)]
+        total = fim - inicio
+        return sum(latitudes) / total, sum(longitudes) / total, PrecisaoGeocodificacaoEnum.CEP_SETOR
+
+    def fechar(self) -> None:
+        for visao in ("_ceps", "_coordenadas", "_visao"):
+            item = getattr(self, visao, None)
+            if item is not None:
+                item.release()
+        if getattr(self, "_mapa", None) is not None:
+            self._mapa.close()
+        self._arquivo.close()
+
+
+_base_cep: Optional[BaseCEP] = None
+_base_cep_carregada = False
+_base_cep_lock = threading.Lock()
+
+
+def obter_base_cep() -> Optional[BaseCEP]:
+    """Carrega sob demanda a base configurada em ``GEOCODE_CEP_BASE`` (ou ``None``)."""
+    global _base_cep, _base_cep_carregada
+    if _base_cep_carregada:
+        return _base_cep
+    with _base_cep_lock:
+        if not _base_cep_carregada:
+            caminho = settings.GEOCODE_CEP_BASE
+            if caminho:
+                try:
+                    _base_cep = BaseCEP(caminho)
+                except BaseCEPError as exc:
+                    # Sem a base seguimos apenas com os provedores online.
+                    logger.warning("Base de CEP indisponível: %s", exc)
+            _base_cep_carregada = True
+    return _base_cep
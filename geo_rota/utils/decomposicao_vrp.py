@@ -0,0 +1,166 @@
+"""
+Particionamento geográfico para resolver grupos grandes por partes.
+
+``particionar_funcionarios`` corta os funcionários em setores angulares em
+torno do destino (varredura) e depois compacta os setores com algumas rodadas
+de k-means com limite de tamanho. ``distribuir_frota`` reparte os veículos
+entre os clusters conforme a demanda de cada um, e ``pares_vizinhos`` aponta
+os funcionários da faixa entre dois clusters, que a reparação de fronteira
+reotimiza em conjunto depois que cada cluster foi resolvido separadamente.
+
+Todas as funções trabalham sobre coordenadas projetadas em quilômetros
+(``projetar``), suficientes para decidir vizinhança e agrupamento.
+"""
+
+from __future__ import annotations
+
+import math
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+_RAIO_TERRA_KM = 6371.0
+_FOLGA_TAMANHO_CLUSTER = 0.1  # clusters podem passar da média em até 10% para ficarem compactos
+
+
+def projetar(coords: Sequence[Tuple[float, float]], origem: Tuple[float, float]) -> np.ndarray:
+    """Projeção equiretangular em km (x para leste, y para norte) a partir de ``origem``."""
+    pontos = np.radians(np.asarray(coords, dtype=np.float64).reshape(-1, 2))
+    lat0, lon0 = np.radians(origem)
+    x = (pontos[:, 1] - lon0) * np.cos(lat0) * _RAIO_TERRA_KM
+    y = (pontos[:, 0] - lat0) * _RAIO_TERRA_KM
+    return np.column_stack((x, y))
+
+
+def _centroides(pontos: np.ndarray, rotulos: np.ndarray, quantidade: int) -> np.ndarray:
+    somas = np.zeros((quantidade, 2))
+    np.add.at(somas, rotulos, pontos)
+    contagem = np.bincount(rotulos, minlength=quantidade)[:, None]
+    return somas / np.maximum(contagem, 1)
+
+
+def _varredura(pontos: np.ndarray, quantidade: int) -> np.ndarray:
+    """Setores angulares de tamanho igual, começando na maior lacuna entre ângulos."""
+    angulos = np.arctan2(pontos[:, 1], pontos[:, 0])
+    ordem = np.argsort(angulos)
+    ordenados = angulos[ordem]
+    lacunas = np.diff(np.concatenate((ordenados, [ordenados[0] + 2 * np.pi])))
+    ordem = np.roll(ordem, -(int(np.argmax(lacunas)) + 1))
+    rotulos = np.empty(len(pontos), dtype=np.intp)
+    rotulos[ordem] = np.arange(len(pontos)) * quantidade // len(pontos)
+    return rotulos
+
+
+def _atribuir_com_limite(distancias: np.ndarray, tamanho_maximo: int) -> np.ndarray:
+    """Cada ponto no centróide mais próximo com vaga; decide primeiro quem mais perderia."""
+    preferencias = np.argsort(distancias, axis=1)
+    ordenadas = np.take_along_axis(distancias, preferencias, axis=1)
+    arrependimento = ordenadas[:, 1] - ordenadas[:, 0] if distancias.shape[1] > 1 else ordenadas[:, 0]
+    vagas = np.full(distancias.shape[1], tamanho_maximo)
+    rotulos = np.empty(len(distancias), dtype=np.intp)
+    for ponto in np.argsort(-arrependimento, kind="stable"):
+        for cluster in preferencias[ponto]:
+            if vagas[cluster] > 0:
+                rotulos[ponto] = cluster
+                vagas[cluster] -= 1
+                break
+    return rotulos
+
+
+def particionar_funcionarios(pontos: np.ndarray, quantidade: int, iteracoes: int = 10) -> np.ndarray:
+    """Rótulo de cluster (0..quantidade-1) de cada ponto projetado em torno do destino."""
+    quantidade = max(1, min(quantidade, len(pontos)))
+    if quantidade == 1:
+        return np.zeros(len(pontos), dtype=np.intp)
+    tamanho_maximo = math.ceil(len(pontos) / quantidade * (1 + _FOLGA_TAMANHO_CLUSTER))
+    rotulos = _varredura(pontos, quantidade)
+    for _ in range(iteracoes):
+        centroides = _centroides(pontos, rotulos, quantidade)
+        distancias = np.linalg.norm(pontos[:, None, :] - centroides[None, :, :], axis=2)
+        novos = _atribuir_com_limite(distancias, tamanho_maximo)
+        if np.array_equal(novos, rotulos):
+            break
+        rotulos = novos
+    return rotulos
+
+
+def fundir_clusters_sem_motorista(pontos: np.ndarray, rotulos: np.ndarray, aptos: np.ndarray) -> np.ndarray:
+    """
+    Junta cada cluster sem nenhum funcionário apto a dirigir ao cluster com motorista de
+    centróide mais próximo e renumera os rótulos a partir de zero.
+    """
+    quantidade = int(rotulos.max()) + 1
+    com_motorista = np.bincount(rotulos[aptos], minlength=quantidade) > 0
+    if com_motorista.all() or not com_motorista.any():
+        return rotulos
+    centroides = _centroides(pontos, rotulos, quantidade)
+    destinos = np.flatnonzero(com_motorista)
+    mapa = np.arange(quantidade)
+    for cluster in np.flatnonzero(~com_motorista):
+        mapa[cluster] = destinos[np.argmin(np.linalg.norm(centroides[destinos] - centroides[cluster], axis=1))]
+    _, renumerados = np.unique(mapa[rotulos], return_inverse=True)
+    return renumerados.astype(np.intp)
+
+
+def distribuir_frota(
+    tamanhos: Sequence[int],
+    capacidades: Sequence[int],
+    limites: Optional[Sequence[int]] = None,
+) -> List[List[int]]:
+    """
+    Índices dos veículos de cada cluster. Na ordem da frota, cada veículo vai para o
+    cluster com mais funcionários ainda sem assento; ``limites`` restringe quantos
+    veículos um cluster pode receber (no VRP com motoristas, quantos aptos ele tem).
+    Veículos que sobram depois de cobrir a demanda viram folga dos clusters mais justos.
+    """
+    descobertos = np.asarray(tamanhos, dtype=np.float64)
+    veiculos: List[List[int]] = [[] for _ in tamanhos]
+    for indice, capacidade in enumerate(capacidades):
+        elegiveis = [c for c in range(len(tamanhos)) if limites is None or len(veiculos[c]) < limites[c]]
+        if not elegiveis:
+            break
+        cluster = max(elegiveis, key=lambda c: (descobertos[c], -len(veiculos[c])))
+        veiculos[cluster].append(indice)
+        descobertos[cluster] -= capacidade
+    return veiculos
+
+
+def pares_vizinhos(pontos: np.ndarray, rotulos: np.ndarray, margem: float) -> List[Tuple[int, int, np.ndarray]]:
+    """
+    Pares de clusters vizinhos com os pontos da faixa entre eles, do par com mais
+    pontos para o com menos. Um ponto está na faixa quando o centróide de outro cluster
+    fica a no máximo ``1 + margem`` vezes a distância até o centróide do seu.
+    """
+    quantidade = int(rotulos.max()) + 1
+    if quantidade < 2:
+        return []
+    centroides = _centroides(pontos, rotulos, quantidade)
+    distancias = np.linalg.norm(pontos[:, None, :] - centroides[None, :, :], axis=2)
+    linhas = np.arange(len(pontos))
+    proprias = distancias[linhas, rotulos]
+    distancias[linhas, rotulos] = np.inf
+    vizinhos = np.argmin(distancias, axis=1)
+    na_faixa = distancias[linhas, vizinhos] <= (1 + margem) * proprias
+
+    por_par: Dict[Tuple[int, int], List[int]] = {}
+    for ponto in np.flatnonzero(na_faixa):
+        a, b = int(rotulos[ponto]), int(vizinhos[ponto])
+        por_par.setdefault((min(a, b), max(a, b)), []).append(int(ponto))
+    pares = [(a, b, np.asarray(pontos_par, dtype=np.intp)) for (a, b), pontos_par in por_par.items()]
+    return sorted(pares, key=lambda par: -len(par[2]))
+
+
+def rodadas_disjuntas(pares: Sequence[Tuple[int, int, np.ndarray]]) -> List[List[Tuple[int, int, np.ndarray]]]:
+    """Agrupa os pares em rodadas sem cluster repetido, que podem ser resolvidas em paralelo."""
+    rodadas: List[List[Tuple[int, int, np.ndarray]]] = []
+    ocupados: List[set[int]] = []
+    for par in pares:
+        for rodada, clusters in zip(rodadas, ocupados):
+            if par[0] not in clusters and par[1] not in clusters:
+                rodada.append(par)
+                clusters.update(par[:2])
+                break
+        else:
+            rodadas.append([par])
+            ocupados.append(set(par[:2]))
+    return rodadas
@@ -0,0 +1,180 @@
+"""
+Canonicalização de endereços brasileiros.
+
+Todos os pontos que montam endereços para geocodificação passam por
+``montar_endereco``, que fixa a ordem dos componentes, expande abreviações e
+formata o CEP. ``canonicalizar_endereco`` gera a chave do cache: além do
+mesmo tratamento, remove acentos, caixa e o sufixo do país, de modo que
+"Av. Paulista, 1000, São Paulo - SP, 01310100, Brasil" e
+"avenida paulista, 1000, sao paulo, sp, 01310-100" resultem na mesma chave.
+"""
+
+from __future__ import annotations
+
+import re
+import unicodedata
+from typing import List, Optional
+
+_CEP_REGEX = re.compile(r"^(\d{5})-?(\d{3})$")
+_NUMERO_REGEX = re.compile(r"^(?:n[º°o]?\.?|numero|num\.?)\s*(\d.*)$", re.IGNORECASE)
+_SEM_NUMERO = {"s/n", "sn", "s/nº", "s/n°", "sem numero", "sem número"}
+_PAISES = {"brasil", "brazil", "br"}
+
+# Tipos de logradouro: expandidos apenas no início de um componente.
+_TIPOS_LOGRADOURO = {
+    "av": "avenida",
+    "avd": "avenida",
+    "r": "rua",
+    "trav": "travessa",
+    "tv": "travessa",
+    "al": "alameda",
+    "pca": "praça",
+    "pc": "praça",
+    "rod": "rodovia",
+    "estr": "estrada",
+    "est": "estrada",
+    "lgo": "largo",
+    "lg": "largo",
+    "vd": "viaduto",
+    "cj": "conjunto",
+    "conj": "conjunto",
+    "jd": "jardim",
+    "vl": "vila",
+    "pq": "parque",
+    "res": "residencial",
+}
+
+# Títulos comuns em nomes de logradouro, expandidos quando seguidos de outra palavra.
+_TITULOS = {
+    "dr": "doutor",
+    "dra": "doutora",
+    "prof": "professor",
+    "profa": "professora",
+    "eng": "engenheiro",
+    "gen": "general",
+    "gal": "general",
+    "cel": "coronel",
+    "mal": "marechal",
+    "pres": "presidente",
+    "sto": "santo",
+    "sta": "santa",
+    "sen": "senador",
+    "dep": "deputado",
+    "ver": "vereador",
+}
+
+
+def remover_acentos(texto: str) -> str:
+    decomposto = unicodedata.normalize("NFKD", texto)
+    return "".join(caractere for caractere in decomposto if not unicodedata.combining(caractere))
+
+
+def formatar_cep(cep: Optional[str]) -> Optional[str]:
+    """Formata o CEP como ``00000-000``; valores sem 8 dígitos são devolvidos sem espaços."""
+    if not cep:
+        return None
+    compacto = "".join(cep.split())
+    correspondencia = _CEP_REGEX.match(compacto.replace(".", ""))
+    if correspondencia is None:
+        return compacto or None
+    return f"{correspondencia.group(1)}-{correspondencia.group(2)}"
+
+
+def _expandir_token(token: str, tabela: dict) -> Optional[str]:
+    chave = remover_acentos(token).lower().rstrip(".")
+    return tabela.get(chave)
+
+
+def _capitalizar_como(original: str, expansao: str) -> str:
+    return expansao.capitalize() if original[:1].isupper() else expansao
+
+
+def expandir_abreviacoes(componente: str) -> str:
+    """
+    Expande o tipo de logradouro no início do componente e títulos seguidos de um nome
+    (ex.: "Av. Dr. Arnaldo" → "Avenida Doutor Arnaldo").
+    """
+    tokens = componente.split()
+    if len(tokens) < 2:
+        return componente
+    expandidos: List[str] = []
+    for indice, token in enumerate(tokens):
+        expansao = _expandir_token(token, _TIPOS_LOGRADOURO) if indice == 0 else None
+        if expansao is None and indice < len(tokens) - 1:
+            expansao = _expandir_token(token, _TITULOS)
+        expandidos.append(_capitalizar_como(token, expansao) if expansao else token)
+    return " ".join(expandidos)
+
+
+def _normalizar_numero(numero: Optional[str]) -> Optional[str]:
+    if not numero:
+        return None
+    numero = " ".join(numero.split())
+    if remover_acentos(numero).lower() in _SEM_NUMERO:
+        return "S/N"
+    correspondencia = _NUMERO_REGEX.match(numero)
+    return correspondencia.group(1) if correspondencia else numero
+
+
+def montar_endereco(
+    logradouro: Optional[str] = None,
+    numero: Optional[str] = None,
+    complemento: Optional[str] = None,
+    bairro: Optional[str] = None,
+    cidade: Optional[str] = None,
+    estado: Optional[str] = None,
+    cep: Optional[str] = None,
+) -> str:
+    """
+    Monta o endereço no formato usado em toda a geocodificação:
+    ``Logradouro, Número, Complemento, Bairro, Cidade - UF, CEP, Brasil``.
+    """
+
+    def limpar(valor: Optional[str]) -> Optional[str]:
+        return " ".join(valor.split()) if valor and valor.strip() else None
+
+    cidade = limpar(cidade)
+    estado = limpar(estado)
+    partes = [
+        expandir_abreviacoes(limpar(logradouro)) if limpar(logradouro) else None,
+        _normalizar_numero(numero),
+        limpar(complemento),
+        expandir_abreviacoes(limpar(bairro)) if limpar(bairro) else None,
+        " - ".join(filter(None, [cidade, estado.upper() if estado else None])) or None,
+        formatar_cep(cep),
+    ]
+    partes = [parte for parte in partes if parte]
+    if not partes:
+        return ""
+    return ", ".join(partes + ["Brasil"])
+
+
+def canonicalizar_endereco(endereco: str) -> str:
+    """
+    Gera a chave canônica de um endereço em texto livre (usada no cache de geocodificação).
+
+    Remove acentos e caixa, trata "Cidade - UF" como dois componentes, expande
+    abreviações, formata o CEP e o move para o final, e descarta o país.
+    """
+    texto = remover_acentos(endereco or "").lower()
+    texto = re.sub(r"\s+-\s+", ", ", texto)
+    componentes: List[str] = []
+    ceps: List[str] = []
+    for bruto in texto.split(","):
+        componente = " ".join(bruto.replace(";", " ").split()).strip(" .")
+        if not componente or componente in _PAISES:
+            continue
+        if _CEP_REGEX.match(componente.replace(".", "").replace(" ", "")):
+            cep = formatar_cep(componente.replace(".", ""))
+            if cep not in ceps:
+                ceps.append(cep)
+            continue
+        numero = _normalizar_numero(componente)
+        if numero and numero != componente:
+            componente = numero.lower()
+        else:
+            componente = expandir_abreviacoes(componente)
+        componente = remover_acentos(componente).lower()
+        if componente not in componentes:
+            componentes.append(componente)
+    return ", ".join(componentes + ceps)
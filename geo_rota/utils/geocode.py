@@ -3,94 +3,398 @@ Utilidades de geocodificação e cálculo de distância usando geopy.
 
 Centralizamos as operações aqui para reutilização, cache e respeito
 ao rate-limit dos provedores públicos de geolocalização.
+
+O cache tem duas camadas: uma em memória, limitada por tamanho e validade, e a
+tabela ``cache_geocodificacao``, com data de expiração. Endereços que nenhum
+provedor encontrou também são guardados (cache negativo) com validade menor,
+evitando reenviá-los ao provedor a cada nova roteirização.
 """
 
 from __future__ import annotations
 
-from functools import lru_cache
-from typing import Iterable, Tuple
+import logging
+import threading
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Tuple
 
 from geopy.distance import geodesic
-from geopy.extra.rate_limiter import RateLimiter
-from geopy.geocoders import Nominatim
+from geopy.exc import GeocoderServiceError
 from sqlalchemy import select
 from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
 
+from geo_rota.core.config import settings
 from geo_rota.core.database import SessionLocal
 from geo_rota.models.cache import CacheGeocodificacao
+from geo_rota.models.enums import PrecisaoGeocodificacaoEnum
+from geo_rota.utils.cache import CacheTTL
+from geo_rota.utils.endereco import canonicalizar_endereco
+from geo_rota.utils.provedores_geocodificacao import ResultadoGeocodificacao, obter_cadeia
+
+# Limite de parâmetros por consulta IN (SQLite aceita no máximo 999 em versões antigas).
+_TAMANHO_LOTE_CACHE = 500
 
-# Configuramos um geocodificador compartilhado com identificador único.
-_geolocator = Nominatim(user_agent="geo_rota_backend", timeout=5)
-# Envelopamos o método de geocodificação para impor um intervalo mínimo entre chamadas.
-_rate_limited_geocode = RateLimiter(_geolocator.geocode, min_delay_seconds=1.0, swallow_exceptions=False)
+logger = logging.getLogger("geo_rota.geocodificacao")
 
 
 class GeocodeError(RuntimeError):
     """Erro genérico para sinalizar falhas na geocodificação."""
 
 
-def _normalizar_endereco(endereco: str) -> str:
-    return " ".join(endereco.strip().lower().split())
+@dataclass(frozen=True)
+class _EnderecoNaoEncontrado:
+    """Entrada de cache negativo."""
 
+    mensagem: str
 
-def _obter_cache_persistente(endereco_normalizado: str) -> Tuple[float, float] | None:
-    if not endereco_normalizado:
-        return None
-    with SessionLocal() as session:
-        registro = session.execute(
-            select(CacheGeocodificacao).where(CacheGeocodificacao.endereco_normalizado == endereco_normalizado)
-        ).scalar_one_or_none()
-        if registro:
-            return float(registro.latitude), float(registro.longitude)
-    return None
 
+@dataclass(frozen=True)
+class _EntradaPersistente:
+    valor: ResultadoGeocodificacao | _EnderecoNaoEncontrado
+    expira_em: datetime
 
-def _atualizar_cache_persistente(endereco_normalizado: str, latitude: float, longitude: float) -> None:
-    if not endereco_normalizado:
-        return
+    @property
+    def vigente(self) -> bool:
+        return self.expira_em > datetime.utcnow()
+
+
+_cache_memoria: CacheTTL[ResultadoGeocodificacao | _EnderecoNaoEncontrado] = CacheTTL(
+    settings.GEOCODE_CACHE_MEMORIA_TAMANHO,
+    settings.GEOCODE_CACHE_MEMORIA_TTL_SEGUNDOS,
+)
+_contadores = {
+    "persistente_acertos": 0,
+    "negativo_acertos": 0,
+    "provedor_consultas": 0,
+    "provedor_falhas": 0,
+    "expirados_reaproveitados": 0,
+}
+_contadores_lock = threading.Lock()
+
+
+def _contar(nome: str, quantidade: int = 1) -> None:
+    with _contadores_lock:
+        _contadores[nome] += quantidade
+
+
+def _ttl_positivo() -> timedelta:
+    return timedelta(days=settings.GEOCODE_CACHE_TTL_DIAS)
+
+
+def _ttl_negativo() -> timedelta:
+    return timedelta(hours=settings.GEOCODE_CACHE_NEGATIVO_TTL_HORAS)
+
+
+def _consultar_provedores(endereco: str) -> ResultadoGeocodificacao:
+    """
+    Resolve o endereço pela cadeia de provedores configurada.
+
+    ``GeocodeError`` indica que nenhum provedor conhece o endereço; falhas dos
+    próprios provedores chegam como ``GeocoderServiceError``.
+    """
+    resultado = obter_cadeia().geocodificar(endereco)
+    if resultado is None:
+        raise GeocodeError(f"Não foi possível geocodificar o endereço: '{endereco}'")
+    return resultado
+
+
+def _converter_registro(registro) -> _EntradaPersistente:
+    if registro.negativo:
+        valor = _EnderecoNaoEncontrado(registro.erro or "Endereço não encontrado pelos provedores.")
+    else:
+        valor = ResultadoGeocodificacao(
+            float(registro.latitude),
+            float(registro.longitude),
+            registro.precisao or PrecisaoGeocodificacaoEnum.ENDERECO,
+        )
+    expira_em = registro.expira_em
+    if expira_em is None:
+        expira_em = registro.atualizado_em + (_ttl_negativo() if registro.negativo else _ttl_positivo())
+    return _EntradaPersistente(valor, expira_em)
+
+
+def _obter_cache_persistente_em_lote(enderecos_normalizados: Iterable[str]) -> Dict[str, _EntradaPersistente]:
+    """Resolve vários endereços normalizados com uma consulta IN por lote, incluindo vencidos."""
+    chaves = sorted({chave for chave in enderecos_normalizados if chave})
+    encontrados: Dict[str, _EntradaPersistente] = {}
+    if not chaves:
+        return encontrados
     try:
         with SessionLocal() as session:
-            existente = session.execute(
-                select(CacheGeocodificacao).where(CacheGeocodificacao.endereco_normalizado == endereco_normalizado)
-            ).scalar_one_or_none()
-            if existente:
-                existente.latitude = latitude
-                existente.longitude = longitude
-            else:
-                session.add(
-                    CacheGeocodificacao(
-                        endereco_normalizado=endereco_normalizado,
-                        latitude=latitude,
-                        longitude=longitude,
-                    )
+            for inicio in range(0, len(chaves), _TAMANHO_LOTE_CACHE):
+                lote = chaves[inicio : inicio + _TAMANHO_LOTE_CACHE]
+                registros = session.execute(
+                    select(
+                        CacheGeocodificacao.endereco_normalizado,
+                        CacheGeocodificacao.latitude,
+                        CacheGeocodificacao.longitude,
+                        CacheGeocodificacao.precisao,
+                        CacheGeocodificacao.negativo,
+                        CacheGeocodificacao.erro,
+                        CacheGeocodificacao.expira_em,
+                        CacheGeocodificacao.atualizado_em,
+                    ).where(CacheGeocodificacao.endereco_normalizado.in_(lote))
                 )
+                for registro in registros:
+                    encontrados[registro.endereco_normalizado] = _converter_registro(registro)
+    except SQLAlchemyError:
+        # Sem cache persistente seguimos apenas com o provedor.
+        return {}
+    return encontrados
+
+
+def _executar_upsert_cache(session: Session, valores: List[dict]) -> None:
+    dialeto = session.get_bind().dialect.name
+    if dialeto in ("sqlite", "postgresql"):
+        if dialeto == "sqlite":
+            from sqlalchemy.dialects.sqlite import insert
+        else:
+            from sqlalchemy.dialects.postgresql import insert
+        stmt = insert(CacheGeocodificacao).values(valores)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[CacheGeocodificacao.endereco_normalizado],
+            set_={
+                "latitude": stmt.excluded.latitude,
+                "longitude": stmt.excluded.longitude,
+                "precisao": stmt.excluded.precisao,
+                "negativo": stmt.excluded.negativo,
+                "erro": stmt.excluded.erro,
+                "expira_em": stmt.excluded.expira_em,
+                "atualizado_em": stmt.excluded.atualizado_em,
+            },
+        )
+        session.execute(stmt)
+        return
+
+    # Demais bancos: uma consulta para os existentes e inserção em massa dos novos.
+    por_chave = {item["endereco_normalizado"]: item for item in valores}
+    existentes = session.execute(
+        select(CacheGeocodificacao).where(CacheGeocodificacao.endereco_normalizado.in_(list(por_chave)))
+    ).scalars()
+    for registro in existentes:
+        item = por_chave.pop(registro.endereco_normalizado)
+        for campo, valor in item.items():
+            if campo != "criado_em":
+                setattr(registro, campo, valor)
+    session.add_all(CacheGeocodificacao(**item) for item in por_chave.values())
+
+
+def _atualizar_cache_persistente_em_lote(
+    valores_por_chave: Dict[str, ResultadoGeocodificacao | _EnderecoNaoEncontrado],
+) -> None:
+    """Grava resultados e endereços não encontrados no cache persistente com um upsert em massa."""
+    agora = datetime.utcnow()
+    valores = []
+    for chave, valor in sorted(valores_por_chave.items()):
+        if not chave:
+            continue
+        if isinstance(valor, _EnderecoNaoEncontrado):
+            item = {
+                "latitude": 0.0,
+                "longitude": 0.0,
+                "precisao": None,
+                "negativo": True,
+                "erro": valor.mensagem[:255],
+                "expira_em": agora + _ttl_negativo(),
+            }
+        else:
+            item = {
+                "latitude": valor.latitude,
+                "longitude": valor.longitude,
+                "precisao": valor.precisao,
+                "negativo": False,
+                "erro": None,
+                "expira_em": agora + _ttl_positivo(),
+            }
+        item.update(endereco_normalizado=chave, criado_em=agora, atualizado_em=agora)
+        valores.append(item)
+    if not valores:
+        return
+    try:
+        with SessionLocal() as session:
+            for inicio in range(0, len(valores), _TAMANHO_LOTE_CACHE):
+                _executar_upsert_cache(session, valores[inicio : inicio + _TAMANHO_LOTE_CACHE])
             session.commit()
     except SQLAlchemyError:
         # Cache persistente é best-effort; falhas não podem impedir a roteirização.
         pass
 
 
-@lru_cache(maxsize=512)
+def _guardar_em_memoria(
+    chave: str,
+    valor: ResultadoGeocodificacao | _EnderecoNaoEncontrado,
+    expira_em: datetime,
+) -> None:
+    restante = (expira_em - datetime.utcnow()).total_seconds()
+    _cache_memoria.definir(chave, valor, ttl_segundos=restante)
+
+
+def _resolver_chaves(
+    enderecos_por_chave: Dict[str, str],
+) -> Tuple[Dict[str, ResultadoGeocodificacao], Dict[str, Exception]]:
+    """
+    Resolve endereços normalizados passando pela memória, pelo banco e, por fim, pelos provedores.
+
+    ``enderecos_por_chave`` associa cada chave normalizada ao endereço enviado ao
+    provedor. As falhas preservam o tipo da exceção para que o chamador diferencie
+    endereço inexistente (``GeocodeError``) de provedor indisponível.
+    """
+    resultados: Dict[str, ResultadoGeocodificacao] = {}
+    falhas: Dict[str, Exception] = {}
+
+    def aplicar(chave: str, valor: ResultadoGeocodificacao | _EnderecoNaoEncontrado) -> None:
+        if isinstance(valor, _EnderecoNaoEncontrado):
+            _contar("negativo_acertos")
+            falhas[chave] = GeocodeError(valor.mensagem)
+        else:
+            resultados[chave] = valor
+
+    pendentes: List[str] = []
+    for chave in enderecos_por_chave:
+        valor = _cache_memoria.obter(chave)
+        if valor is None:
+            pendentes.append(chave)
+        else:
+            aplicar(chave, valor)
+    if not pendentes:
+        return resultados, falhas
+
+    persistidos = _obter_cache_persistente_em_lote(pendentes)
+    consultar: List[str] = []
+    for chave in pendentes:
+        entrada = persistidos.get(chave)
+        if entrada is not None and entrada.vigente:
+            _contar("persistente_acertos")
+            _guardar_em_memoria(chave, entrada.valor, entrada.expira_em)
+            aplicar(chave, entrada.valor)
+        else:
+            consultar.append(chave)
+
+    novos: Dict[str, ResultadoGeocodificacao | _EnderecoNaoEncontrado] = {}
+    for chave in consultar:
+        endereco = enderecos_por_chave[chave]
+        _contar("provedor_consultas")
+        try:
+            resultados[chave] = novos[chave] = _consultar_provedores(endereco)
+        except GeocodeError as exc:
+            novos[chave] = _EnderecoNaoEncontrado(str(exc))
+            falhas[chave] = exc
+        except GeocoderServiceError as exc:
+            _contar("provedor_falhas")
+            entrada = persistidos.get(chave)
+            if entrada is not None and isinstance(entrada.valor, ResultadoGeocodificacao):
+                # Provedores fora do ar: um resultado vencido é melhor que nenhum.
+                _contar("expirados_reaproveitados")
+                logger.info("Usando coordenada expirada do cache para '%s': %s", endereco, exc)
+                resultados[chave] = entrada.valor
+            else:
+                falhas[chave] = exc
+
+    _atualizar_cache_persistente_em_lote(novos)
+    agora = datetime.utcnow()
+    for chave, valor in novos.items():
+        ttl = _ttl_negativo() if isinstance(valor, _EnderecoNaoEncontrado) else _ttl_positivo()
+        _guardar_em_memoria(chave, valor, agora + ttl)
+    return resultados, falhas
+
+
+def geocode_address_detalhado(endereco: str) -> ResultadoGeocodificacao:
+    """
+    Geocodifica um endereço e informa a precisão obtida (endereço ou centróide de CEP).
+
+    Utiliza cache persistente (BD) e em memória para acelerar chamadas repetidas.
+    """
+    chave = canonicalizar_endereco(endereco or "")
+    if not chave:
+        raise GeocodeError("Endereço vazio ou inválido para geocodificação.")
+
+    resultados, falhas = _resolver_chaves({chave: endereco})
+    if chave in falhas:
+        raise falhas[chave]
+    return resultados[chave]
+
+
 def geocode_address(endereco: str) -> Tuple[float, float]:
     """
     Converte um endereço textual (Rua, Cidade, UF, CEP, etc.) em coordenadas (lat, lon).
 
     Utiliza cache persistente (BD) e em memória para acelerar chamadas repetidas.
     """
-    if not endereco:
-        raise GeocodeError("Endereço vazio ou inválido para geocodificação.")
+    return geocode_address_detalhado(endereco).coordenadas
 
-    endereco_normalizado = _normalizar_endereco(endereco)
-    coordenadas_cache = _obter_cache_persistente(endereco_normalizado)
-    if coordenadas_cache:
-        return coordenadas_cache
 
-    location = _rate_limited_geocode(endereco)
-    if location is None:
-        raise GeocodeError(f"Não foi possível geocodificar o endereço: '{endereco}'")
-    latitude, longitude = float(location.latitude), float(location.longitude)
-    _atualizar_cache_persistente(endereco_normalizado, latitude, longitude)
-    return latitude, longitude
+def geocode_addresses(
+    enderecos: Iterable[str],
+) -> Tuple[Dict[str, ResultadoGeocodificacao], Dict[str, str]]:
+    """
+    Geocodifica vários endereços de uma vez.
+
+    Todos os endereços são normalizados antecipadamente e os acertos de cache são
+    resolvidos com consultas IN em lote; apenas as falhas reais seguem para o
+    provedor externo, e os novos resultados são gravados em um único upsert.
+
+    Retorna um par ``(resultados, falhas)`` indexado pelo endereço original.
+    """
+    originais_por_chave: Dict[str, List[str]] = {}
+    falhas: Dict[str, str] = {}
+    for endereco in enderecos:
+        chave = canonicalizar_endereco(endereco or "")
+        if not chave:
+            falhas[endereco] = "Endereço vazio ou inválido para geocodificação."
+            continue
+        originais_por_chave.setdefault(chave, []).append(endereco)
+
+    resolvidos, falhas_por_chave = _resolver_chaves(
+        {chave: originais[0] for chave, originais in originais_por_chave.items()}
+    )
+
+    resultados: Dict[str, ResultadoGeocodificacao] = {}
+    for chave, originais in originais_por_chave.items():
+        for original in originais:
+            if chave in resolvidos:
+                resultados[original] = resolvidos[chave]
+            else:
+                falhas[original] = str(falhas_por_chave.get(chave, "Endereço não resolvido."))
+    return resultados, falhas
+
+
+def enderecos_em_cache(enderecos: Iterable[str]) -> set[str]:
+    """Retorna os endereços que já têm entrada vigente (positiva ou negativa) no cache persistente."""
+    por_chave: Dict[str, List[str]] = {}
+    for endereco in enderecos:
+        chave = canonicalizar_endereco(endereco or "")
+        if chave:
+            por_chave.setdefault(chave, []).append(endereco)
+    vigentes = {chave for chave, entrada in _obter_cache_persistente_em_lote(por_chave).items() if entrada.vigente}
+    return {endereco for chave in vigentes for endereco in por_chave[chave]}
+
+
+def gravar_registros_cache_geocodificacao(session: Session, valores: List[dict]) -> None:
+    """
+    Grava registros completos de ``cache_geocodificacao`` (ex.: vindos de um snapshot) com upsert.
+
+    Cada dicionário precisa de todas as colunas exceto ``id``; o chamador confirma a transação.
+    """
+    for inicio in range(0, len(valores), _TAMANHO_LOTE_CACHE):
+        _executar_upsert_cache(session, valores[inicio : inicio + _TAMANHO_LOTE_CACHE])
+
+
+def obter_estatisticas_cache_geocodificacao() -> Dict[str, int]:
+    """Contadores de acerto/falta das camadas de cache desde o início do processo."""
+    memoria = _cache_memoria.estatisticas()
+    with _contadores_lock:
+        estatisticas = dict(_contadores)
+    estatisticas.update(
+        memoria_tamanho=memoria["tamanho"],
+        memoria_acertos=memoria["acertos"],
+        memoria_faltas=memoria["faltas"],
+    )
+    return estatisticas
+
+
+def limpar_cache_memoria_geocodificacao() -> None:
+    _cache_memoria.limpar()
 
 
 def distance_km(coord_a: Iterable[float], coord_b: Iterable[float]) -> float:
@@ -0,0 +1,199 @@
+"""
+Limitador de taxa (token bucket) compartilhado entre processos.
+
+O balde é mantido no formato GCRA: em vez de contar fichas, guarda-se apenas o
+instante teórico em que a próxima ficha fica livre. Cada chamada reserva, de
+forma atômica, a próxima vaga da fila e depois dorme exatamente até ela. Como a
+reserva acontece na ordem de chegada, quem espera é atendido em ordem (FIFO),
+sem disputar o recurso em laço de ``sleep`` e nova tentativa.
+
+O estado vive num backend plugável:
+
+* ``memoria``: apenas o processo atual (threads);
+* ``arquivo``: arquivo JSON protegido por ``flock``, compartilhado por todos os
+  workers do mesmo host;
+* ``sqlite``: tabela num banco SQLite local, para quando ``flock`` não estiver
+  disponível (ex.: Windows) ou o diretório for compartilhado.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from abc import ABC, abstractmethod
+from typing import Callable, Dict, Optional
+
+try:  # pragma: no cover - depende da plataforma
+    import fcntl
+except ImportError:  # pragma: no cover - Windows
+    fcntl = None
+
+from geo_rota.core.config import settings
+
+# Reservas mais distantes do que isso indicam relógio ajustado para trás; são descartadas.
+_LIMITE_RESERVA_SEGUNDOS = 3600.0
+
+Atualizacao = Callable[[Optional[float]], float]
+
+
+class BackendLimiteTaxa(ABC):
+    """
+    Armazena o próximo instante livre de cada chave.
+
+    ``reservar`` deve ler o valor atual, aplicar ``atualizar`` e gravar o resultado
+    numa única operação atômica em relação aos demais usuários do backend.
+    """
+
+    @abstractmethod
+    def reservar(self, chave: str, atualizar: Atualizacao) -> float:
+        ...
+
+
+class BackendMemoria(BackendLimiteTaxa):
+    def __init__(self) -> None:
+        self._estado: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def reservar(self, chave: str, atualizar: Atualizacao) -> float:
+        with self._lock:
+            valor = atualizar(self._estado.get(chave))
+            self._estado[chave] = valor
+            return valor
+
+
+class BackendArquivo(BackendLimiteTaxa):
+    """Estado num arquivo JSON; ``flock`` serializa processos e o lock interno, as threads."""
+
+    def __init__(self, caminho: str) -> None:
+        if fcntl is None:
+            raise RuntimeError("Backend 'arquivo' requer fcntl; use o backend 'sqlite' nesta plataforma.")
+        self.caminho = caminho
+        self._lock = threading.Lock()
+
+    def reservar(self, chave: str, atualizar: Atualizacao) -> float:
+        with self._lock, open(self.caminho, "a+", encoding="utf-8") as arquivo:
+            fcntl.flock(arquivo.fileno(), fcntl.LOCK_EX)
+            try:
+                arquivo.seek(0)
+                try:
+                    estado = json.loads(arquivo.read() or "{}")
+                except json.JSONDecodeError:
+                    estado = {}
+                valor = atualizar(estado.get(chave))
+                estado[chave] = valor
+                arquivo.seek(0)
+                arquivo.truncate()
+                arquivo.write(json.dumps(estado))
+                arquivo.flush()
+                return valor
+            finally:
+                fcntl.flock(arquivo.fileno(), fcntl.LOCK_UN)
+
+
+class BackendSQLite(BackendLimiteTaxa):
+    """Estado numa tabela SQLite; ``BEGIN IMMEDIATE`` garante a exclusão mútua."""
+
+    def __init__(self, caminho: str) -> None:
+        self.caminho = caminho
+        with self._conectar() as conexao:
+            conexao.execute("CREATE TABLE IF NOT EXISTS limite_taxa (chave TEXT PRIMARY KEY, proximo_livre REAL NOT NULL)")
+
+    def _conectar(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.caminho, timeout=30.0, isolation_level=None)
+
+    def reservar(self, chave: str, atualizar: Atualizacao) -> float:
+        conexao = self._conectar()
+        try:
+            conexao.execute("BEGIN IMMEDIATE")
+            linha = conexao.execute("SELECT proximo_livre FROM limite_taxa WHERE chave = ?", (chave,)).fetchone()
+            valor = atualizar(linha[0] if linha else None)
+            conexao.execute(
+                "INSERT INTO limite_taxa (chave, proximo_livre) VALUES (?, ?) "
+                "ON CONFLICT(chave) DO UPDATE SET proximo_livre = excluded.proximo_livre",
+                (chave, valor),
+            )
+            conexao.execute("COMMIT")
+            return valor
+        except BaseException:
+            if conexao.in_transaction:
+                conexao.execute("ROLLBACK")
+            raise
+        finally:
+            conexao.close()
+
+
+class LimitadorTaxa:
+    """
+    Libera no máximo ``capacidade`` chamadas de uma vez e, em regime, uma a cada
+    ``intervalo`` segundos para a ``chave`` informada.
+    """
+
+    def __init__(self, chave: str, intervalo: float, backend: BackendLimiteTaxa, capacidade: int = 1) -> None:
+        self.chave = chave
+        self.intervalo = max(intervalo, 0.0)
+        self.capacidade = max(capacidade, 1)
+        self.backend = backend
+
+    def _reservar(self) -> float:
+        """Reserva a próxima vaga e retorna o instante (``time.time``) em que ela fica livre."""
+        tolerancia = self.intervalo * (self.capacidade - 1)
+        liberacao = 0.0
+
+        def atualizar(proximo_livre: Optional[float]) -> float:
+            nonlocal liberacao
+            agora = time.time()
+            if proximo_livre is None or proximo_livre > agora + tolerancia + _LIMITE_RESERVA_SEGUNDOS:
+                proximo_livre = agora
+            teorico = max(proximo_livre, agora)
+            liberacao = teorico - tolerancia
+            return teorico + self.intervalo
+
+        self.backend.reservar(self.chave, atualizar)
+        return liberacao
+
+    def adquirir(self) -> float:
+        """Bloqueia até a vaga reservada e retorna quanto tempo esperou, em segundos."""
+        if self.intervalo <= 0:
+            return 0.0
+        espera = self._reservar() - time.time()
+        if espera > 0:
+            time.sleep(espera)
+            return espera
+        return 0.0
+
+
+def montar_backend_padrao() -> BackendLimiteTaxa:
+    """Backend configurado em ``GEOCODE_LIMITE_TAXA_BACKEND``."""
+    tipo = settings.GEOCODE_LIMITE_TAXA_BACKEND
+    if tipo == "memoria":
+        return BackendMemoria()
+    diretorio = tempfile.gettempdir()
+    if tipo == "arquivo":
+        return BackendArquivo(settings.GEOCODE_LIMITE_TAXA_CAMINHO or os.path.join(diretorio, "geo_rota_limite_taxa.json"))
+    if tipo == "sqlite":
+        return BackendSQLite(settings.GEOCODE_LIMITE_TAXA_CAMINHO or os.path.join(diretorio, "geo_rota_limite_taxa.db"))
+    raise ValueError(f"Backend de limite de taxa desconhecido: '{tipo}'")
+
+
+_backend: Optional[BackendLimiteTaxa] = None
+_backend_lock = threading.Lock()
+
+
+def obter_backend() -> BackendLimiteTaxa:
+    global _backend
+    if _backend is None:
+        with _backend_lock:
+            if _backend is None:
+                _backend = montar_backend_padrao()
+    return _backend
+
+
+def configurar_backend(backend: Optional[BackendLimiteTaxa]) -> None:
+    """Substitui o backend compartilhado; ``None`` volta ao configurado."""
+    global _backend
+    with _backend_lock:
+        _backend = backend
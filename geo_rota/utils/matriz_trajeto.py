@@ -0,0 +1,225 @@
+"""
+Matrizes de distância e duração com cache persistente por par de pontos.
+
+Cada coordenada é reduzida a uma célula (latitude/longitude arredondadas em
+``OSRM_CACHE_PRECISAO_DECIMAIS`` casas) e cada par origem→destino de células fica
+na tabela ``cache_trajetos`` até ``OSRM_CACHE_TTL_DIAS``. Ao montar uma matriz,
+apenas os pares ausentes ou vencidos vão ao OSRM: um grupo que ganhou um
+funcionário novo custa uma linha e uma coluna de consulta, não a matriz inteira.
+"""
+
+from __future__ import annotations
+
+import logging
+from datetime import datetime, timedelta
+from typing import Dict, List, Sequence, Tuple
+
+import numpy as np
+from sqlalchemy import select
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+
+from geo_rota.core.config import settings
+from geo_rota.core.database import SessionLocal
+from geo_rota.models.cache import CacheTrajeto
+from geo_rota.utils.osrm import VALOR_INALCANCAVEL, Matrizes, montar_matrizes_osrm
+
+_TAMANHO_LOTE_CACHE = 400
+
+logger = logging.getLogger("geo_rota.roteirizacao")
+
+Par = Tuple[str, str]
+
+
+def celula(coordenada: Tuple[float, float]) -> str:
+    casas = settings.OSRM_CACHE_PRECISAO_DECIMAIS
+    latitude, longitude = coordenada
+    return f"{latitude:.{casas}f},{longitude:.{casas}f}"
+
+
+def _carregar_pares(celulas: Sequence[str]) -> Dict[Par, Tuple[int, int]]:
+    """Pares vigentes do cache entre as ``celulas`` informadas."""
+    encontrados: Dict[Par, Tuple[int, int]] = {}
+    agora = datetime.utcnow()
+    try:
+        with SessionLocal() as session:
+            for inicio in range(0, len(celulas), _TAMANHO_LOTE_CACHE):
+                origens = celulas[inicio : inicio + _TAMANHO_LOTE_CACHE]
+                for inicio_destino in range(0, len(celulas), _TAMANHO_LOTE_CACHE):
+                    destinos = celulas[inicio_destino : inicio_destino + _TAMANHO_LOTE_CACHE]
+                    registros = session.execute(
+                        select(
+                            CacheTrajeto.origem,
+                            CacheTrajeto.destino,
+                            CacheTrajeto.distancia_m,
+                            CacheTrajeto.duracao_s,
+                        ).where(
+                            CacheTrajeto.perfil == settings.OSRM_PROFILE,
+                            CacheTrajeto.origem.in_(origens),
+                            CacheTrajeto.destino.in_(destinos),
+                            CacheTrajeto.expira_em > agora,
+                        )
+                    )
+                    for registro in registros:
+                        encontrados[(registro.origem, registro.destino)] = (registro.distancia_m, registro.duracao_s)
+    except SQLAlchemyError:
+        # Sem cache persistente a matriz sai inteira do OSRM.
+        return {}
+    return encontrados
+
+
+def _executar_upsert(session: Session, valores: List[dict]) -> None:
+    dialeto = session.get_bind().dialect.name
+    if dialeto in ("sqlite", "postgresql"):
+        if dialeto == "sqlite":
+            from sqlalchemy.dialects.sqlite import insert
+        else:
+            from sqlalchemy.dialects.postgresql import insert
+        stmt = insert(CacheTrajeto).values(valores)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[CacheTrajeto.perfil, CacheTrajeto.origem, CacheTrajeto.destino],
+            set_={
+                "distancia_m": stmt.excluded.distancia_m,
+                "duracao_s": stmt.excluded.duracao_s,
+                "expira_em": stmt.excluded.expira_em,
+                "atualizado_em": stmt.excluded.atualizado_em,
+            },
+        )
+        session.execute(stmt)
+        return
+
+    # Demais bancos: atualiza os existentes e insere os novos.
+    por_par = {(item["origem"], item["destino"]): item for item in valores}
+    existentes = session.execute(
+        select(CacheTrajeto).where(
+            CacheTrajeto.perfil == settings.OSRM_PROFILE,
+            CacheTrajeto.origem.in_({origem for origem, _ in por_par}),
+            CacheTrajeto.destino.in_({destino for _, destino in por_par}),
+        )
+    ).scalars()
+    for registro in existentes:
+        item = por_par.pop((registro.origem, registro.destino), None)
+        if item is not None:
+            for campo, valor in item.items():
+                setattr(registro, campo, valor)
+    session.add_all(CacheTrajeto(**item) for item in por_par.values())
+
+
+def _gravar_pares(
+    celulas: Sequence[str],
+    consultados: np.ndarray,
+    distancias: np.ndarray,
+    duracoes: np.ndarray,
+) -> None:
+    """Grava no cache os pares marcados em ``consultados``, exceto os sem rota."""
+    # Pares sem rota podem ser falha momentânea; não ficam no cache.
+    gravar = consultados & (distancias < VALOR_INALCANCAVEL) & (duracoes < VALOR_INALCANCAVEL)
+    origens, destinos = np.nonzero(gravar)
+    if len(origens) == 0:
+        return
+    agora = datetime.utcnow()
+    expira_em = agora + timedelta(days=settings.OSRM_CACHE_TTL_DIAS)
+    valores = [
+        {
+            "perfil": settings.OSRM_PROFILE,
+            "origem": celulas[origem],
+            "destino": celulas[destino],
+            "distancia_m": distancia,
+            "duracao_s": duracao,
+            "expira_em": expira_em,
+            "atualizado_em": agora,
+        }
+        for origem, destino, distancia, duracao in zip(
+            origens.tolist(),
+            destinos.tolist(),
+            distancias[origens, destinos].tolist(),
+            duracoes[origens, destinos].tolist(),
+        )
+    ]
+    try:
+        with SessionLocal() as session:
+            for inicio in range(0, len(valores), _TAMANHO_LOTE_CACHE):
+                _executar_upsert(session, valores[inicio : inicio + _TAMANHO_LOTE_CACHE])
+            session.commit()
+    except SQLAlchemyError as exc:
+        logger.warning("Não foi possível gravar %s pares no cache de trajetos: %s", len(valores), exc)
+
+
+def _planejar_consultas(faltantes: np.ndarray) -> List[Tuple[List[int], List[int]]]:
+    """
+    Agrupa os pares faltantes (matriz booleana) em consultas fontes x destinos.
+
+    Pontos sem cache na maior parte dos pares (ex.: funcionário novo) viram uma
+    linha e uma coluna inteiras; o que sobrar entre os demais pontos vai numa
+    consulta com apenas as linhas e colunas que ainda têm lacunas.
+    """
+    quantidade = faltantes.shape[0]
+    faltas_por_ponto = faltantes.sum(axis=1) + faltantes.sum(axis=0)
+    eh_novo = faltas_por_ponto > quantidade - 1
+    novos = np.flatnonzero(eh_novo).tolist()
+    antigos = np.flatnonzero(~eh_novo).tolist()
+
+    consultas: List[Tuple[List[int], List[int]]] = []
+    if novos:
+        consultas.append((novos, list(range(quantidade))))
+        if antigos:
+            consultas.append((antigos, novos))
+
+    restantes = faltantes & ~eh_novo[:, None] & ~eh_novo[None, :]
+    if restantes.any():
+        consultas.append((np.flatnonzero(restantes.any(axis=1)).tolist(), np.flatnonzero(restantes.any(axis=0)).tolist()))
+    return consultas
+
+
+def montar_matrizes_trajeto(coords: Sequence[Tuple[float, float]]) -> Matrizes:
+    """
+    Matrizes int32 de distância (metros) e duração (segundos) entre ``coords``,
+    com os pares já conhecidos vindos do cache e os demais do OSRM.
+
+    Levanta ``OSRMServiceError`` quando o OSRM é necessário e está indisponível.
+    """
+    celulas_por_ponto = [celula(coordenada) for coordenada in coords]
+    # Cada célula é consultada com a coordenada original do primeiro ponto que caiu nela.
+    representantes_por_celula: Dict[str, Tuple[float, float]] = {}
+    for valor, coordenada in zip(celulas_por_ponto, coords):
+        representantes_por_celula.setdefault(valor, coordenada)
+    celulas = list(representantes_por_celula)
+    indice_celula = {valor: indice for indice, valor in enumerate(celulas)}
+    quantidade = len(celulas)
+
+    distancias = np.zeros((quantidade, quantidade), dtype=np.int32)
+    duracoes = np.zeros((quantidade, quantidade), dtype=np.int32)
+    faltantes = ~np.eye(quantidade, dtype=bool)
+
+    conhecidos = _carregar_pares(celulas) if quantidade > 1 else {}
+    if conhecidos:
+        origens = [indice_celula[origem] for origem, _ in conhecidos]
+        destinos = [indice_celula[destino] for _, destino in conhecidos]
+        valores = np.array(list(conhecidos.values()), dtype=np.int32)
+        distancias[origens, destinos] = valores[:, 0]
+        duracoes[origens, destinos] = valores[:, 1]
+        faltantes[origens, destinos] = False
+
+    if faltantes.any():
+        representantes = list(representantes_por_celula.values())
+        consultados = np.zeros_like(faltantes)
+        for fontes, destinos in _planejar_consultas(faltantes):
+            bloco = np.ix_(fontes, destinos)
+            distancias[bloco], duracoes[bloco] = montar_matrizes_osrm(representantes, fontes=fontes, destinos=destinos)
+            consultados[bloco] = True
+        np.fill_diagonal(distancias, 0)
+        np.fill_diagonal(duracoes, 0)
+        np.fill_diagonal(consultados, False)
+        _gravar_pares(celulas, consultados, distancias, duracoes)
+        logger.debug(
+            "Matriz de %s pontos: %s pares do cache, %s consultados no OSRM.",
+            len(coords),
+            len(conhecidos),
+            int(consultados.sum()),
+        )
+
+    if quantidade == len(coords):
+        return distancias, duracoes
+    indices = np.fromiter((indice_celula[valor] for valor in celulas_por_ponto), dtype=np.intp, count=len(coords))
+    bloco = np.ix_(indices, indices)
+    return np.ascontiguousarray(distancias[bloco]), np.ascontiguousarray(duracoes[bloco])
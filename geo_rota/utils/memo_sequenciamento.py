@@ -0,0 +1,158 @@
+"""
+Memória das ordens de embarque já resolvidas.
+
+A chave é uma impressão digital independente da ordem das paradas: a célula do
+ponto de partida, a do destino e as células das paradas ordenadas (mesmas
+células de ``matriz_trajeto.celula``). A ordem fica guardada como lista de
+células e é traduzida de volta para os índices de quem consulta, então a mesma
+rota com os passageiros listados em outra ordem também é um acerto.
+
+A primeira camada é um LRU em memória; com
+``ROTEIRIZACAO_MEMO_SEQUENCIAMENTO_PERSISTENTE`` as ordens também vão para a
+tabela ``cache_sequenciamentos`` e sobrevivem a reinícios e a outros workers.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.exc import SQLAlchemyError
+
+from geo_rota.core.config import settings
+from geo_rota.core.database import SessionLocal
+from geo_rota.models.cache import CacheSequenciamento
+from geo_rota.utils.cache import CacheTTL
+from geo_rota.utils.matriz_trajeto import celula
+
+logger = logging.getLogger("geo_rota.roteirizacao")
+
+_memoria: CacheTTL[Tuple[str, ...]] = CacheTTL(
+    settings.ROTEIRIZACAO_MEMO_SEQUENCIAMENTO_TAMANHO,
+    settings.ROTEIRIZACAO_MEMO_SEQUENCIAMENTO_TTL_DIAS * 86400,
+)
+
+
+def impressao_digital(
+    coords: Sequence[Tuple[float, float]],
+    indice_destino: int,
+) -> Tuple[str, List[str]]:
+    """Chave da rota (partida no índice 0) e a célula de cada ponto de ``coords``."""
+    celulas = [celula(coordenada) for coordenada in coords]
+    paradas = sorted(valor for indice, valor in enumerate(celulas) if indice not in (0, indice_destino))
+    bruto = json.dumps([celulas[0], celulas[indice_destino], paradas], separators=(",", ":"))
+    return hashlib.sha256(bruto.encode("utf-8")).hexdigest(), celulas
+
+
+def _traduzir(ordem_celulas: Sequence[str], celulas: Sequence[str], indice_destino: int) -> Optional[List[int]]:
+    """Converte a ordem em células para os índices de ``celulas``; None se não bater."""
+    indices_por_celula: Dict[str, List[int]] = defaultdict(list)
+    for indice, valor in enumerate(celulas):
+        if indice not in (0, indice_destino):
+            indices_por_celula[valor].append(indice)
+    ordem: List[int] = []
+    for valor in ordem_celulas:
+        disponiveis = indices_por_celula.get(valor)
+        if not disponiveis:
+            return None
+        ordem.append(disponiveis.pop())
+    if any(indices_por_celula.values()):
+        return None
+    return ordem
+
+
+def _carregar_persistente(chave: str) -> Optional[Tuple[str, ...]]:
+    try:
+        with SessionLocal() as session:
+            ordem = session.execute(
+                select(CacheSequenciamento.ordem).where(
+                    CacheSequenciamento.chave == chave,
+                    CacheSequenciamento.expira_em > datetime.utcnow(),
+                )
+            ).scalar_one_or_none()
+    except SQLAlchemyError:
+        return None
+    if ordem is None:
+        return None
+    try:
+        return tuple(json.loads(ordem))
+    except (json.JSONDecodeError, TypeError):
+        return None
+
+
+def _gravar_persistente(chave: str, ordem_celulas: Tuple[str, ...]) -> None:
+    agora = datetime.utcnow()
+    valores = {
+        "chave": chave,
+        "ordem": json.dumps(list(ordem_celulas), separators=(",", ":")),
+        "expira_em": agora + timedelta(days=settings.ROTEIRIZACAO_MEMO_SEQUENCIAMENTO_TTL_DIAS),
+        "atualizado_em": agora,
+    }
+    try:
+        with SessionLocal() as session:
+            dialeto = session.get_bind().dialect.name
+            if dialeto in ("sqlite", "postgresql"):
+                if dialeto == "sqlite":
+                    from sqlalchemy.dialects.sqlite import insert
+                else:
+                    from sqlalchemy.dialects.postgresql import insert
+                stmt = insert(CacheSequenciamento).values(valores)
+                stmt = stmt.on_conflict_do_update(
+                    index_elements=[CacheSequenciamento.chave],
+                    set_={
+                        "ordem": stmt.excluded.ordem,
+                        "expira_em": stmt.excluded.expira_em,
+                        "atualizado_em": stmt.excluded.atualizado_em,
+                    },
+                )
+                session.execute(stmt)
+            else:
+                registro = session.execute(
+                    select(CacheSequenciamento).where(CacheSequenciamento.chave == chave)
+                ).scalar_one_or_none()
+                if registro is None:
+                    session.add(CacheSequenciamento(**valores))
+                else:
+                    for campo, valor in valores.items():
+                        setattr(registro, campo, valor)
+            session.commit()
+    except SQLAlchemyError as exc:
+        logger.warning("Não foi possível gravar a ordem de embarque no cache: %s", exc)
+
+
+def obter_ordem(coords: Sequence[Tuple[float, float]], indice_destino: int) -> Optional[List[int]]:
+    """Ordem dos índices intermediários de ``coords`` já resolvida antes, se houver."""
+    chave, celulas = impressao_digital(coords, indice_destino)
+    ordem_celulas = _memoria.obter(chave)
+    if ordem_celulas is None and settings.ROTEIRIZACAO_MEMO_SEQUENCIAMENTO_PERSISTENTE:
+        ordem_celulas = _carregar_persistente(chave)
+        if ordem_celulas is not None:
+            _memoria.definir(chave, ordem_celulas)
+    if ordem_celulas is None:
+        return None
+    return _traduzir(ordem_celulas, celulas, indice_destino)
+
+
+def memorizar_ordem(
+    coords: Sequence[Tuple[float, float]],
+    indice_destino: int,
+    ordem: Sequence[int],
+) -> None:
+    chave, celulas = impressao_digital(coords, indice_destino)
+    ordem_celulas = tuple(celulas[indice] for indice in ordem)
+    _memoria.definir(chave, ordem_celulas)
+    if settings.ROTEIRIZACAO_MEMO_SEQUENCIAMENTO_PERSISTENTE:
+        _gravar_persistente(chave, ordem_celulas)
+
+
+def limpar_memoria() -> None:
+    _memoria.limpar()
+
+
+def estatisticas() -> Dict[str, int]:
+    return _memoria.estatisticas()
@@ -0,0 +1,306 @@
+"""
+Registro de custos e demandas nos modelos do OR-tools.
+
+Por padrão as matrizes e vetores já materializados são entregues ao OR-tools
+(``RegisterTransitMatrix``/``RegisterUnaryTransitVector``), que os consulta em
+C++ durante a busca local. Com ``ROTEIRIZACAO_ORTOOLS_CALLBACKS_PYTHON`` (ou
+``callbacks_python=True``) volta-se às funções Python, que custam uma ida ao
+interpretador, com o GIL, a cada arco avaliado; ``scripts/benchmark_ortools.py``
+compara os dois modos.
+
+O tempo de busca também sai daqui: ``calcular_orcamento`` cresce com o número de
+nós até o teto da qualidade pedida, e ``resolver_com_orcamento`` encerra a busca
+antes do limite quando o custo deixa de melhorar por ``estagnacao_s`` segundos.
+``resolver_com_orcamento`` também aceita rotas iniciais (partida a quente).
+
+``resolver_vrp`` monta e resolve o VRP inteiro a partir de uma matriz simples
+(destino no nó 0), sem objetos do banco, para poder rodar em outro processo.
+"""
+
+from __future__ import annotations
+
+import logging
+import time
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+from ortools.constraint_solver import pywrapcp, routing_enums_pb2
+
+from geo_rota.core.config import settings
+from geo_rota.models.enums import QualidadeRoteirizacaoEnum
+from geo_rota.utils.osrm import VALOR_INALCANCAVEL
+
+logger = logging.getLogger("geo_rota.roteirizacao")
+
+PENALIDADE_NAO_ATENDIDO = 10_000_000
+
+
+@dataclass(frozen=True)
+class PoliticaTempo:
+    base_s: float
+    por_no_s: float
+    maximo_s: float
+    estagnacao_s: float
+
+
+@dataclass(frozen=True)
+class OrcamentoTempo:
+    limite_s: float
+    estagnacao_s: float
+
+
+POLITICAS_TEMPO: Dict[QualidadeRoteirizacaoEnum, PoliticaTempo] = {
+    QualidadeRoteirizacaoEnum.PREVIA: PoliticaTempo(base_s=0.2, por_no_s=0.002, maximo_s=2.0, estagnacao_s=0.3),
+    QualidadeRoteirizacaoEnum.EQUILIBRADA: PoliticaTempo(base_s=0.5, por_no_s=0.01, maximo_s=20.0, estagnacao_s=1.5),
+    QualidadeRoteirizacaoEnum.COMPLETA: PoliticaTempo(base_s=2.0, por_no_s=0.05, maximo_s=120.0, estagnacao_s=8.0),
+}
+
+
+def _usar_callbacks(callbacks_python: Optional[bool]) -> bool:
+    return settings.ROTEIRIZACAO_ORTOOLS_CALLBACKS_PYTHON if callbacks_python is None else callbacks_python
+
+
+def registrar_matriz_transito(
+    routing: pywrapcp.RoutingModel,
+    manager: pywrapcp.RoutingIndexManager,
+    matriz: np.ndarray,
+    callbacks_python: Optional[bool] = None,
+) -> int:
+    """Registra ``matriz`` (indexada por nó) como trânsito e devolve o índice do registro."""
+    valores = np.asarray(matriz, dtype=np.int64)
+    if not _usar_callbacks(callbacks_python):
+        return routing.RegisterTransitMatrix(valores.tolist())
+
+    def transito_callback(from_index: int, to_index: int) -> int:
+        return int(valores[manager.IndexToNode(from_index), manager.IndexToNode(to_index)])
+
+    return routing.RegisterTransitCallback(transito_callback)
+
+
+def registrar_vetor_demanda(
+    routing: pywrapcp.RoutingModel,
+    manager: pywrapcp.RoutingIndexManager,
+    demandas: Sequence[int],
+    callbacks_python: Optional[bool] = None,
+) -> int:
+    """Registra a demanda de cada nó e devolve o índice do registro."""
+    valores = [int(valor) for valor in demandas]
+    if not _usar_callbacks(callbacks_python):
+        return routing.RegisterUnaryTransitVector(valores)
+
+    def demanda_callback(from_index: int) -> int:
+        return valores[manager.IndexToNode(from_index)]
+
+    return routing.RegisterUnaryTransitCallback(demanda_callback)
+
+
+def calcular_orcamento(
+    nos: int,
+    qualidade: QualidadeRoteirizacaoEnum = QualidadeRoteirizacaoEnum.EQUILIBRADA,
+    tempo_maximo_s: Optional[float] = None,
+) -> OrcamentoTempo:
+    """
+    Limite de tempo proporcional ao tamanho da instância.
+
+    ``tempo_maximo_s`` substitui o teto da qualidade: pode encurtar a busca ou, de
+    propósito, dar mais tempo a uma instância grande.
+    """
+    politica = POLITICAS_TEMPO[qualidade]
+    teto = tempo_maximo_s if tempo_maximo_s is not None else politica.maximo_s
+    limite = min(politica.base_s + politica.por_no_s * nos, teto)
+    return OrcamentoTempo(limite_s=limite, estagnacao_s=min(politica.estagnacao_s, limite))
+
+
+class _MonitorEstagnacao:
+    """Encerra a busca quando o custo não melhora por ``estagnacao_s`` segundos."""
+
+    def __init__(self, routing: pywrapcp.RoutingModel, estagnacao_s: float):
+        self.routing = routing
+        self.estagnacao_s = estagnacao_s
+        self.melhor_custo: Optional[int] = None
+        self.ultima_melhora = time.monotonic()
+
+    def __call__(self) -> None:
+        custo = self.routing.CostVar().Max()
+        agora = time.monotonic()
+        if self.melhor_custo is None or custo < self.melhor_custo:
+            self.melhor_custo = custo
+            self.ultima_melhora = agora
+        elif agora - self.ultima_melhora >= self.estagnacao_s:
+            self.routing.solver().FinishCurrentSearch()
+
+
+def resolver_com_orcamento(
+    routing: pywrapcp.RoutingModel,
+    parametros,
+    orcamento: OrcamentoTempo,
+    manager: Optional[pywrapcp.RoutingIndexManager] = None,
+    rotas_iniciais: Optional[Sequence[Sequence[int]]] = None,
+):
+    """
+    ``SolveWithParameters`` com o limite e a parada por estagnação do ``orcamento``.
+
+    ``rotas_iniciais`` (nós visitados por veículo, sem início e fim; exige ``manager``)
+    semeiam a busca no lugar da estratégia inicial. Se não formarem uma solução válida
+    para o modelo, a busca parte do zero.
+    """
+    parametros.time_limit.FromMilliseconds(max(int(orcamento.limite_s * 1000), 1))
+    monitor = _MonitorEstagnacao(routing, orcamento.estagnacao_s)
+    routing.AddAtSolutionCallback(monitor)
+    if rotas_iniciais and manager is not None:
+        routing.CloseModelWithParameters(parametros)
+        indices: List[List[int]] = [[manager.NodeToIndex(no) for no in rota] for rota in rotas_iniciais]
+        inicial = routing.ReadAssignmentFromRoutes(indices, True)
+        if inicial is not None:
+            return routing.SolveFromAssignmentWithParameters(inicial, parametros)
+        logger.info("Rotas iniciais incompatíveis com o modelo; resolvendo sem partida a quente.")
+    return routing.SolveWithParameters(parametros)
+
+
+def completar_rotas_iniciais(
+    rotas: Sequence[Sequence[int]],
+    faltantes: Sequence[int],
+    matriz: np.ndarray,
+    inicios: Sequence[int],
+    fins: Sequence[int],
+    capacidades: Sequence[int],
+    custo_proibido: int,
+) -> List[List[int]]:
+    """
+    Insere cada nó de ``faltantes`` na posição mais barata das ``rotas`` (uma por veículo,
+    sem início e fim) que ainda tenha capacidade. Nós sem posição abaixo de
+    ``custo_proibido`` ficam de fora e começam a busca como não atendidos.
+    """
+    valores = np.asarray(matriz, dtype=np.int64)
+    completas = [list(rota) for rota in rotas]
+    for no in faltantes:
+        melhor: Optional[tuple[int, int, int]] = None  # (acréscimo, veículo, posição)
+        for veiculo, rota in enumerate(completas):
+            if len(rota) >= capacidades[veiculo]:
+                continue
+            caminho = np.asarray([inicios[veiculo], *rota, fins[veiculo]], dtype=np.intp)
+            acrescimo = valores[caminho[:-1], no] + valores[no, caminho[1:]] - valores[caminho[:-1], caminho[1:]]
+            posicao = int(np.argmin(acrescimo))
+            if melhor is None or acrescimo[posicao] < melhor[0]:
+                melhor = (int(acrescimo[posicao]), veiculo, posicao)
+        if melhor is not None and melhor[0] < custo_proibido:
+            completas[melhor[1]].insert(melhor[2], no)
+    return completas
+
+
+def _parametros_busca(estrategia_inicial: int):
+    parametros = pywrapcp.DefaultRoutingSearchParameters()
+    parametros.first_solution_strategy = estrategia_inicial
+    parametros.local_search_metaheuristic = routing_enums_pb2.LocalSearchMetaheuristic.GUIDED_LOCAL_SEARCH
+    return parametros
+
+
+def _semear_rotas(
+    plano_inicial: Sequence[Sequence[int]],
+    nos: Sequence[int],
+    matriz: np.ndarray,
+    inicios: Sequence[int],
+    fins: Sequence[int],
+    capacidades: Sequence[int],
+    aptos: Optional[set[int]] = None,
+) -> List[List[int]]:
+    """
+    Ajusta o plano inicial (nós por veículo) à capacidade e insere os ``nos`` que faltam.
+
+    Com ``aptos`` (nós que podem dirigir), cada rota precisa começar por um deles: o
+    primeiro apto da rota passa à frente e, se não houver, a rota é desfeita.
+    """
+    rotas: List[List[int]] = []
+    semeados: set[int] = set()
+    for indice in range(len(capacidades)):
+        rota = list(plano_inicial[indice])[: capacidades[indice]] if indice < len(plano_inicial) else []
+        if aptos is not None and rota and rota[0] not in aptos:
+            primeiro_apto = next((no for no in rota if no in aptos), None)
+            rota = [primeiro_apto] + [no for no in rota if no != primeiro_apto] if primeiro_apto is not None else []
+        rotas.append(rota)
+        semeados.update(rota)
+    faltantes = [no for no in nos if no not in semeados]
+    return completar_rotas_iniciais(rotas, faltantes, matriz, inicios, fins, capacidades, VALOR_INALCANCAVEL)
+
+
+def resolver_vrp(
+    trajeto: np.ndarray,
+    capacidades: Sequence[int],
+    qualidade: QualidadeRoteirizacaoEnum = QualidadeRoteirizacaoEnum.EQUILIBRADA,
+    tempo_maximo_s: Optional[float] = None,
+    aptos: Optional[Sequence[int]] = None,
+    plano_inicial: Optional[Sequence[Sequence[int]]] = None,
+) -> List[List[int]]:
+    """
+    Resolve o VRP sobre ``trajeto`` (destino no nó 0, funcionários nos nós 1..n) e
+    devolve os nós visitados por cada veículo, na ordem.
+
+    Sem ``aptos`` os veículos saem do destino e voltam a ele. Com ``aptos`` (nós que
+    podem dirigir) todos partem de uma origem virtual cuja única saída permitida é a
+    casa de um deles (ou o fim, se o veículo não for usado) e terminam no destino: o
+    primeiro nó de cada rota é o motorista, que ocupa um dos assentos de
+    ``capacidades``. Funcionários que não couberem ficam de fora, com penalidade.
+    """
+    quantidade = len(trajeto) - 1
+    veiculos = len(capacidades)
+    if aptos is None:
+        matriz = np.asarray(trajeto, dtype=np.int64)
+        manager = pywrapcp.RoutingIndexManager(len(matriz), veiculos, 0)
+        inicios = fins = [0] * veiculos
+        estrategia = routing_enums_pb2.FirstSolutionStrategy.SAVINGS
+        demandas = [0] + [1] * quantidade
+    else:
+        no_origem = quantidade + 1
+        matriz = np.full((quantidade + 2, quantidade + 2), VALOR_INALCANCAVEL, dtype=np.int64)
+        matriz[: quantidade + 1, : quantidade + 1] = trajeto
+        matriz[no_origem, list(aptos)] = 0
+        matriz[no_origem, 0] = 0
+        inicios, fins = [no_origem] * veiculos, [0] * veiculos
+        manager = pywrapcp.RoutingIndexManager(len(matriz), veiculos, inicios, fins)
+        estrategia = routing_enums_pb2.FirstSolutionStrategy.PATH_CHEAPEST_ARC
+        demandas = [0] + [1] * quantidade + [0]  # destino e origem virtual não ocupam assento
+    routing = pywrapcp.RoutingModel(manager)
+
+    transito = registrar_matriz_transito(routing, manager, matriz)
+    routing.SetArcCostEvaluatorOfAllVehicles(transito)
+    demanda = registrar_vetor_demanda(routing, manager, demandas)
+    routing.AddDimensionWithVehicleCapacity(demanda, 0, list(capacidades), True, "Capacity")
+
+    if aptos is not None:
+        indices_aptos = [manager.NodeToIndex(no) for no in aptos]
+        for veiculo in range(veiculos):
+            routing.NextVar(routing.Start(veiculo)).SetValues(indices_aptos + [routing.End(veiculo)])
+    for no in range(1, quantidade + 1):
+        routing.AddDisjunction([manager.NodeToIndex(no)], PENALIDADE_NAO_ATENDIDO)
+
+    rotas_iniciais = None
+    if plano_inicial:
+        rotas_iniciais = _semear_rotas(
+            plano_inicial,
+            range(1, quantidade + 1),
+            matriz,
+            inicios,
+            fins,
+            capacidades,
+            aptos=set(aptos) if aptos is not None else None,
+        )
+    solucao = resolver_com_orcamento(
+        routing,
+        _parametros_busca(estrategia),
+        calcular_orcamento(len(matriz), qualidade, tempo_maximo_s),
+        manager=manager,
+        rotas_iniciais=rotas_iniciais,
+    )
+    if solucao is None:
+        raise RuntimeError("Falha ao resolver o VRP multi-veículos. Tente novamente mais tarde.")
+
+    rotas: List[List[int]] = []
+    for veiculo in range(veiculos):
+        indice = solucao.Value(routing.NextVar(routing.Start(veiculo)))
+        rota: List[int] = []
+        while not routing.IsEnd(indice):
+            rota.append(manager.IndexToNode(indice))
+            indice = solucao.Value(routing.NextVar(indice))
+        rotas.append(rota)
+    return rotas
@@ -1,11 +1,39 @@
+"""
+Cliente do serviço ``table`` do OSRM.
+
+As consultas passam por um cliente ``httpx`` compartilhado, que mantém conexões
+persistentes (keep-alive) com cada host em vez de abrir uma conexão TCP/TLS por
+matriz. Um semáforo por host limita quantas requisições ficam em andamento ao
+mesmo tempo, protegendo instâncias auto-hospedadas de rajadas de planejamento.
+Há interface síncrona (``montar_matrizes_osrm``) e assíncrona
+(``montar_matrizes_osrm_async``).
+
+Instâncias grandes são quebradas em blocos de fontes x destinos (parâmetros
+``sources``/``destinations``) para caber no limite de tabela do OSRM e no
+tamanho máximo de URL.
+"""
+
 from __future__ import annotations
 
-import json
-from typing import List, Sequence, Tuple
-from urllib import error, request
+import asyncio
+import threading
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Sequence, Tuple
+from urllib.parse import urlparse
+
+import httpx
+import numpy as np
 
 from geo_rota.core.config import settings
 
+_USER_AGENT = "geo_rota_backend"
+# Valor usado quando o OSRM não encontra rota entre dois pontos; cabe em int32.
+VALOR_INALCANCAVEL = int(1e9)
+
+Matrizes = Tuple[np.ndarray, np.ndarray]
+
 
 class OSRMServiceError(RuntimeError):
     """Erro base para consultas OSRM."""
@@ -24,23 +52,19 @@ def _normalizar_url(base_url: str) -> str:
     return base_url
 
 
-def montar_matrizes_osrm(coords: Sequence[Tuple[float, float]]) -> Tuple[List[List[int]], List[List[int]]]:
-    """
-    Retorna matrizes de distância (metros) e duração (segundos) oriundas do OSRM.
-    """
-    if len(coords) < 2:
-        raise ValueError("São necessárias pelo menos duas coordenadas para montar a matriz OSRM.")
+def _converter_matriz(matriz: Sequence[Sequence[Optional[float]]]) -> np.ndarray:
+    """Converte a matriz do JSON em int32; ``None`` (sem rota) vira ``VALOR_INALCANCAVEL``."""
+    valores = np.array(matriz, dtype=np.float64)  # None -> NaN
+    valores = np.rint(valores, out=valores)
+    np.copyto(valores, VALOR_INALCANCAVEL, where=np.isnan(valores) | (valores > VALOR_INALCANCAVEL))
+    return valores.astype(np.int32)
 
-    base_url = _normalizar_url(settings.OSRM_BASE_URL)
-    coords_param = _format_coordinates(coords)
-    query = f"{base_url}/table/v1/{settings.OSRM_PROFILE}/{coords_param}?annotations=distance,duration"
-    req = request.Request(query, headers={"User-Agent": "geo_rota_backend"})
 
+def _interpretar_resposta(resposta: httpx.Response) -> Matrizes:
     try:
-        with request.urlopen(req, timeout=settings.OSRM_TIMEOUT) as resp:
-            payload = json.loads(resp.read().decode("utf-8"))
-    except error.URLError as exc:
-        raise OSRMServiceError(f"Falha ao consultar OSRM: {exc}") from exc
+        payload = resposta.json()
+    except ValueError as exc:
+        raise OSRMServiceError(f"Resposta inválida do OSRM (HTTP {resposta.status_code}).") from exc
 
     if payload.get("code") != "Ok":
         raise OSRMServiceError(f"OSRM retornou erro: {payload.get('message') or payload.get('code')}")
@@ -49,19 +73,273 @@ def montar_matrizes_osrm(coords: Sequence[Tuple[float, float]]) -> Tuple[List[Li
     duracoes = payload.get("durations")
     if not distancias or not duracoes:
         raise OSRMServiceError("Resposta do OSRM não possui matrizes de distância/duração.")
+    return _converter_matriz(distancias), _converter_matriz(duracoes)
+
+
+_semaforos_por_host: Dict[str, threading.BoundedSemaphore] = {}
+_semaforos_lock = threading.Lock()
+
+
+def _semaforo_do_host(host: str, limite: int) -> threading.BoundedSemaphore:
+    # Perfis diferentes da mesma instância dividem o limite do host.
+    with _semaforos_lock:
+        if host not in _semaforos_por_host:
+            _semaforos_por_host[host] = threading.BoundedSemaphore(limite)
+        return _semaforos_por_host[host]
+
+
+class ClienteOSRM:
+    """
+    Cliente com pool de conexões para uma instância OSRM.
+
+    ``concorrencia_maxima`` limita as requisições simultâneas ao host: entre as
+    threads do processo na interface síncrona e por event loop na assíncrona.
+    """
+
+    def __init__(self, base_url: str, perfil: str, timeout: float, concorrencia_maxima: int = 4) -> None:
+        self.base_url = _normalizar_url(base_url)
+        self.perfil = perfil
+        self.host = urlparse(self.base_url).netloc
+        self.concorrencia_maxima = max(concorrencia_maxima, 1)
+        self._timeout = httpx.Timeout(timeout, pool=None)
+        self._limites = httpx.Limits(
+            max_connections=self.concorrencia_maxima,
+            max_keepalive_connections=self.concorrencia_maxima,
+        )
+        self._cabecalhos = {"User-Agent": _USER_AGENT}
+        self._semaforo = _semaforo_do_host(self.host, self.concorrencia_maxima)
+        self._cliente: Optional[httpx.Client] = None
+        self._clientes_async: weakref.WeakKeyDictionary[
+            asyncio.AbstractEventLoop, Tuple[httpx.AsyncClient, asyncio.Semaphore]
+        ] = weakref.WeakKeyDictionary()
+        self._lock = threading.Lock()
+
+    def _url_tabela(self, coords: Sequence[Tuple[float, float]]) -> str:
+        return f"{self.base_url}/table/v1/{self.perfil}/{_format_coordinates(coords)}"
+
+    @staticmethod
+    def _parametros(
+        fontes: Optional[Sequence[int]],
+        destinos: Optional[Sequence[int]],
+    ) -> Dict[str, str]:
+        parametros = {"annotations": "distance,duration"}
+        if fontes is not None:
+            parametros["sources"] = ";".join(str(indice) for indice in fontes)
+        if destinos is not None:
+            parametros["destinations"] = ";".join(str(indice) for indice in destinos)
+        return parametros
+
+    def _obter_cliente(self) -> httpx.Client:
+        if self._cliente is None:
+            with self._lock:
+                if self._cliente is None:
+                    self._cliente = httpx.Client(timeout=self._timeout, limits=self._limites, headers=self._cabecalhos)
+        return self._cliente
+
+    def _obter_cliente_async(self) -> Tuple[httpx.AsyncClient, asyncio.Semaphore]:
+        # Clientes e semáforos assíncronos ficam presos ao loop em que foram criados.
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            if loop not in self._clientes_async:
+                cliente = httpx.AsyncClient(timeout=self._timeout, limits=self._limites, headers=self._cabecalhos)
+                self._clientes_async[loop] = (cliente, asyncio.Semaphore(self.concorrencia_maxima))
+            return self._clientes_async[loop]
+
+    def tabela(
+        self,
+        coords: Sequence[Tuple[float, float]],
+        fontes: Optional[Sequence[int]] = None,
+        destinos: Optional[Sequence[int]] = None,
+    ) -> Matrizes:
+        """Matrizes de distância (metros) e duração (segundos) entre ``fontes`` e ``destinos``."""
+        with self._semaforo:
+            try:
+                resposta = self._obter_cliente().get(self._url_tabela(coords), params=self._parametros(fontes, destinos))
+            except httpx.HTTPError as exc:
+                raise OSRMServiceError(f"Falha ao consultar OSRM: {exc}") from exc
+        return _interpretar_resposta(resposta)
+
+    async def tabela_async(
+        self,
+        coords: Sequence[Tuple[float, float]],
+        fontes: Optional[Sequence[int]] = None,
+        destinos: Optional[Sequence[int]] = None,
+    ) -> Matrizes:
+        cliente, semaforo = self._obter_cliente_async()
+        async with semaforo:
+            try:
+                resposta = await cliente.get(self._url_tabela(coords), params=self._parametros(fontes, destinos))
+            except httpx.HTTPError as exc:
+                raise OSRMServiceError(f"Falha ao consultar OSRM: {exc}") from exc
+        return _interpretar_resposta(resposta)
+
+    def fechar(self) -> None:
+        with self._lock:
+            cliente, self._cliente = self._cliente, None
+        if cliente is not None:
+            cliente.close()
+
+    async def fechar_async(self) -> None:
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            cliente_async = self._clientes_async.pop(loop, None)
+        if cliente_async is not None:
+            await cliente_async[0].aclose()
+
+
+_clientes: Dict[Tuple[str, str], ClienteOSRM] = {}
+_clientes_lock = threading.Lock()
+
+
+def obter_cliente_osrm(base_url: Optional[str] = None, perfil: Optional[str] = None) -> ClienteOSRM:
+    """Cliente compartilhado por (URL, perfil); por padrão usa as configurações."""
+    base_url = _normalizar_url(base_url or settings.OSRM_BASE_URL)
+    perfil = perfil or settings.OSRM_PROFILE
+    chave = (base_url, perfil)
+    with _clientes_lock:
+        cliente = _clientes.get(chave)
+        if cliente is None:
+            cliente = ClienteOSRM(
+                base_url,
+                perfil,
+                timeout=settings.OSRM_TIMEOUT,
+                concorrencia_maxima=settings.OSRM_CONCORRENCIA_POR_HOST,
+            )
+            _clientes[chave] = cliente
+        return cliente
+
+
+async def fechar_clientes_osrm() -> None:
+    """Encerra as conexões abertas (usado no desligamento da aplicação)."""
+    with _clientes_lock:
+        clientes = list(_clientes.values())
+        _clientes.clear()
+    for cliente in clientes:
+        cliente.fechar()
+        await cliente.fechar_async()
+
+
+def _validar_coordenadas(coords: Sequence[Tuple[float, float]]) -> None:
+    if len(coords) < 2:
+        raise ValueError("São necessárias pelo menos duas coordenadas para montar a matriz OSRM.")
+
+
+@dataclass(frozen=True)
+class _Bloco:
+    """Pedaço da consulta: posições ``linhas`` x ``colunas`` do resultado e os índices de ``coords``."""
+
+    linhas: range
+    colunas: range
+    fontes: Tuple[int, ...]
+    destinos: Tuple[int, ...]
+
+    def requisicao(
+        self,
+        coords: Sequence[Tuple[float, float]],
+    ) -> Tuple[List[Tuple[float, float]], Optional[List[int]], Optional[List[int]]]:
+        """
+        Coordenadas a enviar e índices ``sources``/``destinations`` dentro delas.
+
+        O OSRM recusa tabelas com menos de duas coordenadas; um bloco de um único ponto
+        (o último bloco da diagonal quando sobra um nó) repete a coordenada e pede só a
+        primeira como fonte e destino.
+        """
+        if self.fontes == self.destinos and len(self.fontes) >= 2:
+            return [coords[i] for i in self.fontes], None, None
+        posicoes: Dict[int, int] = {}
+        for indice in self.fontes + self.destinos:
+            posicoes.setdefault(indice, len(posicoes))
+        coords_bloco = [coords[indice] for indice in posicoes]
+        if len(coords_bloco) < 2:
+            coords_bloco.append(coords_bloco[0])
+        return coords_bloco, [posicoes[i] for i in self.fontes], [posicoes[j] for j in self.destinos]
+
+
+def _planejar_blocos(fontes: Sequence[int], destinos: Sequence[int], tamanho_bloco: int) -> List[_Bloco]:
+    """
+    Divide a consulta ``fontes`` x ``destinos`` em blocos de no máximo
+    ``tamanho_bloco`` fontes por ``tamanho_bloco`` destinos, o limite que o OSRM
+    aplica a cada consulta (``--max-table-size``).
+    """
+    tamanho_bloco = max(tamanho_bloco, 1)
+
+    def faixas(quantidade: int) -> List[range]:
+        return [range(inicio, min(inicio + tamanho_bloco, quantidade)) for inicio in range(0, quantidade, tamanho_bloco)]
+
+    return [
+        _Bloco(linhas, colunas, tuple(fontes[i] for i in linhas), tuple(destinos[j] for j in colunas))
+        for linhas in faixas(len(fontes))
+        for colunas in faixas(len(destinos))
+    ]
+
+
+def _montar_matriz_densa(
+    blocos: Sequence[_Bloco],
+    resultados: Sequence[Matrizes],
+    quantidade_linhas: int,
+    quantidade_colunas: int,
+) -> Matrizes:
+    distancias = np.zeros((quantidade_linhas, quantidade_colunas), dtype=np.int32)
+    duracoes = np.zeros((quantidade_linhas, quantidade_colunas), dtype=np.int32)
+    for bloco, (distancias_bloco, duracoes_bloco) in zip(blocos, resultados):
+        linhas = slice(bloco.linhas.start, bloco.linhas.stop)
+        colunas = slice(bloco.colunas.start, bloco.colunas.stop)
+        distancias[linhas, colunas] = distancias_bloco
+        duracoes[linhas, colunas] = duracoes_bloco
+    return distancias, duracoes
+
+
+def _preparar_consulta(
+    coords: Sequence[Tuple[float, float]],
+    fontes: Optional[Sequence[int]],
+    destinos: Optional[Sequence[int]],
+    tamanho_bloco: Optional[int],
+) -> Tuple[List[int], List[int], List[_Bloco]]:
+    _validar_coordenadas(coords)
+    fontes = list(range(len(coords))) if fontes is None else list(fontes)
+    destinos = list(range(len(coords))) if destinos is None else list(destinos)
+    blocos = _planejar_blocos(fontes, destinos, tamanho_bloco or settings.OSRM_TAMANHO_MAXIMO_TABELA)
+    return fontes, destinos, blocos
+
+
+def montar_matrizes_osrm(
+    coords: Sequence[Tuple[float, float]],
+    fontes: Optional[Sequence[int]] = None,
+    destinos: Optional[Sequence[int]] = None,
+    tamanho_bloco: Optional[int] = None,
+) -> Matrizes:
+    """
+    Retorna matrizes de distância (metros) e duração (segundos) oriundas do OSRM.
+
+    Com ``fontes``/``destinos`` (índices de ``coords``) devolve apenas essas linhas
+    e colunas, na ordem informada. Consultas maiores que ``tamanho_bloco`` (padrão
+    ``OSRM_TAMANHO_MAXIMO_TABELA``) são divididas em blocos consultados em
+    paralelo, respeitando o limite de requisições simultâneas do cliente, e
+    remontadas numa única matriz.
+    """
+    fontes, destinos, blocos = _preparar_consulta(coords, fontes, destinos, tamanho_bloco)
+    if not blocos:
+        vazia = np.zeros((len(fontes), len(destinos)), dtype=np.int32)
+        return vazia, vazia.copy()
+    cliente = obter_cliente_osrm()
+    if len(blocos) == 1:
+        resultados = [cliente.tabela(*blocos[0].requisicao(coords))]
+    else:
+        with ThreadPoolExecutor(max_workers=min(cliente.concorrencia_maxima, len(blocos))) as executor:
+            resultados = list(executor.map(lambda bloco: cliente.tabela(*bloco.requisicao(coords)), blocos))
+    return _montar_matriz_densa(blocos, resultados, len(fontes), len(destinos))
+
 
-    def _converter_matriz(matriz: Sequence[Sequence[float]], fator: float) -> List[List[int]]:
-        convertida: List[List[int]] = []
-        for linha in matriz:
-            nova_linha: List[int] = []
-            for valor in linha:
-                if valor is None:
-                    nova_linha.append(int(1e9))
-                else:
-                    nova_linha.append(int(round(valor * fator)))
-            convertida.append(nova_linha)
-        return convertida
-
-    distancia_metros = _converter_matriz(distancias, 1.0)
-    duracao_segundos = _converter_matriz(duracoes, 1.0)
-    return distancia_metros, duracao_segundos
+async def montar_matrizes_osrm_async(
+    coords: Sequence[Tuple[float, float]],
+    fontes: Optional[Sequence[int]] = None,
+    destinos: Optional[Sequence[int]] = None,
+    tamanho_bloco: Optional[int] = None,
+) -> Matrizes:
+    fontes, destinos, blocos = _preparar_consulta(coords, fontes, destinos, tamanho_bloco)
+    if not blocos:
+        vazia = np.zeros((len(fontes), len(destinos)), dtype=np.int32)
+        return vazia, vazia.copy()
+    cliente = obter_cliente_osrm()
+    resultados = await asyncio.gather(*(cliente.tabela_async(*bloco.requisicao(coords)) for bloco in blocos))
+    return _montar_matriz_densa(blocos, resultados, len(fontes), len(destinos))
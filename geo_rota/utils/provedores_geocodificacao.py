@@ -0,0 +1,264 @@
+"""
+Cadeia de provedores de geocodificação com disjuntor por provedor.
+
+Cada provedor tem o próprio timeout e um disjuntor que, após falhas consecutivas,
+passa a ignorá-lo por um intervalo em vez de esperar o timeout a cada endereço.
+Os provedores são consultados na ordem configurada em ``GEOCODE_PROVEDORES`` e o
+primeiro que encontrar o endereço responde.
+"""
+
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from typing import List, Optional, Sequence, Tuple
+from urllib.parse import urlparse
+
+from geopy.exc import GeocoderServiceError
+from geopy.geocoders import Nominatim
+
+from geo_rota.core.config import settings
+from geo_rota.models.enums import PrecisaoGeocodificacaoEnum
+from geo_rota.utils.cep import extrair_cep, obter_base_cep
+from geo_rota.utils.limite_taxa import BackendLimiteTaxa, LimitadorTaxa, obter_backend
+
+logger = logging.getLogger("geo_rota.geocodificacao")
+
+_USER_AGENT = "geo_rota_backend"
+
+
+@dataclass(frozen=True)
+class ResultadoGeocodificacao:
+    latitude: float
+    longitude: float
+    precisao: PrecisaoGeocodificacaoEnum = PrecisaoGeocodificacaoEnum.ENDERECO
+
+    @property
+    def coordenadas(self) -> Tuple[float, float]:
+        return self.latitude, self.longitude
+
+
+class ProvedorGeocodificacao(ABC):
+    """
+    Interface dos provedores da cadeia.
+
+    ``consultar`` retorna ``None`` quando o provedor não conhece o endereço e
+    levanta ``GeocoderServiceError`` quando o próprio provedor falhou.
+    """
+
+    nome: str = "provedor"
+
+    @abstractmethod
+    def consultar(self, endereco: str) -> Optional[ResultadoGeocodificacao]:
+        ...
+
+
+class ProvedorCEP(ProvedorGeocodificacao):
+    """Centróide do CEP a partir da base offline (ver ``geo_rota.utils.cep``)."""
+
+    nome = "cep"
+
+    def consultar(self, endereco: str) -> Optional[ResultadoGeocodificacao]:
+        base = obter_base_cep()
+        cep = extrair_cep(endereco)
+        if base is None or cep is None:
+            return None
+        encontrado = base.buscar(cep)
+        if encontrado is None:
+            return None
+        latitude, longitude, precisao = encontrado
+        return ResultadoGeocodificacao(latitude, longitude, precisao)
+
+
+class ProvedorNominatim(ProvedorGeocodificacao):
+    """
+    Serviço compatível com a API do Nominatim (público ou auto-hospedado).
+
+    O intervalo mínimo entre chamadas é aplicado por host através do limitador
+    compartilhado (``geo_rota.utils.limite_taxa``), então vale para todos os
+    workers da máquina. Não há retentativas aqui: quem decide repetir é o
+    disjuntor da cadeia e a tarefa de segundo plano.
+    """
+
+    def __init__(
+        self,
+        nome: str,
+        url: str,
+        timeout: float,
+        intervalo_minimo: float,
+        rajada: int = 1,
+        backend: Optional[BackendLimiteTaxa] = None,
+    ) -> None:
+        self.nome = nome
+        destino = urlparse(url if "://" in url else f"https://{url}")
+        self._geolocator = Nominatim(
+            user_agent=_USER_AGENT,
+            domain=destino.netloc + destino.path.rstrip("/"),
+            scheme=destino.scheme,
+            timeout=timeout,
+        )
+        self._limitador: Optional[LimitadorTaxa] = None
+        if intervalo_minimo > 0:
+            self._limitador = LimitadorTaxa(
+                f"geocodificacao:{destino.netloc}",
+                intervalo_minimo,
+                backend or obter_backend(),
+                capacidade=rajada,
+            )
+
+    def consultar(self, endereco: str) -> Optional[ResultadoGeocodificacao]:
+        if self._limitador is not None:
+            self._limitador.adquirir()
+        location = self._geolocator.geocode(endereco)
+        if location is None:
+            return None
+        return ResultadoGeocodificacao(float(location.latitude), float(location.longitude))
+
+
+class Disjuntor:
+    """
+    Disjuntor simples: abre após ``limite_falhas`` falhas consecutivas e, passado
+    ``tempo_abertura`` segundos, libera uma única consulta de teste.
+    """
+
+    def __init__(self, limite_falhas: int, tempo_abertura: float) -> None:
+        self.limite_falhas = max(limite_falhas, 1)
+        self.tempo_abertura = tempo_abertura
+        self._falhas = 0
+        self._aberto_ate: Optional[float] = None
+        self._teste_em_andamento = False
+        self._lock = threading.Lock()
+
+    @property
+    def aberto(self) -> bool:
+        with self._lock:
+            return self._aberto_ate is not None and time.monotonic() < self._aberto_ate
+
+    def permitir(self) -> bool:
+        with self._lock:
+            if self._aberto_ate is None:
+                return True
+            if time.monotonic() < self._aberto_ate or self._teste_em_andamento:
+                return False
+            # Meio-aberto: apenas a chamada de teste passa.
+            self._teste_em_andamento = True
+            return True
+
+    def registrar_sucesso(self) -> None:
+        with self._lock:
+            self._falhas = 0
+            self._aberto_ate = None
+            self._teste_em_andamento = False
+
+    def registrar_falha(self) -> bool:
+        """Contabiliza a falha e retorna ``True`` se o disjuntor acabou de abrir."""
+        with self._lock:
+            self._falhas += 1
+            reabrindo = self._teste_em_andamento
+            self._teste_em_andamento = False
+            if reabrindo or self._falhas >= self.limite_falhas:
+                abriu = self._aberto_ate is None or reabrindo
+                self._aberto_ate = time.monotonic() + self.tempo_abertura
+                return abriu
+            return False
+
+
+class CadeiaGeocodificacao:
+    """Consulta os provedores em ordem, pulando os que estão com o disjuntor aberto."""
+
+    def __init__(
+        self,
+        provedores: Sequence[ProvedorGeocodificacao],
+        limite_falhas: int = 3,
+        tempo_abertura: float = 60.0,
+    ) -> None:
+        self.provedores = list(provedores)
+        self.disjuntores = {provedor.nome: Disjuntor(limite_falhas, tempo_abertura) for provedor in self.provedores}
+
+    def geocodificar(self, endereco: str) -> Optional[ResultadoGeocodificacao]:
+        """
+        Retorna o primeiro resultado encontrado ou ``None`` se todos os provedores
+        consultados responderam que não conhecem o endereço.
+
+        Levanta ``GeocoderServiceError`` quando algum provedor estava indisponível e
+        nenhum outro encontrou o endereço, sinalizando que vale tentar de novo depois.
+        """
+        indisponiveis: List[str] = []
+        for provedor in self.provedores:
+            disjuntor = self.disjuntores[provedor.nome]
+            if not disjuntor.permitir():
+                indisponiveis.append(f"{provedor.nome}: disjuntor aberto")
+                continue
+            try:
+                resultado = provedor.consultar(endereco)
+            except GeocoderServiceError as exc:
+                if disjuntor.registrar_falha():
+                    logger.warning("Provedor de geocodificação '%s' desativado temporariamente: %s", provedor.nome, exc)
+                indisponiveis.append(f"{provedor.nome}: {exc}")
+                continue
+            disjuntor.registrar_sucesso()
+            if resultado is not None:
+                return resultado
+
+        if indisponiveis:
+            raise GeocoderServiceError("Provedores de geocodificação indisponíveis (" + "; ".join(indisponiveis) + ")")
+        return None
+
+
+def montar_cadeia_padrao() -> CadeiaGeocodificacao:
+    """Monta a cadeia a partir das configurações, ignorando provedores não configurados."""
+    provedores: List[ProvedorGeocodificacao] = []
+    for nome in settings.GEOCODE_PROVEDORES:
+        if nome == "cep":
+            if settings.GEOCODE_CEP_BASE:
+                provedores.append(ProvedorCEP())
+        elif nome == "nominatim_local":
+            if settings.GEOCODE_NOMINATIM_LOCAL_URL:
+                provedores.append(
+                    ProvedorNominatim(
+                        nome,
+                        settings.GEOCODE_NOMINATIM_LOCAL_URL,
+                        timeout=settings.GEOCODE_NOMINATIM_LOCAL_TIMEOUT,
+                        intervalo_minimo=0.0,
+                    )
+                )
+        elif nome == "nominatim":
+            provedores.append(
+                ProvedorNominatim(
+                    nome,
+                    settings.GEOCODE_NOMINATIM_URL,
+                    timeout=settings.GEOCODE_NOMINATIM_TIMEOUT,
+                    intervalo_minimo=settings.GEOCODE_NOMINATIM_INTERVALO_SEGUNDOS,
+                    rajada=settings.GEOCODE_NOMINATIM_RAJADA,
+                )
+            )
+        else:
+            logger.warning("Provedor de geocodificação desconhecido ignorado: '%s'", nome)
+    return CadeiaGeocodificacao(
+        provedores,
+        limite_falhas=settings.GEOCODE_DISJUNTOR_FALHAS,
+        tempo_abertura=settings.GEOCODE_DISJUNTOR_ABERTURA_SEGUNDOS,
+    )
+
+
+_cadeia: Optional[CadeiaGeocodificacao] = None
+_cadeia_lock = threading.Lock()
+
+
+def obter_cadeia() -> CadeiaGeocodificacao:
+    global _cadeia
+    if _cadeia is None:
+        with _cadeia_lock:
+            if _cadeia is None:
+                _cadeia = montar_cadeia_padrao()
+    return _cadeia
+
+
+def configurar_cadeia(cadeia: Optional[CadeiaGeocodificacao]) -> None:
+    """Substitui a cadeia em uso (ex.: apontar para um stub local); ``None`` volta ao padrão."""
+    global _cadeia
+    with _cadeia_lock:
+        _cadeia = cadeia
@@ -0,0 +1,220 @@
+"""
+Sequenciamento de paradas de uma única rota (caminho aberto com início e fim fixos).
+
+A estratégia depende do tamanho:
+
+* até ``LIMITE_EXATO`` paradas: programação dinâmica de Held-Karp, exata e
+  vetorizada por tamanho de subconjunto;
+* até ``LIMITE_BUSCA_LOCAL`` paradas: vizinho mais próximo seguido de 2-opt e
+  Or-opt com os ganhos de todos os movimentos calculados de uma vez em NumPy;
+* acima disso: OR-tools com busca local guiada, no orçamento de tempo de
+  ``geo_rota.utils.modelo_roteamento.calcular_orcamento``.
+
+As matrizes podem ser assimétricas (tempos/distâncias do OSRM); todos os
+movimentos consideram o sentido de cada trecho.
+"""
+
+from __future__ import annotations
+
+import time
+from typing import List, Optional
+
+import numpy as np
+from ortools.constraint_solver import pywrapcp, routing_enums_pb2
+
+from geo_rota.utils.modelo_roteamento import calcular_orcamento, registrar_matriz_transito, resolver_com_orcamento
+
+LIMITE_EXATO = 12
+LIMITE_BUSCA_LOCAL = 200
+_TAMANHO_MAXIMO_SEGMENTO_OR_OPT = 3
+
+
+def ordenar_paradas(
+    matriz: np.ndarray,
+    inicio: int,
+    fim: int,
+    tempo_limite: Optional[float] = None,
+) -> List[int]:
+    """
+    Ordem de visita de todos os nós de ``matriz`` exceto ``inicio`` e ``fim``,
+    minimizando o custo do caminho ``inicio`` → paradas → ``fim``.
+    """
+    matriz = np.asarray(matriz, dtype=np.int64)
+    paradas = [no for no in range(len(matriz)) if no not in (inicio, fim)]
+    if len(paradas) <= 1:
+        return paradas
+    if len(paradas) <= LIMITE_EXATO:
+        return _held_karp(matriz, inicio, fim, paradas)
+    if len(paradas) <= LIMITE_BUSCA_LOCAL:
+        return _busca_local(matriz, inicio, fim, paradas, tempo_limite)
+    return _ortools(matriz, inicio, fim, tempo_limite)
+
+
+def custo_caminho(matriz: np.ndarray, caminho: List[int]) -> int:
+    nos = np.asarray(caminho, dtype=np.intp)
+    return int(np.asarray(matriz)[nos[:-1], nos[1:]].sum(dtype=np.int64))
+
+
+def _held_karp(matriz: np.ndarray, inicio: int, fim: int, paradas: List[int]) -> List[int]:
+    quantidade = len(paradas)
+    nos = np.asarray(paradas, dtype=np.intp)
+    entre_paradas = matriz[np.ix_(nos, nos)]
+    bits = np.int64(1) << np.arange(quantidade, dtype=np.int64)
+
+    infinito = np.iinfo(np.int64).max // 4
+    custo = np.full((1 << quantidade, quantidade), infinito, dtype=np.int64)
+    anterior = np.full((1 << quantidade, quantidade), -1, dtype=np.int8)
+    custo[bits, np.arange(quantidade)] = matriz[inicio, nos]
+
+    mascaras = np.arange(1 << quantidade, dtype=np.int64)
+    tamanhos = np.zeros(1 << quantidade, dtype=np.int64)
+    for bit in bits:
+        tamanhos += (mascaras & bit) != 0
+
+    for tamanho in range(1, quantidade):
+        atuais = mascaras[tamanhos == tamanho]
+        # candidatos[m, i, j]: chegar em j a partir de i, tendo visitado a máscara m terminando em i.
+        candidatos = custo[atuais][:, :, None] + entre_paradas[None, :, :]
+        melhores_anteriores = candidatos.argmin(axis=1)
+        melhores = np.take_along_axis(candidatos, melhores_anteriores[:, None, :], axis=1)[:, 0, :]
+        livres = (atuais[:, None] & bits[None, :]) == 0
+        linhas, colunas = np.nonzero(livres)
+        novas = atuais[linhas] | bits[colunas]
+        custo[novas, colunas] = melhores[linhas, colunas]
+        anterior[novas, colunas] = melhores_anteriores[linhas, colunas]
+
+    completa = (1 << quantidade) - 1
+    ultimo = int(np.argmin(custo[completa] + matriz[nos, fim]))
+    ordem: List[int] = []
+    mascara = completa
+    while ultimo >= 0:
+        ordem.append(paradas[ultimo])
+        proximo = int(anterior[mascara, ultimo])
+        mascara ^= 1 << ultimo
+        ultimo = proximo
+    ordem.reverse()
+    return ordem
+
+
+def _vizinho_mais_proximo(matriz: np.ndarray, inicio: int, paradas: List[int]) -> List[int]:
+    restantes = np.asarray(paradas, dtype=np.intp)
+    ordem: List[int] = []
+    atual = inicio
+    while len(restantes):
+        escolhido = int(np.argmin(matriz[atual, restantes]))
+        atual = int(restantes[escolhido])
+        ordem.append(atual)
+        restantes = np.delete(restantes, escolhido)
+    return ordem
+
+
+def _melhor_2opt(matriz: np.ndarray, caminho: np.ndarray) -> Optional[tuple[int, int, int]]:
+    """Melhor inversão caminho[i..j] (paradas internas); retorna (ganho, i, j) ou None."""
+    trechos_ida = matriz[caminho[:-1], caminho[1:]]
+    trechos_volta = matriz[caminho[1:], caminho[:-1]]
+    ida = np.concatenate(([0], np.cumsum(trechos_ida)))
+    volta = np.concatenate(([0], np.cumsum(trechos_volta)))
+
+    ultimo = len(caminho) - 2
+    i, j = np.triu_indices(ultimo + 1, k=1)
+    validos = i >= 1
+    i, j = i[validos], j[validos]
+    antes, depois = caminho[i - 1], caminho[j + 1]
+    delta = (
+        matriz[antes, caminho[j]]
+        + matriz[caminho[i], depois]
+        - matriz[antes, caminho[i]]
+        - matriz[caminho[j], depois]
+        + (volta[j] - volta[i])
+        - (ida[j] - ida[i])
+    )
+    if len(delta) == 0:
+        return None
+    melhor = int(np.argmin(delta))
+    if delta[melhor] >= 0:
+        return None
+    return int(-delta[melhor]), int(i[melhor]), int(j[melhor])
+
+
+def _melhor_or_opt(matriz: np.ndarray, caminho: np.ndarray) -> Optional[tuple[int, int, int, int]]:
+    """
+    Melhor realocação de um segmento de 1 a 3 paradas para outra aresta do
+    caminho, sem inverter; retorna (ganho, início, comprimento, aresta) ou None.
+    """
+    total = len(caminho)
+    arestas = np.arange(total - 1)  # aresta k liga caminho[k] a caminho[k + 1]
+    custo_aresta = matriz[caminho[:-1], caminho[1:]]
+    melhor: Optional[tuple[int, int, int, int]] = None
+    for comprimento in range(1, _TAMANHO_MAXIMO_SEGMENTO_OR_OPT + 1):
+        inicios = np.arange(1, total - comprimento)
+        if len(inicios) == 0:
+            break
+        fins = inicios + comprimento - 1
+        primeiro, ultimo = caminho[inicios], caminho[fins]
+        antes, depois = caminho[inicios - 1], caminho[fins + 1]
+        remocao = matriz[antes, primeiro] + matriz[ultimo, depois] - matriz[antes, depois]
+        insercao = (
+            matriz[caminho[arestas][None, :], primeiro[:, None]]
+            + matriz[ultimo[:, None], caminho[arestas + 1][None, :]]
+            - custo_aresta[None, :]
+        )
+        # A aresta de destino não pode tocar o próprio segmento.
+        invalidas = (arestas[None, :] >= inicios[:, None] - 1) & (arestas[None, :] <= fins[:, None])
+        delta = np.where(invalidas, np.iinfo(np.int64).max // 4, insercao - remocao[:, None])
+        linha, coluna = np.unravel_index(int(np.argmin(delta)), delta.shape)
+        ganho = -int(delta[linha, coluna])
+        if ganho > 0 and (melhor is None or ganho > melhor[0]):
+            melhor = (ganho, int(inicios[linha]), comprimento, int(coluna))
+    return melhor
+
+
+def _busca_local(
+    matriz: np.ndarray,
+    inicio: int,
+    fim: int,
+    paradas: List[int],
+    tempo_limite: Optional[float],
+) -> List[int]:
+    caminho = np.asarray([inicio, *_vizinho_mais_proximo(matriz, inicio, paradas), fim], dtype=np.intp)
+    prazo = time.monotonic() + tempo_limite if tempo_limite else None
+    while prazo is None or time.monotonic() < prazo:
+        inversao = _melhor_2opt(matriz, caminho)
+        if inversao is not None:
+            _, i, j = inversao
+            caminho[i : j + 1] = caminho[i : j + 1][::-1]
+            continue
+        realocacao = _melhor_or_opt(matriz, caminho)
+        if realocacao is None:
+            break
+        _, origem, comprimento, aresta = realocacao
+        segmento = caminho[origem : origem + comprimento]
+        restante = np.delete(caminho, np.arange(origem, origem + comprimento))
+        posicao = aresta + 1 if aresta < origem else aresta + 1 - comprimento
+        caminho = np.insert(restante, posicao, segmento)
+    return caminho[1:-1].tolist()
+
+
+def _ortools(matriz: np.ndarray, inicio: int, fim: int, tempo_limite: Optional[float]) -> List[int]:
+    manager = pywrapcp.RoutingIndexManager(len(matriz), 1, [inicio], [fim])
+    routing = pywrapcp.RoutingModel(manager)
+
+    transit_callback_index = registrar_matriz_transito(routing, manager, matriz)
+    routing.SetArcCostEvaluatorOfAllVehicles(transit_callback_index)
+
+    search_parameters = pywrapcp.DefaultRoutingSearchParameters()
+    search_parameters.first_solution_strategy = routing_enums_pb2.FirstSolutionStrategy.PATH_CHEAPEST_ARC
+    search_parameters.local_search_metaheuristic = routing_enums_pb2.LocalSearchMetaheuristic.GUIDED_LOCAL_SEARCH
+
+    orcamento = calcular_orcamento(len(matriz), tempo_maximo_s=tempo_limite)
+    solution = resolver_com_orcamento(routing, search_parameters, orcamento)
+    if solution is None:
+        raise RuntimeError("Falha ao resolver a otimização de rota. Tente novamente mais tarde.")
+
+    ordem: List[int] = []
+    index = routing.Start(0)
+    while not routing.IsEnd(index):
+        node_index = manager.IndexToNode(index)
+        if node_index not in (inicio, fim):
+            ordem.append(node_index)
+        index = solution.Value(routing.NextVar(index))
+    return ordem
@@ -0,0 +1,51 @@
+"""
+Acrescenta em um banco existente as tabelas e colunas novas declaradas nos modelos.
+
+O ``create_all`` executado em ambiente de desenvolvimento cria apenas tabelas
+ausentes; este script complementa as tabelas já existentes com ``ALTER TABLE ADD
+COLUMN``. Alterações de tipo ou remoção de colunas continuam manuais.
+"""
+
+from sqlalchemy import inspect, literal, text
+
+from geo_rota.core.database import engine
+from geo_rota.models import *  # noqa: F401,F403 - registra todos os modelos no metadata
+from geo_rota.models.model_base import Base
+
+
+def _default_literal(coluna) -> str | None:
+    default = coluna.default
+    if default is None or not default.is_scalar:
+        return None
+    # Renderiza com o tipo da coluna para aplicar as mesmas conversões do ORM (ex.: Enum).
+    expressao = literal(default.arg, type_=coluna.type)
+    return str(expressao.compile(dialect=engine.dialect, compile_kwargs={"literal_binds": True}))
+
+
+def atualizar_schema() -> list[str]:
+    Base.metadata.create_all(bind=engine)
+    inspector = inspect(engine)
+    comandos: list[str] = []
+    for tabela in Base.metadata.sorted_tables:
+        existentes = {coluna["name"] for coluna in inspector.get_columns(tabela.name)}
+        for coluna in tabela.columns:
+            if coluna.name in existentes:
+                continue
+            tipo = coluna.type.compile(dialect=engine.dialect)
+            comando = f"ALTER TABLE {tabela.name} ADD COLUMN {coluna.name} {tipo}"
+            default = _default_literal(coluna)
+            if default is not None:
+                comando += f" DEFAULT {default}"
+            comandos.append(comando)
+
+    with engine.begin() as conexao:
+        for comando in comandos:
+            conexao.execute(text(comando))
+    return comandos
+
+
+if __name__ == "__main__":
+    executados = atualizar_schema()
+    for comando in executados:
+        print(comando)
+    print(f"{len(executados)} coluna(s) adicionada(s).")
@@ -0,0 +1,25 @@
+"""
+Compila a base offline de centróides de CEP usada pela geocodificação.
+
+Uso: ``python scripts/compilar_base_cep.py ceps.csv ceps.bin`` e depois aponte
+``GEOCODE_CEP_BASE`` para o arquivo gerado. O CSV precisa das colunas
+``cep``, ``latitude`` e ``longitude``.
+"""
+
+import argparse
+
+from geo_rota.utils.cep import compilar_base_cep
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Compila a base binária de centróides de CEP.")
+    parser.add_argument("origem", help="CSV com as colunas cep, latitude e longitude")
+    parser.add_argument("destino", help="Arquivo binário a ser gerado")
+    args = parser.parse_args()
+
+    total = compilar_base_cep(args.origem, args.destino)
+    print(f"{total} CEP(s) gravado(s) em {args.destino}.")
+
+
+if __name__ == "__main__":
+    main()
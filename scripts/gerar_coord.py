@@ -1,3 +1,27 @@
+"""
+CLI do cache de geocodificação.
+
+Exemplos:
+    python scripts/gerar_coord.py aquecer --empresa-id 1 --concorrencia 2
+    python scripts/gerar_coord.py exportar cache_geocodificacao.tsv.gz
+    python scripts/gerar_coord.py importar cache_geocodificacao.tsv.gz
+    python scripts/gerar_coord.py consultar "Rua Central, 1000, São Paulo - SP, 01000-000"
+
+``aquecer`` pode ser interrompido a qualquer momento: cada lote concluído já fica
+gravado no cache e a próxima execução continua pelos endereços que faltam.
+"""
+
+import argparse
+import sys
+import time
+
+from geo_rota.core.database import SessionLocal
+from geo_rota.services.cache_geocodificacao_service import (
+    ResumoAquecimento,
+    aquecer_cache_geocodificacao,
+    exportar_snapshot_cache,
+    importar_snapshot_cache,
+)
 from geo_rota.utils.geocode import GeocodeError, geocode_address
 
 
@@ -9,5 +33,81 @@ def retornar_rota(endereco: str) -> dict:
         raise ValueError(f"Erro ao geocodificar o endereço de origem: {exc}") from exc
 
 
+def _exibir_progresso(inicio: float):
+    def exibir(resumo: ResumoAquecimento) -> None:
+        decorrido = time.monotonic() - inicio
+        consultados = resumo.geocodificados + resumo.falhas
+        restantes = resumo.total - resumo.processados
+        taxa = consultados / decorrido if decorrido > 0 else 0.0
+        estimativa = f", ~{restantes / taxa / 60:.0f} min restantes" if taxa > 0 and restantes else ""
+        sys.stdout.write(
+            f"\r{resumo.processados}/{resumo.total} endereço(s): {resumo.ja_em_cache} já em cache, "
+            f"{resumo.geocodificados} geocodificado(s), {resumo.falhas} falha(s){estimativa}   "
+        )
+        sys.stdout.flush()
+
+    return exibir
+
+
+def _aquecer(args: argparse.Namespace) -> None:
+    with SessionLocal() as session:
+        resumo = aquecer_cache_geocodificacao(
+            session,
+            empresa_id=args.empresa_id,
+            concorrencia=args.concorrencia,
+            tamanho_lote=args.tamanho_lote,
+            progresso=_exibir_progresso(time.monotonic()),
+        )
+    print()
+    print(f"Concluído: {resumo.geocodificados} novo(s), {resumo.ja_em_cache} já em cache, {resumo.falhas} falha(s).")
+
+
+def _exportar(args: argparse.Namespace) -> None:
+    with SessionLocal() as session:
+        total = exportar_snapshot_cache(session, args.arquivo, incluir_negativos=args.incluir_negativos)
+    print(f"{total} entrada(s) exportada(s) para {args.arquivo}.")
+
+
+def _importar(args: argparse.Namespace) -> None:
+    with SessionLocal() as session:
+        resumo = importar_snapshot_cache(session, args.arquivo, sobrescrever=args.sobrescrever)
+    print(f"{resumo.lidos} lida(s), {resumo.gravados} gravada(s), {resumo.ignorados} ignorada(s).")
+
+
+def _consultar(args: argparse.Namespace) -> None:
+    print(retornar_rota(args.endereco))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Aquecimento e snapshot do cache de geocodificação.")
+    subcomandos = parser.add_subparsers(dest="comando", required=True)
+
+    aquecer = subcomandos.add_parser("aquecer", help="Geocodifica os endereços ativos que faltam no cache")
+    aquecer.add_argument("--empresa-id", type=int, help="Limita a uma empresa (padrão: todas)")
+    aquecer.add_argument("--concorrencia", type=int, default=2, help="Lotes processados em paralelo")
+    aquecer.add_argument("--tamanho-lote", type=int, default=25, help="Endereços gravados por lote")
+    aquecer.set_defaults(executar=_aquecer)
+
+    exportar = subcomandos.add_parser("exportar", help="Exporta o cache para um snapshot compactado")
+    exportar.add_argument("arquivo")
+    exportar.add_argument("--incluir-negativos", action="store_true", help="Inclui endereços não encontrados")
+    exportar.set_defaults(executar=_exportar)
+
+    importar = subcomandos.add_parser("importar", help="Carrega um snapshot no cache")
+    importar.add_argument("arquivo")
+    importar.add_argument("--sobrescrever", action="store_true", help="Substitui entradas já existentes")
+    importar.set_defaults(executar=_importar)
+
+    consultar = subcomandos.add_parser("consultar", help="Geocodifica um único endereço")
+    consultar.add_argument("endereco")
+    consultar.set_defaults(executar=_consultar)
+
+    args = parser.parse_args()
+    try:
+        args.executar(args)
+    except ValueError as exc:
+        parser.exit(1, f"Erro: {exc}\n")
+
+
 if __name__ == "__main__":
-    retornar_rota("Rua Central, 1000, São Paulo - SP, 01000-000")
\ No newline at end of file
+    main()
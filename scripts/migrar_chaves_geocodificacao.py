@@ -0,0 +1,117 @@
+"""
+Migra as chaves de ``cache_geocodificacao`` para o formato canônico de endereço.
+
+Antes da canonicalização a chave era apenas o endereço em minúsculas com espaços
+colapsados, e cada tela montava o endereço de um jeito. Este script recalcula a
+chave de cada registro com ``canonicalizar_endereco``; quando várias chaves antigas
+convergem para a mesma, mantém o registro positivo mais recente e remove os demais.
+
+Também atualiza ``funcionarios.endereco_hash`` dos cadastros cujo hash foi gerado
+no formato antigo e continua válido, evitando que sejam geocodificados de novo.
+
+Uso: ``python scripts/migrar_chaves_geocodificacao.py [--simular]``
+"""
+
+import argparse
+import hashlib
+
+from sqlalchemy import delete, select, update
+
+from geo_rota.core.database import SessionLocal
+from geo_rota.models import Funcionario
+from geo_rota.models.cache import CacheGeocodificacao
+from geo_rota.services.geocodificacao_service import calcular_hash_endereco
+from geo_rota.utils.endereco import canonicalizar_endereco
+
+_TAMANHO_LOTE = 500
+
+
+def _hash_formato_antigo(funcionario: Funcionario) -> str:
+    partes = [
+        funcionario.logradouro,
+        funcionario.numero,
+        funcionario.complemento,
+        funcionario.bairro,
+        funcionario.cidade,
+        funcionario.estado,
+        funcionario.cep,
+    ]
+    endereco = " ".join(", ".join(filter(None, partes)).lower().split())
+    return hashlib.sha256(endereco.encode("utf-8")).hexdigest()
+
+
+def migrar_cache(session) -> tuple[int, int]:
+    registros = session.execute(
+        select(
+            CacheGeocodificacao.id,
+            CacheGeocodificacao.endereco_normalizado,
+            CacheGeocodificacao.negativo,
+            CacheGeocodificacao.atualizado_em,
+        )
+    ).all()
+
+    grupos: dict[str, list] = {}
+    for registro in registros:
+        grupos.setdefault(canonicalizar_endereco(registro.endereco_normalizado), []).append(registro)
+
+    renomear: dict[int, str] = {}
+    remover: list[int] = []
+    for chave, candidatos in grupos.items():
+        # Positivos antes de negativos; entre eles, o mais recente.
+        candidatos.sort(key=lambda item: (bool(item.negativo), -item.atualizado_em.timestamp()))
+        vencedor, *descartados = candidatos
+        remover.extend(item.id for item in descartados)
+        if not chave:
+            remover.append(vencedor.id)
+        elif vencedor.endereco_normalizado != chave:
+            renomear[vencedor.id] = chave
+
+    for inicio in range(0, len(remover), _TAMANHO_LOTE):
+        lote = remover[inicio : inicio + _TAMANHO_LOTE]
+        session.execute(delete(CacheGeocodificacao).where(CacheGeocodificacao.id.in_(lote)))
+
+    # Duas etapas para não violar a unicidade quando chaves trocam entre registros.
+    for registro_id in renomear:
+        session.execute(
+            update(CacheGeocodificacao)
+            .where(CacheGeocodificacao.id == registro_id)
+            .values(endereco_normalizado=f"__migrando__{registro_id}")
+        )
+    for registro_id, chave in renomear.items():
+        session.execute(
+            update(CacheGeocodificacao).where(CacheGeocodificacao.id == registro_id).values(endereco_normalizado=chave)
+        )
+    return len(renomear), len(remover)
+
+
+def migrar_hashes_funcionarios(session) -> int:
+    atualizados = 0
+    for funcionario in session.query(Funcionario).filter(Funcionario.endereco_hash.isnot(None)).all():
+        if funcionario.endereco_hash == _hash_formato_antigo(funcionario):
+            novo_hash = calcular_hash_endereco(funcionario)
+            if novo_hash != funcionario.endereco_hash:
+                funcionario.endereco_hash = novo_hash
+                atualizados += 1
+    return atualizados
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Recalcula as chaves do cache de geocodificação.")
+    parser.add_argument("--simular", action="store_true", help="Mostra o resultado sem gravar")
+    args = parser.parse_args()
+
+    with SessionLocal() as session:
+        renomeados, removidos = migrar_cache(session)
+        hashes = migrar_hashes_funcionarios(session)
+        if args.simular:
+            session.rollback()
+        else:
+            session.commit()
+
+    prefixo = "[simulação] " if args.simular else ""
+    print(f"{prefixo}{renomeados} chave(s) recalculada(s), {removidos} registro(s) duplicado(s) removido(s).")
+    print(f"{prefixo}{hashes} hash(es) de endereço de funcionário atualizado(s).")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+"""
+Servidor HTTP local compatível com o endpoint ``/search`` do Nominatim.
+
+Serve de substituto do provedor real em testes e benchmarks: aponte
+``GEOCODE_NOMINATIM_LOCAL_URL`` para ele (e, se quiser isolar a rede, use
+``GEOCODE_PROVEDORES='["nominatim_local"]'``). As coordenadas são derivadas de
+forma determinística do texto do endereço, dentro de uma caixa ao redor do centro
+informado; com ``--base-cep`` o centróide do CEP é usado quando existir.
+
+Exemplo: ``python scripts/nominatim_stub.py --porta 8088 --latencia 0.05 --taxa-falha 0.1``
+"""
+
+import argparse
+import hashlib
+import json
+import random
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from geo_rota.utils.cep import BaseCEP, extrair_cep
+
+
+def _coordenada_deterministica(endereco: str, centro: tuple[float, float], raio_graus: float) -> tuple[float, float]:
+    digest = hashlib.sha256(" ".join(endereco.lower().split()).encode("utf-8")).digest()
+    fator_lat = int.from_bytes(digest[:4], "big") / 0xFFFFFFFF
+    fator_lon = int.from_bytes(digest[4:8], "big") / 0xFFFFFFFF
+    return (
+        centro[0] + (fator_lat * 2 - 1) * raio_graus,
+        centro[1] + (fator_lon * 2 - 1) * raio_graus,
+    )
+
+
+def criar_handler(args: argparse.Namespace, base_cep: BaseCEP | None) -> type[BaseHTTPRequestHandler]:
+    class NominatimStubHandler(BaseHTTPRequestHandler):
+        def do_GET(self) -> None:  # noqa: N802 - assinatura do http.server
+            url = urlparse(self.path)
+            if url.path.rstrip("/") != "/search":
+                self.send_error(404)
+                return
+            if args.latencia:
+                time.sleep(args.latencia)
+            if args.taxa_falha and random.random() < args.taxa_falha:
+                self.send_error(503, "Falha simulada")
+                return
+
+            endereco = (parse_qs(url.query).get("q") or [""])[0]
+            resultados = []
+            if endereco and not any(marcador in endereco.lower() for marcador in args.nao_encontrar):
+                coordenada = None
+                cep = extrair_cep(endereco)
+                if base_cep is not None and cep is not None:
+                    encontrado = base_cep.buscar(cep)
+                    if encontrado is not None:
+                        coordenada = encontrado[:2]
+                if coordenada is None:
+                    coordenada = _coordenada_deterministica(endereco, (args.latitude, args.longitude), args.raio)
+                resultados.append(
+                    {
+                        "place_id": int(hashlib.sha1(endereco.encode("utf-8")).hexdigest()[:8], 16),
+                        "lat": f"{coordenada[0]:.7f}",
+                        "lon": f"{coordenada[1]:.7f}",
+                        "display_name": endereco,
+                    }
+                )
+
+            corpo = json.dumps(resultados).encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(corpo)))
+            self.end_headers()
+            self.wfile.write(corpo)
+
+        def log_message(self, format: str, *argumentos) -> None:  # noqa: A002
+            if args.verbose:
+                super().log_message(format, *argumentos)
+
+    return NominatimStubHandler
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Stub local do Nominatim para testes e benchmarks.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--porta", type=int, default=8088)
+    parser.add_argument("--latitude", type=float, default=-23.5505, help="Centro da área gerada")
+    parser.add_argument("--longitude", type=float, default=-46.6333, help="Centro da área gerada")
+    parser.add_argument("--raio", type=float, default=0.15, help="Meia largura da área, em graus")
+    parser.add_argument("--latencia", type=float, default=0.0, help="Atraso por requisição, em segundos")
+    parser.add_argument("--taxa-falha", type=float, default=0.0, help="Fração de respostas HTTP 503")
+    parser.add_argument(
+        "--nao-encontrar",
+        action="append",
+        default=[],
+        help="Trecho que faz o endereço retornar vazio (pode repetir)",
+    )
+    parser.add_argument("--base-cep", help="Base compilada por scripts/compilar_base_cep.py")
+    parser.add_argument("--verbose", action="store_true")
+    args = parser.parse_args()
+    args.nao_encontrar = [trecho.lower() for trecho in args.nao_encontrar]
+
+    base_cep = BaseCEP(args.base_cep) if args.base_cep else None
+    servidor = ThreadingHTTPServer((args.host, args.porta), criar_handler(args, base_cep))
+    print(f"Stub do Nominatim em http://{args.host}:{args.porta}")
+    try:
+        servidor.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        servidor.server_close()
+        if base_cep is not None:
+            base_cep.fechar()
+
+
+if __name__ == "__main__":
+    main()
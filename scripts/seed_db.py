@@ -24,36 +24,20 @@ from geo_rota.models.enums import (
     TurnoTrabalhoEnum,
 )
 from geo_rota.models.model_base import Base
+from geo_rota.services.geocodificacao_service import montar_endereco_destino, montar_endereco_funcionario
+from geo_rota.utils.endereco import canonicalizar_endereco
 
 
 def _normalizar_endereco(endereco: str) -> str:
-    return " ".join(endereco.strip().lower().split())
+    return canonicalizar_endereco(endereco)
 
 
 def _montar_endereco_funcionario(funcionario: Funcionario) -> str:
-    partes = [
-        funcionario.logradouro,
-        funcionario.numero,
-        funcionario.complemento,
-        funcionario.bairro,
-        funcionario.cidade,
-        funcionario.estado,
-        funcionario.cep,
-    ]
-    return ", ".join(filter(None, partes))
+    return montar_endereco_funcionario(funcionario)
 
 
 def _montar_endereco_destino(destino: DestinoRota) -> str:
-    partes = [
-        destino.logradouro,
-        destino.numero,
-        destino.complemento,
-        destino.bairro,
-        f"{destino.cidade} - {destino.estado}",
-        destino.cep,
-        "Brasil",
-    ]
-    return ", ".join(filter(None, partes))
+    return montar_endereco_destino(destino)
 
 
 def get_or_create(session: Session, model, defaults=None, **filters):